@@ -0,0 +1,161 @@
+# archive.py
+"""
+task_completions ni oylik arxiv fayllarga bo'lish
+
+Issiq jadvalda (task_completions) faqat oxirgi COMPLETIONS_HOT_MONTHS
+oy qoladi. Eski oylar alohida SQLite fayllarga ko'chiriladi:
+
+    {ARCHIVE_DIR}/completions_2026-01.db
+
+Qaysi oylar arxivda ekanligi completion_archives jadvalida. Oraliq
+so'rovlar completions_source() orqali kerakli arxivlarni ATTACH qilib,
+issiq jadval bilan UNION ALL qiladi - chaqiruvchi uchun farqi yo'q.
+Statistika uchun kunlik yig'indi (daily_user_stats) o'chirilmaydi.
+"""
+
+import os
+from contextlib import contextmanager
+from datetime import date
+
+import config
+
+
+# Issiq va arxiv jadvallaridagi ustunlar (bir xil tartibda)
+COLUMNS = (
+    "id, task_id, user_id, completion_date, completed_at, "
+    "media_type, media_file_id, text_message"
+)
+
+
+def month_key(day):
+    """Sana -> "2026-01" """
+    return f"{day.year:04d}-{day.month:02d}"
+
+
+def month_start(key):
+    """"2026-01" -> 2026-01-01"""
+    year, month = map(int, key.split("-"))
+    return date(year, month, 1)
+
+
+def add_months(day, months):
+    """Oyning 1-kuniga N oy qo'shish (manfiy bo'lishi mumkin)"""
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def schema_name(key):
+    """ATTACH nomi: "2026-01" -> archive_2026_01"""
+    return "archive_" + key.replace("-", "_")
+
+
+def archive_path(key, directory=None):
+    """Oy arxiv fayli yo'li"""
+    return os.path.join(directory or config.ARCHIVE_DIR, f"completions_{key}.db")
+
+
+def hot_start(today, hot_months=None):
+    """Issiq jadvaldagi eng eski oyning 1-kuni (kamida o'tgan oy qoladi)"""
+    hot_months = max(hot_months or config.COMPLETIONS_HOT_MONTHS, 2)
+    return add_months(today.replace(day=1), -(hot_months - 1))
+
+
+def archived_months(conn):
+    """Arxivlangan oylar: [(month, path, purged), ...] eskisidan boshlab"""
+    return conn.execute("""
+        SELECT month, path, purged_at IS NOT NULL
+        FROM completion_archives
+        ORDER BY month
+    """).fetchall()
+
+
+def purged_months(conn):
+    """Saqlash muddati o'tib fayli o'chirilgan oylar"""
+    return {key for key, path, purged in archived_months(conn) if purged}
+
+
+def attached_schemas(conn):
+    """Ulanishga ATTACH qilingan bazalar nomlari"""
+    return {row[1] for row in conn.execute("PRAGMA database_list").fetchall()}
+
+
+def attach(conn, key, path):
+    """Arxivni ulash (allaqachon ulangan bo'lsa hech narsa qilmaydi)"""
+    schema = schema_name(key)
+    if schema not in attached_schemas(conn):
+        conn.execute(f"ATTACH DATABASE ? AS {schema}", (path,))
+    return schema
+
+
+def detach(conn, key):
+    conn.execute(f"DETACH DATABASE {schema_name(key)}")
+
+
+def create_archive_table(conn, schema):
+    """Arxiv faylida task_completions jadvali (issiq jadval bilan bir xil)"""
+    conn.execute(f"""
+    CREATE TABLE IF NOT EXISTS {schema}.task_completions (
+        id INTEGER PRIMARY KEY,
+        task_id INTEGER,
+        user_id INTEGER,
+        completion_date DATE NOT NULL,
+        completed_at TIMESTAMP,
+        media_type TEXT,
+        media_file_id TEXT,
+        text_message TEXT,
+        UNIQUE(task_id, user_id, completion_date)
+    )
+    """)
+    conn.execute(f"""
+    CREATE INDEX IF NOT EXISTS {schema}.idx_completions_date_user
+    ON task_completions(completion_date, user_id, task_id)
+    """)
+
+
+@contextmanager
+def completions_source(conn, start_date, end_date):
+    """[start_date, end_date] oralig'i uchun task_completions manbasi (SQL).
+
+    Arxivga tegmasa - oddiy "task_completions". Aks holda kerakli
+    arxivlar ulanib, issiq jadval bilan birlashtirilgan subquery
+    qaytadi; chiqishda ulangan arxivlar uziladi. Chaqiruvchi baribir
+    completion_date bo'yicha filtrlaydi.
+
+    ATTACH ochiq tranzaksiya ichida ishlamaydi - arxiv oylari faqat
+    puldagi ulanish orqali (yagona yozuvchidan emas) o'qiladi.
+    """
+    months = archived_months(conn)
+    if not months:
+        yield "task_completions"
+        return
+
+    # Arxivlangan oylar ketma-ket: chegaradan oldingi qatorlar issiq
+    # jadvalda (o'chirilish jarayonida) qolgan bo'lsa ham hisobga olinmaydi
+    boundary = add_months(month_start(months[-1][0]), 1)
+    start, end = str(start_date), str(end_date)
+    needed = [
+        (key, path) for key, path, purged in months
+        if not purged
+        and str(month_start(key)) <= end
+        and str(add_months(month_start(key), 1)) > start
+    ]
+
+    if not needed and start >= str(boundary):
+        yield "task_completions"
+        return
+
+    attached = []
+    try:
+        parts = [
+            f"SELECT {COLUMNS} FROM main.task_completions "
+            f"WHERE completion_date >= '{boundary.isoformat()}'"
+        ]
+        for key, path in needed:
+            if schema_name(key) not in attached_schemas(conn):
+                attach(conn, key, path)
+                attached.append(key)
+            parts.append(f"SELECT {COLUMNS} FROM {schema_name(key)}.task_completions")
+        yield "(" + " UNION ALL ".join(parts) + ")"
+    finally:
+        for key in attached:
+            detach(conn, key)
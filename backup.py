@@ -0,0 +1,140 @@
+# backup.py
+"""
+Ma'lumotlar bazasining zaxira nusxalari (bot ishlab turganda)
+
+Nusxa sqlite3 backup API orqali sahifalab olinadi: har bir qadamda
+BACKUP_PAGES sahifa ko'chiriladi, qadamlar orasida yozuvchiga navbat
+beriladi. Manba ulanishida ochiq o'qish tranzaksiyasi turadi - WAL
+rejimida bu barqaror surat (snapshot), parallel yozishlar nusxani
+qaytadan boshlatmaydi va o'zlari ham to'xtab qolmaydi.
+
+Keyin nusxa PRAGMA integrity_check bilan tekshiriladi, gzip bilan
+siqiladi va oxirgi BACKUP_KEEP tasi saqlanadi:
+
+    {BACKUP_DIR}/workly_20260118_030000.db.gz
+"""
+
+import gzip
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+import config
+
+
+PREFIX = "workly_"
+SUFFIX = ".db.gz"
+
+# Bir vaqtda faqat bitta nusxa (scheduler va admin buyrug'i)
+_lock = threading.Lock()
+
+
+class BackupError(RuntimeError):
+    """Nusxa olinmadi yoki tekshiruvdan o'tmadi"""
+
+
+class BackupResult:
+    """Tayyor nusxa: yo'l, hajm (siqilgan / asl), davomiylik, o'chirilganlar"""
+
+    __slots__ = ("path", "size", "raw_size", "pages", "duration", "removed")
+
+    def __init__(self, path, size, raw_size, pages, duration, removed):
+        self.path = path
+        self.size = size
+        self.raw_size = raw_size
+        self.pages = pages
+        self.duration = duration
+        self.removed = removed
+
+
+def backup_files(directory=None):
+    """Mavjud nusxalar (eskisidan boshlab)"""
+    directory = directory or config.BACKUP_DIR
+    if not os.path.isdir(directory):
+        return []
+    names = sorted(
+        name for name in os.listdir(directory)
+        if name.startswith(PREFIX) and name.endswith(SUFFIX)
+    )
+    return [os.path.join(directory, name) for name in names]
+
+
+def _copy(db_name, target):
+    """Sahifalab nusxa olish, ko'chirilgan sahifalar sonini qaytaradi"""
+    pages = [0]
+
+    def progress(status, remaining, total):
+        pages[0] = total
+        # Qadamlar orasida yozuvchi va o'quvchilarga navbat berish
+        time.sleep(config.BACKUP_STEP_PAUSE / 1000)
+
+    source = sqlite3.connect(db_name, isolation_level=None)
+    dest = sqlite3.connect(target)
+    try:
+        source.execute(f"PRAGMA busy_timeout = {config.DB_BUSY_TIMEOUT}")
+        # Barqaror surat: nusxa davomida ko'rinadigan holat o'zgarmaydi
+        source.execute("BEGIN")
+        source.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+        source.backup(dest, pages=config.BACKUP_PAGES, progress=progress)
+        source.execute("COMMIT")
+
+        # Nusxa mustaqil fayl bo'lishi kerak (WAL siz)
+        dest.execute("PRAGMA journal_mode = DELETE")
+        result = dest.execute("PRAGMA integrity_check").fetchall()
+        if result != [("ok",)]:
+            problems = "; ".join(row[0] for row in result[:5])
+            raise BackupError(f"Nusxa tekshiruvdan o'tmadi: {problems}")
+    finally:
+        dest.close()
+        source.close()
+    return pages[0]
+
+
+def _compress(source, target):
+    with open(source, "rb") as raw, gzip.open(target, "wb", compresslevel=6) as packed:
+        shutil.copyfileobj(raw, packed, 1024 * 1024)
+
+
+def rotate(directory=None, keep=None):
+    """Eng yangi `keep` ta nusxadan tashqarisini o'chirish, o'chirilganlar soni"""
+    keep = keep if keep is not None else config.BACKUP_KEEP
+    files = backup_files(directory)
+    old = files[:-keep] if keep > 0 else []
+    for path in old:
+        os.remove(path)
+    return len(old)
+
+
+def create_backup(db_name, directory=None, keep=None):
+    """Zaxira nusxa olish: nusxa -> tekshirish -> siqish -> rotatsiya"""
+    if not _lock.acquire(blocking=False):
+        raise BackupError("Zaxira nusxa allaqachon olinmoqda")
+
+    directory = directory or config.BACKUP_DIR
+    started = time.perf_counter()
+    name = PREFIX + datetime.now().strftime("%Y%m%d_%H%M%S")
+    raw = os.path.join(directory, name + ".db.partial")
+    partial = os.path.join(directory, name + SUFFIX + ".partial")
+    path = os.path.join(directory, name + SUFFIX)
+
+    try:
+        os.makedirs(directory, exist_ok=True)
+        pages = _copy(db_name, raw)
+        raw_size = os.path.getsize(raw)
+
+        _compress(raw, partial)
+        os.replace(partial, path)
+
+        removed = rotate(directory, keep)
+        return BackupResult(
+            path, os.path.getsize(path), raw_size, pages,
+            time.perf_counter() - started, removed
+        )
+    finally:
+        for leftover in (raw, partial):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+        _lock.release()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# bench_fsm.py
+"""
+FSM storage benchmarki: aiogram MemoryStorage va fsm_storage.DatabaseStorage
+
+    python bench_fsm.py [--keys 1000] [--rounds 20]
+
+Vaqtinchalik bazada ishlaydi (DATABASE_NAME dan boshqa), qolgan
+sozlamalar .env dan. Har bir amal uchun o'rtacha narx (mikrosekund):
+
+    get_state / set_data      - keshda bor kalit (issiq)
+    get_state (sovuq)         - restartdan keyin, ombordan yuklanadi
+    flush                     - bitta tranzaksiyada yozish, kalit boshiga
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+_tmp = tempfile.mkdtemp(prefix="bench_fsm_")
+os.environ["DATABASE_NAME"] = os.path.join(_tmp, "bench.db")
+
+from aiogram.fsm.storage.base import StorageKey  # noqa: E402
+from aiogram.fsm.storage.memory import MemoryStorage  # noqa: E402
+
+from database import adb  # noqa: E402
+from fsm_storage import DatabaseStorage  # noqa: E402
+
+STATE = "AddTaskStates:waiting_for_text"
+DATA = {"filial_id": 2, "role_id": 3, "task_type": "custom", "recurrence": "weekly:0,2,4"}
+
+
+async def measure(operation, keys, rounds):
+    """Bitta amalning o'rtacha narxi (mikrosekund)"""
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for key in keys:
+            await operation(key)
+    return (time.perf_counter() - started) / (rounds * len(keys)) * 1e6
+
+
+async def bench(storage, keys, rounds):
+    for key in keys:
+        await storage.set_state(key, STATE)
+        await storage.set_data(key, DATA)
+    return {
+        "get_state": await measure(storage.get_state, keys, rounds),
+        "set_data": await measure(lambda key: storage.set_data(key, DATA), keys, rounds),
+    }
+
+
+async def main(args):
+    keys = [StorageKey(bot_id=1, chat_id=i, user_id=i) for i in range(1, args.keys + 1)]
+    adb.start_writer()
+
+    memory = MemoryStorage()
+    results = {"MemoryStorage": await bench(memory, keys, args.rounds)}
+
+    # Fon yozuvchisi o'lchovga aralashmasin - flush alohida o'lchanadi
+    database = DatabaseStorage(flush_interval=3600)
+    results["DatabaseStorage"] = await bench(database, keys, args.rounds)
+
+    started = time.perf_counter()
+    written = await database.flush()
+    flush_cost = (time.perf_counter() - started) / max(written, 1) * 1e6
+    await database.close()
+
+    # "Restart": bo'sh kesh, har bir kalit ombordan
+    cold = DatabaseStorage(flush_interval=3600)
+    cold_cost = await measure(cold.get_state, keys, 1)
+    assert await cold.get_data(keys[0]) == DATA
+    await cold.close()
+
+    await adb.stop_writer()
+    adb.close()
+
+    print(f"🔑 Kalitlar: {args.keys}, takrorlar: {args.rounds}")
+    print(f"{'':18}{'get_state':>12}{'set_data':>12}")
+    for name, result in results.items():
+        print(f"{name:18}{result['get_state']:>10.2f}µs{result['set_data']:>10.2f}µs")
+    print(f"DatabaseStorage: sovuq get_state {cold_cost:.1f}µs, flush {flush_cost:.1f}µs/kalit")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="FSM storage benchmarki")
+    parser.add_argument("--keys", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=20)
+    asyncio.run(main(parser.parse_args()))
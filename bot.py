@@ -12,12 +12,18 @@ import sys
 
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
 from aiogram.enums import ParseMode
 from aiogram.fsm.storage.memory import MemoryStorage
 
 import config
-from database import db
+from database import adb
+from fsm_storage import DatabaseStorage
+from outbox import outbox
 from scheduler import setup_scheduler, stop_scheduler
+from sender import sender
+from webhook import WebhookServer
 
 # Handlerlarni import qilish
 from handlers import router
@@ -42,13 +48,28 @@ async def main():
         logger.error("❌ BOT_TOKEN ni config.py da o'zgartiring!")
         return
     
+    if config.RUN_MODE not in ("polling", "webhook"):
+        logger.error(f"❌ Noma'lum RUN_MODE: {config.RUN_MODE}")
+        return
+    if config.RUN_MODE == "webhook" and not config.WEBHOOK_URL:
+        logger.error("❌ Webhook rejimi uchun WEBHOOK_URL kerak!")
+        return
+    
+    # Boshqa Bot API server (lokal sinov yoki o'z serverimiz)
+    session = None
+    if config.TELEGRAM_API_URL:
+        session = AiohttpSession(api=TelegramAPIServer.from_base(config.TELEGRAM_API_URL))
+    
     # Bot va Dispatcher yaratish
     bot = Bot(
         token=config.BOT_TOKEN,
+        session=session,
         default=DefaultBotProperties(parse_mode=ParseMode.HTML)
     )
     
-    dp = Dispatcher(storage=MemoryStorage())
+    # FSM holatlari omborda (restartdan keyin ham davom etadi)
+    storage = DatabaseStorage() if config.FSM_STORAGE == "database" else MemoryStorage()
+    dp = Dispatcher(storage=storage)
     
     # Bot obyektini user handlerga uzatish (guruhga yuborish uchun)
     # user.set_bot(bot)
@@ -56,10 +77,19 @@ async def main():
     # Routerlarni ro'yxatdan o'tkazish
     dp.include_router(router)
     
+    # Yozishlar yagona yozuvchi orqali (guruhli commit)
+    adb.start_writer()
+    
+    # Chiquvchi xabarlar flood limitlari ichida (sender.py)
+    sender.start()
+    
+    # Navbatda qolgan guruh xabarlari (outbox.py) - oldingi ishga tushishdan ham
+    outbox.start(bot)
+    
     # Database ni tekshirish
     logger.info("📊 Database tekshirilmoqda...")
-    filials = db.get_all_filials()
-    roles = db.get_all_roles()
+    filials = await adb.get_all_filials()
+    roles = await adb.get_all_roles()
     logger.info(f"   ✅ Filiallar: {len(filials)} ta")
     logger.info(f"   ✅ Rollar: {len(roles)} ta")
     
@@ -72,21 +102,33 @@ async def main():
     logger.info(f"🤖 Bot ishga tushdi: @{bot_info.username}")
     logger.info(f"📝 Bot ID: {bot_info.id}")
     logger.info(f"👤 Bot nomi: {bot_info.first_name}")
+    logger.info(f"📡 Rejim: {config.RUN_MODE}")
     logger.info("=" * 50)
     logger.info("✅ Bot ishlayapti! To'xtatish uchun Ctrl+C bosing")
     logger.info("=" * 50)
     
     try:
         # Botni ishga tushirish
-        await dp.start_polling(
-            bot,
-            allowed_updates=dp.resolve_used_update_types()
-        )
+        if config.RUN_MODE == "webhook":
+            server = WebhookServer(dp, bot)
+            await server.run(allowed_updates=dp.resolve_used_update_types())
+        else:
+            # Oldin webhook rejimida ishlagan bo'lsa - getUpdates ishlamaydi
+            await bot.delete_webhook()
+            await dp.start_polling(
+                bot,
+                allowed_updates=dp.resolve_used_update_types()
+            )
     finally:
         # Tozalash
         logger.info("🛑 Bot to'xtatilmoqda...")
         await stop_scheduler()
+        await outbox.stop()
+        await sender.stop()
         await bot.session.close()
+        await storage.close()
+        await adb.stop_writer()
+        adb.close()
         logger.info("✅ Bot to'xtatildi!")
 
 
@@ -0,0 +1,93 @@
+# cache.py
+"""
+Jarayon ichidagi kesh - kam o'zgaradigan ma'lumotlar uchun
+"""
+
+import functools
+import threading
+import time
+from collections import OrderedDict
+
+
+_MISSING = object()
+
+
+class LRUCache:
+    """Hajmi cheklangan LRU kesh (thread-safe, ixtiyoriy TTL bilan)"""
+
+    def __init__(self, maxsize=128, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=_MISSING):
+        """Qiymatni olish (topilmasa default)"""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or (item[1] is not None and item[1] < time.monotonic()):
+                # Topilmadi yoki muddati o'tgan
+                self._data.pop(key, None)
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def set(self, key, value):
+        """Qiymatni saqlash, eng eski yozuvni chiqarib tashlash"""
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        """Keshni tozalash"""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        """Kesh statistikasi"""
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._data)}
+
+
+def cached(namespace):
+    """Metod natijasini self._caches[namespace] da saqlash"""
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            cache = self._caches[namespace]
+            key = (method.__name__, args, tuple(sorted(kwargs.items())))
+            value = cache.get(key)
+            if value is _MISSING:
+                value = method(self, *args, **kwargs)
+                cache.set(key, value)
+            return value
+        return wrapper
+    return decorator
+
+
+def writes(*namespaces):
+    """Yozish metodi - tugagach ko'rsatilgan keshlarni tozalaydi.
+
+    Tozalash self._invalidate() orqali: guruhli tranzaksiya ichida u
+    commit dan keyinga qoldiriladi. is_write belgisi bo'yicha AsyncDatabase
+    metodni yagona yozuvchiga yuboradi.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                self._invalidate(namespaces)
+        wrapper.is_write = True
+        return wrapper
+    return decorator
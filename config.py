@@ -15,6 +15,100 @@ DATABASE_NAME = env.str("DATABASE_NAME")
 ADMIN_PHONES = env.list("ADMIN_PHONES")
 GROUP_LINKS = env.list("GROUP_LINKS")
 
+# FSM holatlari (fsm_storage.py): "database" - restartdan keyin ham qoladi, "memory"
+FSM_STORAGE = env.str("FSM_STORAGE", "database")
+FSM_CACHE_SIZE = env.int("FSM_CACHE_SIZE", 10000)  # xotirada saqlanadigan kalitlar
+FSM_FLUSH_INTERVAL = env.float("FSM_FLUSH_INTERVAL", 1.0)  # soniya (write-behind)
+FSM_TTL = env.int("FSM_TTL", 24 * 60 * 60)  # tashlab ketilgan jarayon, soniya
+
+# Chiquvchi xabarlar navbati (sender.py) - Telegram flood limitlari
+SEND_GLOBAL_RATE = env.int("SEND_GLOBAL_RATE", 25)  # soniyasiga, barcha chatlar
+SEND_GROUP_RATE = env.int("SEND_GROUP_RATE", 20)  # daqiqasiga, bitta guruhga
+SEND_CHAT_RATE = env.float("SEND_CHAT_RATE", 1.0)  # soniyasiga, bitta shaxsiy chatga
+SEND_CHAT_BURST = env.int("SEND_CHAT_BURST", 1)  # bitta chatga ketma-ket (1 dan ko'pi - 429 xavfi)
+SEND_CONCURRENCY = env.int("SEND_CONCURRENCY", 16)  # bir vaqtdagi so'rovlar
+SEND_MAX_RETRIES = env.int("SEND_MAX_RETRIES", 5)
+SEND_BACKOFF = env.float("SEND_BACKOFF", 1.0)  # birinchi qayta urinishgacha, soniya (x2)
+
+# Guruh xabarlari navbati (outbox.py) - bajarilish bilan bir tranzaksiyada yoziladi
+OUTBOX_BATCH_SIZE = env.int("OUTBOX_BATCH_SIZE", 100)  # bir o'qishda xabarlar
+OUTBOX_POLL_INTERVAL = env.float("OUTBOX_POLL_INTERVAL", 5.0)  # soniya (yangisi darhol)
+OUTBOX_MAX_ATTEMPTS = env.int("OUTBOX_MAX_ATTEMPTS", 10)  # keyin - failed
+OUTBOX_BACKOFF = env.float("OUTBOX_BACKOFF", 5.0)  # birinchi qayta urinishgacha, soniya (x2)
+OUTBOX_KEEP_DAYS = env.int("OUTBOX_KEEP_DAYS", 7)  # yuborilganlar shuncha kun saqlanadi
+
+# Albom (media group) bo'laklari shuncha soniya jimlikkacha yig'iladi
+MEDIA_GROUP_WAIT = env.float("MEDIA_GROUP_WAIT", 0.5)
+
+# Ishga tushirish rejimi: "polling" yoki "webhook" (webhook.py)
+RUN_MODE = env.str("RUN_MODE", "polling")
+# Tashqi manzil (Render o'zi RENDER_EXTERNAL_URL beradi)
+WEBHOOK_URL = env.str("WEBHOOK_URL", env.str("RENDER_EXTERNAL_URL", ""))
+WEBHOOK_PATH = env.str("WEBHOOK_PATH", "/webhook")
+WEBHOOK_SECRET = env.str("WEBHOOK_SECRET", "")  # bo'sh - tokendan olinadi
+WEBHOOK_WORKERS = env.int("WEBHOOK_WORKERS", 8)  # parallel qayta ishlanadigan update lar
+WEBHOOK_QUEUE_SIZE = env.int("WEBHOOK_QUEUE_SIZE", 1000)
+WEBHOOK_MAX_CONNECTIONS = env.int("WEBHOOK_MAX_CONNECTIONS", 40)  # Telegram tomonidan
+WEB_HOST = env.str("WEB_HOST", "0.0.0.0")
+WEB_PORT = env.int("PORT", 8080)
+
+# Bot API manzili (bo'sh - api.telegram.org; fake_telegram.py yoki local Bot API)
+TELEGRAM_API_URL = env.str("TELEGRAM_API_URL", "")
+
+# Ma'lumotlar ombori: "sqlite" yoki "memory" (testlar va benchmarklar uchun)
+STORAGE_BACKEND = env.str("STORAGE_BACKEND", "sqlite")
+
+# Database ulanishlar puli
+DB_POOL_SIZE = env.int("DB_POOL_SIZE", 5)
+DB_BUSY_TIMEOUT = env.int("DB_BUSY_TIMEOUT", 5000)  # millisekund
+DB_SYNCHRONOUS = env.str("DB_SYNCHRONOUS", "NORMAL")  # WAL bilan NORMAL yetarli
+DB_CACHE_SIZE = env.int("DB_CACHE_SIZE", -16000)  # manfiy qiymat - KiB (16 MB)
+DB_MMAP_SIZE = env.int("DB_MMAP_SIZE", 64 * 1024 * 1024)  # bayt
+DB_HEALTH_CHECK_INTERVAL = env.int("DB_HEALTH_CHECK_INTERVAL", 60)  # soniya
+
+# Filial, rol, vazifa va guruhlar keshi (har bir tur uchun yozuvlar soni)
+REF_CACHE_SIZE = env.int("REF_CACHE_SIZE", 256)
+
+# Telegram ID -> user keshi (har bir update da qayta so'ralmasligi uchun)
+USER_CACHE_SIZE = env.int("USER_CACHE_SIZE", 2048)
+USER_CACHE_TTL = env.int("USER_CACHE_TTL", 60)  # soniya
+
+# "Mening statistikam" uchun tarix keshi
+HISTORY_CACHE_TTL = env.int("HISTORY_CACHE_TTL", 600)  # soniya
+
+# Yagona yozuvchi (writer.py) - yozishlar guruhlab commit qilinadi
+DB_WRITE_BATCH_SIZE = env.int("DB_WRITE_BATCH_SIZE", 64)
+DB_WRITE_BATCH_WINDOW = env.int("DB_WRITE_BATCH_WINDOW", 2)  # millisekund
+DB_WRITER_SYNCHRONOUS = env.str("DB_WRITER_SYNCHRONOUS", "FULL")  # commit = diskka yozildi
+
+# Bajarilishlar arxivi (archive.py) - eski oylar alohida fayllarga
+ARCHIVE_DIR = env.str("ARCHIVE_DIR", "archive")
+COMPLETIONS_HOT_MONTHS = env.int("COMPLETIONS_HOT_MONTHS", 3)  # joriy oy bilan, kamida 2
+ARCHIVE_RETENTION_MONTHS = env.int("ARCHIVE_RETENTION_MONTHS", 24)  # 0 - abadiy saqlash
+
+# Admin ro'yxatlari (ishchilar, vazifalar) - bir sahifadagi yozuvlar
+PAGE_SIZE = env.int("PAGE_SIZE", 10)
+
+# Inline qidiruv (search.py) - har bir tur bo'yicha natijalar soni
+SEARCH_RESULTS_LIMIT = env.int("SEARCH_RESULTS_LIMIT", 20)
+
+# Ishchilarni fayldan import qilish (roster.py)
+IMPORT_MAX_ROWS = env.int("IMPORT_MAX_ROWS", 10000)
+IMPORT_MAX_FILE_SIZE = env.int("IMPORT_MAX_FILE_SIZE", 5 * 1024 * 1024)  # bayt
+
+# Zaxira nusxalar (backup.py) - bot ishlab turganda sahifalab olinadi
+BACKUP_DIR = env.str("BACKUP_DIR", "backups")
+BACKUP_KEEP = env.int("BACKUP_KEEP", 7)  # saqlanadigan nusxalar soni
+BACKUP_PAGES = env.int("BACKUP_PAGES", 256)  # bir qadamda ko'chiriladigan sahifalar
+BACKUP_STEP_PAUSE = env.int("BACKUP_STEP_PAUSE", 5)  # qadamlar orasida, millisekund
+BACKUP_HOUR = env.int("BACKUP_HOUR", 4)  # har kuni shu soatda
+
+# Tungi xizmat ishlari (maintenance.py) - ANALYZE, vacuum, checkpoint
+MAINTENANCE_HOUR = env.int("MAINTENANCE_HOUR", 5)  # zaxira nusxadan keyin
+MAINTENANCE_ANALYSIS_LIMIT = env.int("MAINTENANCE_ANALYSIS_LIMIT", 1000)  # har indeksdan qatorlar
+MAINTENANCE_VACUUM_PAGES = env.int("MAINTENANCE_VACUUM_PAGES", 1000)  # bir bo'lakda sahifalar
+MAINTENANCE_VACUUM_PAUSE = env.int("MAINTENANCE_VACUUM_PAUSE", 20)  # bo'laklar orasida, millisekund
+
 
 # Vaqt zonasi
 TIMEZONE = "Asia/Tashkent"
@@ -50,7 +144,8 @@ MONTHS = {
 TASK_TYPES = {
     "daily": "🔴 HAR KUNLIK",
     "monday": "🔵 HAR DUSHANBA", 
-    "monthly": "🟢 HAR OY"
+    "monthly": "🟢 HAR OY",
+    "custom": "🟣 MAXSUS JADVAL"
 }
 
 # Statistika emoji
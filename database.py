@@ -3,171 +3,308 @@
 Database operatsiyalari - SQLite
 """
 
+import asyncio
+import functools
+import json
+import os
+import queue
 import sqlite3
-from datetime import datetime, date
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, date, timedelta
+import archive
+import backup
 import config
+import maintenance
+from cache import LRUCache, cached, writes
+from migrations import migrate
+from models import (
+    Admin, Completion, DayResult, Evidence, Filial, OutboxMessage, OutboxStats, Page, Role,
+    RoleStats, StatsRow, Task, User, UserDayStats, UserStatistics, UserTask, Worker
+)
+from recurrence import LEGACY_RULES, applicable_sql, compile_rule
+from search import match_query
+from storage import Storage
+from writer import DatabaseWriter
 
-class Database:
+
+class PooledConnection:
+    """Pooldan olingan ulanish - close() ulanishni yopmaydi, pulga qaytaradi"""
+    
+    __slots__ = ("_conn", "_pool")
+    
+    def __init__(self, conn, pool):
+        self._conn = conn
+        self._pool = pool
+    
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+    
+    def close(self):
+        """Ulanishni pulga qaytarish"""
+        if self._conn is not None:
+            self._pool.release(self._conn)
+            self._conn = None
+
+
+class BatchConnection:
+    """Guruhli tranzaksiya ichidagi ulanish - commit() va close() ni yozuvchi bajaradi"""
+    
+    __slots__ = ("_conn",)
+    
+    def __init__(self, conn):
+        self._conn = conn
+    
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+    
+    def commit(self):
+        pass
+    
+    def close(self):
+        pass
+
+
+class ConnectionPool:
+    """Uzoq yashaydigan SQLite ulanishlari puli (WAL rejimida)"""
+    
+    def __init__(self, db_name, size=config.DB_POOL_SIZE,
+                 busy_timeout=config.DB_BUSY_TIMEOUT,
+                 synchronous=config.DB_SYNCHRONOUS,
+                 cache_size=config.DB_CACHE_SIZE,
+                 mmap_size=config.DB_MMAP_SIZE,
+                 health_check_interval=config.DB_HEALTH_CHECK_INTERVAL):
+        self.db_name = db_name
+        self.size = size
+        self.busy_timeout = busy_timeout
+        self.synchronous = synchronous
+        self.cache_size = cache_size
+        self.mmap_size = mmap_size
+        self.health_check_interval = health_check_interval
+        
+        # (ulanish, oxirgi ishlatilgan vaqt) - LIFO: issiq ulanish birinchi olinadi
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._connections = set()
+    
+    def _connect(self):
+        """Yangi ulanish ochish va PRAGMA larni sozlash"""
+        conn = sqlite3.connect(
+            self.db_name,
+            timeout=self.busy_timeout / 1000,
+            check_same_thread=False
+        )
+        # Faqat yangi bazada ta'sir qiladi (eskisi - manage.py vacuum)
+        conn.execute(f"PRAGMA auto_vacuum = {maintenance.AUTO_VACUUM_INCREMENTAL}")
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout)}")
+        conn.execute(f"PRAGMA synchronous = {self.synchronous}")
+        conn.execute(f"PRAGMA cache_size = {int(self.cache_size)}")
+        conn.execute(f"PRAGMA mmap_size = {int(self.mmap_size)}")
+        with self._lock:
+            self._connections.add(conn)
+        return conn
+    
+    def _discard(self, conn):
+        """Buzilgan ulanishni yopish"""
+        with self._lock:
+            self._connections.discard(conn)
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+    
+    def _is_healthy(self, conn):
+        """Ulanish ishlayotganini tekshirish"""
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+    
+    def dedicated(self, synchronous=None):
+        """Puldan tashqari alohida ulanish (yagona yozuvchi uchun)"""
+        conn = self._connect()
+        if synchronous:
+            conn.execute(f"PRAGMA synchronous = {synchronous}")
+        return conn
+    
+    def acquire(self, timeout=None):
+        """Puldan ulanish olish (bo'sh ulanish bo'lmasa kutadi)"""
+        if timeout is None:
+            timeout = self.busy_timeout / 1000
+        if not self._slots.acquire(timeout=timeout):
+            raise sqlite3.OperationalError("Database ulanishlar puli band")
+        
+        try:
+            while True:
+                try:
+                    conn, last_used = self._idle.get_nowait()
+                except queue.Empty:
+                    return self._connect()
+                
+                # Uzoq turib qolgan ulanishni tekshirish
+                if time.monotonic() - last_used < self.health_check_interval or self._is_healthy(conn):
+                    return conn
+                self._discard(conn)
+        except Exception:
+            self._slots.release()
+            raise
+    
+    def release(self, conn):
+        """Ulanishni pulga qaytarish"""
+        try:
+            if conn.in_transaction:
+                # Commit qilinmagan o'zgarishlar keyingi foydalanuvchiga o'tmasin
+                conn.rollback()
+            self._idle.put((conn, time.monotonic()))
+        except sqlite3.Error:
+            self._discard(conn)
+        finally:
+            self._slots.release()
+    
+    def close_all(self):
+        """Barcha ulanishlarni yopish"""
+        with self._lock:
+            connections = list(self._connections)
+            self._connections.clear()
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        self._idle = queue.LifoQueue()
+
+
+class Database(Storage):
     def __init__(self, db_name=config.DATABASE_NAME):
         self.db_name = db_name
+        self.pool = ConnectionPool(db_name)
+        # Kam o'zgaradigan ma'lumotlar keshi (yozish metodlari tozalaydi)
+        self._caches = {
+            namespace: LRUCache(config.REF_CACHE_SIZE)
+            for namespace in ("filials", "roles", "tasks", "groups")
+        }
+        self._caches["users"] = LRUCache(config.USER_CACHE_SIZE, ttl=config.USER_CACHE_TTL)
+        # Yopilgan kunlar statistikasi faqat yarim tunda o'zgaradi
+        self._caches["history"] = LRUCache(config.USER_CACHE_SIZE, ttl=config.HISTORY_CACHE_TTL)
+        # Yozuvchi thread idagi guruhli tranzaksiya holati
+        self._local = threading.local()
         self.init_database()
     
     def get_connection(self):
-        """Database ga ulanish"""
-        return sqlite3.connect(self.db_name)
+        """Database ga ulanish (puldan olinadi, close() pulga qaytaradi)"""
+        batch_conn = getattr(self._local, "batch_conn", None)
+        if batch_conn is not None:
+            return batch_conn
+        return PooledConnection(self.pool.acquire(), self.pool)
     
-    def init_database(self):
-        """Barcha jadvallarni yaratish"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        # 1. Filiallar jadvali
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS filials (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-        """)
-        
-        # 2. Guruhlar jadvali
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS group_chats (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            filial_id INTEGER UNIQUE,
-            chat_id BIGINT NOT NULL,
-            chat_title TEXT,
-            added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            is_active BOOLEAN DEFAULT 1,
-            FOREIGN KEY (filial_id) REFERENCES filials(id)
-        )
-        """)
+    def _invalidate(self, namespaces):
+        """Keshlarni tozalash (guruhli tranzaksiyada - commit dan keyin)"""
+        deferred = getattr(self._local, "deferred", None)
+        if deferred is not None:
+            deferred.update(namespaces)
+            return
+        for namespace in namespaces:
+            self._caches[namespace].clear()
+    
+    def execute_batch(self, conn, calls):
+        """Yozish metodlarini bitta tranzaksiyada bajarish (group commit).
         
-        # 3. Rollar jadvali
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS roles (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-        """)
+        calls: [(method, args, kwargs), ...]. Har bir chaqiruv alohida
+        SAVEPOINT ichida - xato bo'lsa faqat o'sha chaqiruv bekor qilinadi.
+        Natija: [(natija, xato), ...]; commit o'tmasa istisno ko'tariladi.
+        """
+        results = []
+        deferred = set()
+        self._local.batch_conn = BatchConnection(conn)
+        self._local.deferred = deferred
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for method, args, kwargs in calls:
+                conn.execute("SAVEPOINT batch_call")
+                try:
+                    result = method(*args, **kwargs)
+                except Exception as e:
+                    conn.execute("ROLLBACK TO batch_call")
+                    results.append((None, e))
+                else:
+                    results.append((result, None))
+                conn.execute("RELEASE batch_call")
+            conn.commit()
+        except Exception:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+        finally:
+            self._local.batch_conn = None
+            self._local.deferred = None
+            for namespace in deferred:
+                self._caches[namespace].clear()
+        return results
+    
+    @staticmethod
+    def _keyset_page(cursor, query, params, alias, after_id=None, before_id=None, limit=None):
+        """id bo'yicha keyset sahifa - OFFSET siz, har sahifa bitta indeks oralig'i.
         
-        # 4. Foydalanuvchilar jadvali
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            telegram_id BIGINT UNIQUE,
-            full_name TEXT NOT NULL,
-            phone BIGINT NOT NULL UNIQUE,
-            filial_id INTEGER,
-            role_id INTEGER,
-            is_admin BOOLEAN DEFAULT 0,
-            is_active BOOLEAN DEFAULT 1,
-            registered_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (filial_id) REFERENCES filials(id),
-            FOREIGN KEY (role_id) REFERENCES roles(id)
-        )
-        """)
+        query - "WHERE ..." bilan tugaydigan SELECT (birinchi ustun id).
+        after_id - keyingi sahifa, before_id - oldingi sahifa. Bittadan
+        ortiq qator o'qiladi: shu yo'nalishda yana sahifa bor-yo'qligi.
+        """
+        limit = limit or config.PAGE_SIZE
         
-        # 5. Vazifalar jadvali
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS tasks (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            text TEXT NOT NULL,
-            task_type TEXT NOT NULL,
-            role_id INTEGER,
-            filial_id INTEGER,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            is_active BOOLEAN DEFAULT 1,
-            FOREIGN KEY (role_id) REFERENCES roles(id),
-            FOREIGN KEY (filial_id) REFERENCES filials(id)
-        )
-        """)
+        if before_id:
+            cursor.execute(
+                f"{query} AND {alias}.id < ? ORDER BY {alias}.id DESC LIMIT ?",
+                (*params, before_id, limit + 1)
+            )
+            rows = cursor.fetchall()
+            return Page(rows[:limit][::-1], len(rows) > limit, True)
         
-        # 6. Bajarilgan vazifalar jadvali
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS task_completions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            task_id INTEGER,
-            user_id INTEGER,
-            completion_date DATE NOT NULL,
-            completed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            media_type TEXT,
-            media_file_id TEXT,
-            text_message TEXT,
-            FOREIGN KEY (task_id) REFERENCES tasks(id),
-            FOREIGN KEY (user_id) REFERENCES users(id),
-            UNIQUE(task_id, user_id, completion_date)
+        cursor.execute(
+            f"{query} AND {alias}.id > ? ORDER BY {alias}.id LIMIT ?",
+            (*params, after_id or 0, limit + 1)
         )
-        """)
-        
-        # Boshlang'ich ma'lumotlar
-        self._insert_initial_data(cursor)
-        
-        conn.commit()
-        conn.close()
+        rows = cursor.fetchall()
+        return Page(rows[:limit], bool(after_id), len(rows) > limit)
+    
+    def cache_stats(self):
+        """Keshlar bo'yicha hit/miss statistikasi"""
+        return {namespace: cache.stats() for namespace, cache in self._caches.items()}
+    
+    def close(self):
+        """Pul ulanishlarini yopish"""
+        self.pool.close_all()
+    
+    def init_database(self):
+        """Sxemani oxirgi versiyagacha migratsiya qilish"""
+        conn = self.get_connection()
+        try:
+            migrate(conn)
+        finally:
+            conn.close()
     
-    def _insert_initial_data(self, cursor):
-        """Boshlang'ich ma'lumotlarni kiritish"""
-        
-        # Filiallar
-        cursor.execute("SELECT COUNT(*) FROM filials")
-        if cursor.fetchone()[0] == 0:
-            filials = [
-                ('Gelyon',),
-                ('Marxabo',),
-                ('Vogzal',)
-            ]
-            cursor.executemany("INSERT INTO filials (name) VALUES (?)", filials)
-        
-        # Guruhlar
-        cursor.execute("SELECT COUNT(*) FROM group_chats")
-        if cursor.fetchone()[0] == 0:
-            groups = [
-                (1, config.GROUP_LINKS[0], 'Gelyon Guruh'),
-                (2, config.GROUP_LINKS[1], 'Marxabo Guruh'),
-                (3, config.GROUP_LINKS[2], 'Vogzal Guruh')
-            ]
-            cursor.executemany(
-                "INSERT INTO group_chats (filial_id, chat_id, chat_title) VALUES (?, ?, ?)", 
-                groups
-            )
-        
-        # Rollar
-        cursor.execute("SELECT COUNT(*) FROM roles")
-        if cursor.fetchone()[0] == 0:
-            roles = [
-                ('Oshpaz',),
-                ('Ofitsiant',),
-                ('Kassa',),
-                ('Menejer',)
-            ]
-            cursor.executemany("INSERT INTO roles (name) VALUES (?)", roles)
-        
-
-        cursor.execute("SELECT COUNT(*) FROM users WHERE is_admin = 1")
-        admin_count = cursor.fetchone()[0]
-
-        if admin_count == 0:
-            cursor.execute("""
-                INSERT INTO users (full_name, phone, filial_id, role_id, is_admin)
-                VALUES (?, ?, ?, ?, ?)
-            """, ("Super Admin", 998770451117, None, None, 1))
     # ===== FILIAL OPERATSIYALARI =====
     
+    @cached("filials")
     def get_all_filials(self):
         """Barcha filiallarni olish"""
         conn = self.get_connection()
         cursor = conn.cursor()
+        cursor.row_factory = Filial.factory
         cursor.execute("SELECT id, name FROM filials ORDER BY id")
         filials = cursor.fetchall()
         conn.close()
         return filials
     
+    @cached("filials")
     def get_filial(self, filial_id):
         """Bitta filialni olish"""
         conn = self.get_connection()
         cursor = conn.cursor()
+        cursor.row_factory = Filial.factory
         cursor.execute("SELECT id, name FROM filials WHERE id = ?", (filial_id,))
         filial = cursor.fetchone()
         conn.close()
@@ -175,19 +312,23 @@ class Database:
     
     # ===== ROL OPERATSIYALARI =====
     
+    @cached("roles")
     def get_all_roles(self):
         """Barcha rollarni olish"""
         conn = self.get_connection()
         cursor = conn.cursor()
+        cursor.row_factory = Role.factory
         cursor.execute("SELECT id, name FROM roles ORDER BY id")
         roles = cursor.fetchall()
         conn.close()
         return roles
     
+    @cached("roles")
     def get_role(self, role_id):
         """Bitta rolni olish"""
         conn = self.get_connection()
         cursor = conn.cursor()
+        cursor.row_factory = Role.factory
         cursor.execute("SELECT id, name FROM roles WHERE id = ?", (role_id,))
         role = cursor.fetchone()
         conn.close()
@@ -195,6 +336,7 @@ class Database:
     
     # ===== USER OPERATSIYALARI =====
     
+    @writes("users")
     def create_user(self, full_name, phone, filial_id, role_id, is_admin=False):
         """Yangi user yaratish"""
         conn = self.get_connection()
@@ -208,10 +350,39 @@ class Database:
         conn.close()
         return user_id
     
+    @writes("users")
+    def import_users(self, rows):
+        """Ko'p userni bitta tranzaksiyada qo'shish (ommaviy import).
+        
+        rows: [(full_name, phone, filial_id, role_id), ...]. Band telefonlar
+        bitta so'rovda (json_each) aniqlanadi va o'tkazib yuboriladi.
+        Natija: (qo'shilganlar soni, {band telefon: faolmi})
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute("""
+                SELECT phone, is_active FROM users
+                WHERE phone IN (SELECT value FROM json_each(?))
+            """, (json.dumps([phone for _, phone, _, _ in rows]),))
+            taken = {phone: bool(is_active) for phone, is_active in cursor.fetchall()}
+            
+            new_rows = [row for row in rows if row[1] not in taken]
+            cursor.executemany("""
+                INSERT INTO users (full_name, phone, filial_id, role_id)
+                VALUES (?, ?, ?, ?)
+            """, new_rows)
+            conn.commit()
+        finally:
+            # Xato bo'lsa commit qilinmagan qatorlar pulga qaytishda bekor qilinadi
+            conn.close()
+        return len(new_rows), taken
+    
     def get_user_by_phone(self, phone):
         """Telefon orqali userni topish"""
         conn = self.get_connection()
         cursor = conn.cursor()
+        cursor.row_factory = User.factory
         cursor.execute("""
             SELECT u.id, u.telegram_id, u.full_name, u.phone, 
                    u.filial_id, f.name as filial_name,
@@ -225,10 +396,12 @@ class Database:
         conn.close()
         return user
     
+    @cached("users")
     def get_user_by_telegram_id(self, telegram_id):
         """Telegram ID orqali userni topish"""
         conn = self.get_connection()
         cursor = conn.cursor()
+        cursor.row_factory = User.factory
         cursor.execute("""
             SELECT u.id, u.telegram_id, u.full_name, u.phone, 
                    u.filial_id, f.name as filial_name,
@@ -242,6 +415,7 @@ class Database:
         conn.close()
         return user
     
+    @writes("users")
     def update_user_telegram_id(self, phone, telegram_id):
         """User telegram ID sini yangilash"""
         conn = self.get_connection()
@@ -256,6 +430,7 @@ class Database:
         """Barcha userlarni olish"""
         conn = self.get_connection()
         cursor = conn.cursor()
+        cursor.row_factory = Worker.factory
         if filial_id:
             cursor.execute("""
                 SELECT u.id, u.full_name, u.phone, f.name, r.name
@@ -263,7 +438,7 @@ class Database:
                 LEFT JOIN filials f ON u.filial_id = f.id
                 LEFT JOIN roles r ON u.role_id = r.id
                 WHERE u.filial_id = ? AND u.is_active = 1
-                ORDER BY r.name, u.full_name
+                ORDER BY r.name, u.full_name, u.id
             """, (filial_id,))
         else:
             cursor.execute("""
@@ -272,12 +447,59 @@ class Database:
                 LEFT JOIN filials f ON u.filial_id = f.id
                 LEFT JOIN roles r ON u.role_id = r.id
                 WHERE u.is_active = 1
-                ORDER BY f.name, r.name, u.full_name
+                ORDER BY f.name, r.name, u.full_name, u.id
             """)
         users = cursor.fetchall()
         conn.close()
         return users
     
+    def get_users_page(self, filial_id=None, after_id=None, before_id=None, limit=None):
+        """Faol userlar sahifasi (admin ro'yxati): Page[Worker]"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.row_factory = Worker.factory
+        
+        query = """
+            SELECT u.id, u.full_name, u.phone, f.name, r.name
+            FROM users u
+            LEFT JOIN filials f ON u.filial_id = f.id
+            LEFT JOIN roles r ON u.role_id = r.id
+            WHERE u.is_active = 1
+        """
+        params = []
+        
+        if filial_id:
+            query += " AND u.filial_id = ?"
+            params.append(filial_id)
+        
+        page = self._keyset_page(cursor, query, params, "u", after_id, before_id, limit)
+        conn.close()
+        return page
+    
+    def search_users(self, text, limit=None):
+        """Faol userlarni ism / telefon bo'yicha qidirish (FTS5, bm25 bo'yicha)"""
+        query = match_query(text)
+        if query is None:
+            return []
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.row_factory = Worker.factory
+        cursor.execute("""
+            SELECT u.id, u.full_name, u.phone, f.name, r.name
+            FROM users_fts
+            INNER JOIN users u ON u.id = users_fts.rowid
+            LEFT JOIN filials f ON u.filial_id = f.id
+            LEFT JOIN roles r ON u.role_id = r.id
+            WHERE users_fts MATCH ? AND u.is_active = 1
+            ORDER BY users_fts.rank, u.id
+            LIMIT ?
+        """, (query, limit or config.SEARCH_RESULTS_LIMIT))
+        users = cursor.fetchall()
+        conn.close()
+        return users
+    
+    @writes("users")
     def delete_user(self, user_id):
         """Userni (ishchini) ID bo‘yicha o‘chirish (soft delete)"""
         conn = self.get_connection()
@@ -288,6 +510,7 @@ class Database:
         conn.commit()
         conn.close()
     
+    @writes("users")
     def add_admin(self, phone):
         conn = self.get_connection()
         cursor = conn.cursor()
@@ -301,6 +524,7 @@ class Database:
         """Barcha adminlarni olish"""
         conn = self.get_connection()
         cursor = conn.cursor()
+        cursor.row_factory = Admin.factory
         cursor.execute("""
             SELECT full_name, phone
             FROM users
@@ -314,6 +538,7 @@ class Database:
         """Phone nomer orqali adminni topish"""
         conn = self.get_connection()
         cursor = conn.cursor()
+        cursor.row_factory = Admin.factory
         cursor.execute("""
             SELECT full_name, phone
             FROM users
@@ -323,6 +548,7 @@ class Database:
         conn.close()
         return user
     
+    @writes("users")
     def del_admin(self, user_id):
         conn = self.get_connection()
         cursor = conn.cursor()
@@ -334,19 +560,60 @@ class Database:
     
     # ===== VAZIFA OPERATSIYALARI =====
     
-    def create_task(self, text, task_type, role_id, filial_id):
-        """Yangi vazifa yaratish"""
+    @writes("tasks")
+    def create_task(self, text, task_type, role_id, filial_id, recurrence=None):
+        """Yangi vazifa yaratish (recurrence berilmasa task_type bo'yicha)"""
+        recurrence = recurrence or LEGACY_RULES.get(task_type, task_type)
+        masks = compile_rule(recurrence)
+        
         conn = self.get_connection()
         cursor = conn.cursor()
         cursor.execute("""
-            INSERT INTO tasks (text, task_type, role_id, filial_id)
-            VALUES (?, ?, ?, ?)
-        """, (text, task_type, role_id, filial_id))
+            INSERT INTO tasks (text, task_type, role_id, filial_id, recurrence,
+                               weekday_mask, monthday_mask, nth_weekday_mask,
+                               interval_days, anchor_day)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (text, task_type, role_id, filial_id, recurrence, *masks))
         task_id = cursor.lastrowid
         conn.commit()
         conn.close()
         return task_id
     
+    @writes("tasks")
+    def create_tasks(self, texts, task_type, role_ids, filial_ids, recurrence=None):
+        """Ko'p vazifani bitta so'rovda yaratish: matnlar x filiallar x rollar.
+        
+        Shu (matn, filial, rol) bilan faol vazifa bo'lsa qayta yaratilmaydi -
+        bir xil ro'yxatni qayta yuborish xavfsiz. Natija: (yaratildi, o'tkazildi)
+        """
+        recurrence = recurrence or LEGACY_RULES.get(task_type, task_type)
+        masks = compile_rule(recurrence)
+        texts = list(dict.fromkeys(texts))
+        total = len(texts) * len(set(filial_ids)) * len(set(role_ids))
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO tasks (text, task_type, role_id, filial_id, recurrence,
+                               weekday_mask, monthday_mask, nth_weekday_mask,
+                               interval_days, anchor_day)
+            SELECT tx.value, ?, r.value, f.value, ?, ?, ?, ?, ?, ?
+            FROM json_each(?) tx, json_each(?) f, json_each(?) r
+            WHERE NOT EXISTS (
+                SELECT 1 FROM tasks t
+                WHERE t.filial_id = f.value AND t.role_id = r.value
+                    AND t.is_active = 1 AND t.text = tx.value
+            )
+            ORDER BY tx.key, f.key, r.key
+        """, (
+            task_type, recurrence, *masks, json.dumps(texts),
+            json.dumps(sorted(set(filial_ids))), json.dumps(sorted(set(role_ids)))
+        ))
+        created = cursor.rowcount
+        conn.commit()
+        conn.close()
+        return created, total - created
+    
     def get_user_tasks(self, user_id, target_date):
         """User uchun bugungi vazifalarni olish"""
         conn = self.get_connection()
@@ -363,15 +630,11 @@ class Database:
         
         filial_id, role_id = user_data
         
-        # Qaysi vazifa turlarini ko'rsatish kerak
-        task_types = ['daily']
-        if target_date.weekday() == 0:  # Dushanba
-            task_types.append('monday')
-        if target_date.day == 1:  # Oyning 1-kuni
-            task_types.append('monthly')
+        # Shu sanada amal qiladigan vazifalar sharti
+        applicable, applicable_params = applicable_sql("t", target_date)
         
         # Vazifalarni olish
-        placeholders = ','.join('?' * len(task_types))
+        cursor.row_factory = UserTask.factory
         cursor.execute(f"""
             SELECT t.id, t.text, t.task_type,
                    CASE WHEN tc.id IS NOT NULL THEN 1 ELSE 0 END as completed
@@ -381,34 +644,119 @@ class Database:
                 AND tc.completion_date = ?
             WHERE t.role_id = ? 
                 AND t.filial_id = ? 
-                AND t.task_type IN ({placeholders})
                 AND t.is_active = 1
+                AND {applicable}
             ORDER BY t.task_type, t.id
-        """, (user_id, target_date, role_id, filial_id, *task_types))
+        """, (user_id, target_date, role_id, filial_id, *applicable_params))
         
         tasks = cursor.fetchall()
         conn.close()
         return tasks
     
-    def complete_task(self, task_id, user_id, media_type=None, media_file_id=None, text_message=None):
-        """Vazifani bajarildi deb belgilash"""
+    @writes()
+    def complete_task(self, task_id, user_id, media_type=None, media_file_id=None, text_message=None,
+                      outbox=None, evidence=()):
+        """Vazifani bajarildi deb belgilash (outbox - guruh xabari, evidence - barcha
+        fayllar; hammasi shu tranzaksiyada)"""
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            today = date.today()
+            
+            cursor.execute("""
+                INSERT OR IGNORE INTO task_completions 
+                (task_id, user_id, completion_date, media_type, media_file_id, text_message)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (task_id, user_id, today, media_type, media_file_id, text_message))
+            
+            if cursor.rowcount:
+                # Yangi bajarilish - kunlik yig'indini yangilash
+                self._increment_daily_stats(cursor, task_id, user_id, today)
+            else:
+                # Qayta yuborilgan - faqat faylni yangilash
+                cursor.execute("""
+                    UPDATE task_completions 
+                    SET media_type = ?, media_file_id = ?, text_message = ?,
+                        completed_at = CURRENT_TIMESTAMP
+                    WHERE task_id = ? AND user_id = ? AND completion_date = ?
+                """, (media_type, media_file_id, text_message, task_id, user_id, today))
+            
+            # Dalillar - qayta yuborilganda eskisi almashtiriladi
+            items = list(evidence) or ([(media_type, media_file_id, None, None)] if media_file_id else [])
+            cursor.execute("""
+                DELETE FROM task_evidence
+                WHERE task_id = ? AND user_id = ? AND completion_date = ?
+            """, (task_id, user_id, today))
+            cursor.executemany("""
+                INSERT INTO task_evidence
+                (task_id, user_id, completion_date, position, media_type, file_id, file_unique_id, media_group_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, [(task_id, user_id, today, position, *item) for position, item in enumerate(items)])
+            
+            outbox_id = None
+            if outbox is not None:
+                chat_id, method, payload = outbox
+                cursor.execute("""
+                    INSERT INTO outbox (chat_id, method, payload, task_id, user_id)
+                    VALUES (?, ?, ?, ?, ?)
+                """, (chat_id, method, payload, task_id, user_id))
+                outbox_id = cursor.lastrowid
+            
+            conn.commit()
+        finally:
+            # Xato bo'lsa ochiq tranzaksiya pulga qaytishda bekor qilinadi
+            conn.close()
+        return outbox_id
+    
+    def get_task_evidence(self, task_id, user_id, completion_date):
+        """Bajarilish dalillari: [Evidence, ...]"""
         conn = self.get_connection()
         cursor = conn.cursor()
-        today = date.today()
+        cursor.row_factory = Evidence.factory
         
         cursor.execute("""
-            INSERT OR REPLACE INTO task_completions 
-            (task_id, user_id, completion_date, media_type, media_file_id, text_message)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, (task_id, user_id, today, media_type, media_file_id, text_message))
+            SELECT position, media_type, file_id, file_unique_id, media_group_id
+            FROM task_evidence
+            WHERE task_id = ? AND user_id = ? AND completion_date = ?
+            ORDER BY position
+        """, (task_id, user_id, completion_date))
         
-        conn.commit()
+        evidence = cursor.fetchall()
         conn.close()
+        return evidence
     
+    def get_completions(self, start_date, end_date, filial_id=None):
+        """Sanalar oralig'idagi bajarilgan vazifalar: [Completion, ...]"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.row_factory = Completion.factory
+        
+        # Eski oylar arxiv fayllardan qo'shiladi
+        with archive.completions_source(conn, start_date, end_date) as source:
+            query = f"""
+                SELECT tc.id, tc.task_id, tc.user_id, tc.completion_date, tc.completed_at,
+                       tc.media_type, tc.media_file_id, tc.text_message
+                FROM {source} tc
+            """
+            params = [start_date, end_date]
+            
+            if filial_id:
+                query += " INNER JOIN tasks t ON t.id = tc.task_id AND t.filial_id = ?"
+                params.insert(0, filial_id)
+            
+            query += " WHERE tc.completion_date BETWEEN ? AND ? ORDER BY tc.completion_date, tc.id"
+            
+            cursor.execute(query, params)
+            completions = cursor.fetchall()
+        conn.close()
+        return completions
+    
+    @cached("tasks")
     def get_task(self, task_id):
         """Vazifa ma'lumotlarini olish"""
         conn = self.get_connection()
         cursor = conn.cursor()
+        cursor.row_factory = Task.factory
         cursor.execute("""
             SELECT t.id, t.text, t.task_type, r.name, f.name
             FROM tasks t
@@ -424,6 +772,7 @@ class Database:
         """Barcha vazifalarni olish (filtrlash bilan)"""
         conn = self.get_connection()
         cursor = conn.cursor()
+        cursor.row_factory = Task.factory
         
         query = """
             SELECT t.id, t.text, t.task_type, r.name, f.name
@@ -444,13 +793,94 @@ class Database:
             query += " AND t.task_type = ?"
             params.append(task_type)
         
-        query += " ORDER BY f.name, r.name, t.task_type"
+        query += " ORDER BY f.name, r.name, t.task_type, t.id"
         
         cursor.execute(query, params)
         tasks = cursor.fetchall()
         conn.close()
         return tasks
     
+    def get_tasks_page(self, filial_id=None, role_id=None, after_id=None, before_id=None, limit=None):
+        """Faol vazifalar sahifasi (admin ro'yxati): Page[Task]"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.row_factory = Task.factory
+        
+        query = """
+            SELECT t.id, t.text, t.task_type, r.name, f.name
+            FROM tasks t
+            LEFT JOIN roles r ON t.role_id = r.id
+            LEFT JOIN filials f ON t.filial_id = f.id
+            WHERE t.is_active = 1
+        """
+        params = []
+        
+        if filial_id:
+            query += " AND t.filial_id = ?"
+            params.append(filial_id)
+        if role_id:
+            query += " AND t.role_id = ?"
+            params.append(role_id)
+        
+        page = self._keyset_page(cursor, query, params, "t", after_id, before_id, limit)
+        conn.close()
+        return page
+    
+    def search_tasks(self, text, limit=None):
+        """Faol vazifalarni matni bo'yicha qidirish (FTS5, bm25 bo'yicha)"""
+        query = match_query(text)
+        if query is None:
+            return []
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.row_factory = Task.factory
+        cursor.execute("""
+            SELECT t.id, t.text, t.task_type, r.name, f.name
+            FROM tasks_fts
+            INNER JOIN tasks t ON t.id = tasks_fts.rowid
+            LEFT JOIN roles r ON t.role_id = r.id
+            LEFT JOIN filials f ON t.filial_id = f.id
+            WHERE tasks_fts MATCH ? AND t.is_active = 1
+            ORDER BY tasks_fts.rank, t.id
+            LIMIT ?
+        """, (query, limit or config.SEARCH_RESULTS_LIMIT))
+        tasks = cursor.fetchall()
+        conn.close()
+        return tasks
+    
+    @writes("tasks")
+    def deactivate_tasks(self, task_ids):
+        """Ko'p vazifani bitta so'rovda o'chirish (soft delete), o'chirilganlar soni"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            UPDATE tasks SET is_active = 0
+            WHERE is_active = 1 AND id IN (SELECT value FROM json_each(?))
+        """, (json.dumps(list(task_ids)),))
+        count = cursor.rowcount
+        conn.commit()
+        conn.close()
+        return count
+    
+    @writes("tasks")
+    def reassign_tasks(self, task_ids, filial_id=None, role_id=None):
+        """Faol vazifalarni boshqa filial / rolga o'tkazish (None - o'zgarmaydi).
+        
+        O'tkazilganlar soni qaytadi. Yopilgan kunlar statistikasi o'zgarmaydi.
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            UPDATE tasks SET filial_id = COALESCE(?, filial_id), role_id = COALESCE(?, role_id)
+            WHERE is_active = 1 AND id IN (SELECT value FROM json_each(?))
+        """, (filial_id, role_id, json.dumps(list(task_ids))))
+        count = cursor.rowcount
+        conn.commit()
+        conn.close()
+        return count
+    
+    @writes("tasks")
     def delete_task(self, task_id):
         """Vazifani o'chirish (soft delete)"""
         conn = self.get_connection()
@@ -461,6 +891,7 @@ class Database:
     
     # ===== GURUH OPERATSIYALARI =====
     
+    @cached("groups")
     def get_group_chat_id(self, filial_id):
         """Filial guruh chat ID sini olish"""
         conn = self.get_connection()
@@ -473,72 +904,662 @@ class Database:
         conn.close()
         return result[0] if result else None
     
-    # ===== STATISTIKA =====
-    
-    def get_daily_statistics(self, filial_id, target_date):
-        """Kunlik statistika"""
+    @cached("groups")
+    def get_all_group_chats(self):
+        """Barcha faol guruhlar: {filial_id: chat_id}"""
         conn = self.get_connection()
         cursor = conn.cursor()
+        cursor.execute("""
+            SELECT filial_id, chat_id FROM group_chats 
+            WHERE is_active = 1
+        """)
+        groups = dict(cursor.fetchall())
+        conn.close()
+        return groups
+    
+    # ===== STATISTIKA =====
+    
+    def _compute_user_rows(self, cursor, target_date, filial_id=None, source="task_completions"):
+        """Har bir user uchun vazifa/bajarilgan soni - O(users + tasks + completions).
+        
+        Vazifalar soni (filial, rol) bo'yicha va bajarilganlar soni user
+        bo'yicha alohida oldindan yig'iladi, keyin userlarga biriktiriladi.
+        Shu sababli users x tasks ko'paytmasi hosil bo'lmaydi.
+        source - bajarilishlar manbasi (archive.completions_source).
         
-        # Qaysi vazifa turlarini hisobga olish
-        task_types = ['daily']
-        if target_date.weekday() == 0:
-            task_types.append('monday')
-        if target_date.day == 1:
-            task_types.append('monthly')
+        Qator: StatsRow
+        """
+        task_applicable, task_params = applicable_sql("tasks", target_date)
+        completion_applicable, completion_params = applicable_sql("t", target_date)
         
-        placeholders = ','.join('?' * len(task_types))
+        if filial_id is not None:
+            task_filter = "AND filial_id = ?"
+            user_filter = "u.filial_id = ?"
+            filial_params = (filial_id,)
+        else:
+            task_filter = ""
+            user_filter = "u.filial_id IS NOT NULL"
+            filial_params = ()
         
-        # Rol bo'yicha statistika
+        cursor.row_factory = StatsRow.factory
         cursor.execute(f"""
+            WITH task_counts AS (
+                SELECT filial_id, role_id, COUNT(*) AS total
+                FROM tasks
+                WHERE is_active = 1 
+                    AND {task_applicable}
+                    {task_filter}
+                GROUP BY filial_id, role_id
+            ),
+            completion_counts AS (
+                SELECT tc.user_id, COUNT(*) AS completed
+                FROM {source} tc
+                INNER JOIN tasks t ON t.id = tc.task_id
+                INNER JOIN users cu ON cu.id = tc.user_id
+                WHERE tc.completion_date = ?
+                    AND t.is_active = 1
+                    AND {completion_applicable}
+                    AND t.role_id = cu.role_id
+                    AND t.filial_id = cu.filial_id
+                GROUP BY tc.user_id
+            )
             SELECT 
+                u.filial_id,
+                u.id,
+                u.full_name,
                 r.id,
                 r.name,
-                COUNT(DISTINCT u.id) as user_count,
-                COUNT(t.id) as total_tasks,
-                COUNT(tc.id) as completed_tasks
-            FROM roles r
-            INNER JOIN users u ON r.id = u.role_id
-            LEFT JOIN tasks t ON t.role_id = r.id 
-                AND t.filial_id = ? 
-                AND t.task_type IN ({placeholders})
-                AND t.is_active = 1
-            LEFT JOIN task_completions tc ON t.id = tc.task_id 
-                AND tc.user_id = u.id 
-                AND tc.completion_date = ?
-            WHERE u.filial_id = ? AND u.is_active = 1
-            GROUP BY r.id, r.name
-            ORDER BY r.id
-        """, (filial_id, *task_types, target_date, filial_id))
+                COALESCE(tk.total, 0),
+                COALESCE(cc.completed, 0)
+            FROM users u
+            LEFT JOIN roles r ON u.role_id = r.id
+            LEFT JOIN task_counts tk ON tk.filial_id = u.filial_id 
+                AND tk.role_id = u.role_id
+            LEFT JOIN completion_counts cc ON cc.user_id = u.id
+            WHERE {user_filter} AND u.is_active = 1
+            ORDER BY u.filial_id, r.name, u.full_name
+        """, (*task_params, *filial_params, target_date, *completion_params, *filial_params))
         
-        role_stats = cursor.fetchall()
+        return cursor.fetchall()
+    
+    @staticmethod
+    def _build_statistics(user_rows):
+        """User qatorlaridan {filial_id: (role_stats, user_stats)} yasash"""
+        statistics = {}
+        role_totals = {}
+        for row in user_rows:
+            statistics.setdefault(row.filial_id, ([], []))[1].append(UserDayStats(
+                row.user_id, row.full_name, row.role_name, row.total, row.completed
+            ))
+            
+            # Rol bo'yicha yig'ish (rolsiz userlar rol statistikasiga kirmaydi)
+            if row.role_id is None:
+                continue
+            key = (row.filial_id, row.role_id)
+            if key not in role_totals:
+                role_totals[key] = [row.role_name, 0, 0, 0]
+            role_totals[key][1] += 1
+            role_totals[key][2] += row.total
+            role_totals[key][3] += row.completed
+        
+        for (f_id, role_id), (role_name, user_count, total, completed) in sorted(role_totals.items()):
+            statistics[f_id][0].append(RoleStats(role_id, role_name, user_count, total, completed))
+        
+        return statistics
+    
+    def _read_rollup_rows(self, cursor, target_date, filial_id=None):
+        """Yopilgan kun uchun daily_user_stats dan o'qish - O(users).
+        
+        Kun yopilmagan bo'lsa None qaytaradi.
+        """
+        cursor.execute("SELECT 1 FROM daily_stats_days WHERE stat_date = ?", (target_date,))
+        if cursor.fetchone() is None:
+            return None
         
-        # Har bir user bo'yicha
+        filial_filter = "AND s.filial_id = ?" if filial_id is not None else ""
+        filial_params = (filial_id,) if filial_id is not None else ()
+        
+        cursor.row_factory = StatsRow.factory
         cursor.execute(f"""
-            SELECT 
-                u.id,
-                u.full_name,
-                r.name as role_name,
-                COUNT(DISTINCT t.id) as total_tasks,
-                COUNT(DISTINCT tc.id) as completed_tasks
+            SELECT s.filial_id, s.user_id, u.full_name, r.id, r.name, s.assigned, s.completed
+            FROM daily_user_stats s
+            INNER JOIN users u ON u.id = s.user_id
+            LEFT JOIN roles r ON r.id = s.role_id
+            WHERE s.stat_date = ? {filial_filter}
+            ORDER BY s.filial_id, r.name, u.full_name
+        """, (target_date, *filial_params))
+        return cursor.fetchall()
+    
+    def _statistics_rows(self, cursor, target_date, filial_id=None):
+        """Yopilgan kunlar rollup dan, qolganlari xom jadvallardan"""
+        rows = self._read_rollup_rows(cursor, target_date, filial_id)
+        if rows is None:
+            with archive.completions_source(cursor.connection, target_date, target_date) as source:
+                rows = self._compute_user_rows(cursor, target_date, filial_id, source)
+        return rows
+    
+    def get_daily_statistics(self, filial_id, target_date):
+        """Kunlik statistika"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        statistics = self._build_statistics(self._statistics_rows(cursor, target_date, filial_id))
+        conn.close()
+        return statistics.get(filial_id, ([], []))
+    
+    def get_all_daily_statistics(self, target_date):
+        """Barcha filiallar uchun kunlik statistika (bitta o'tishda).
+        
+        Natija: {filial_id: (role_stats, user_stats)} - har bir qiymat
+        get_daily_statistics bilan bir xil ko'rinishda.
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        statistics = self._build_statistics(self._statistics_rows(cursor, target_date))
+        conn.close()
+        return statistics
+    
+    # ===== KUNLIK YIG'INDI (ROLLUP) =====
+    
+    def _increment_daily_stats(self, cursor, task_id, user_id, target_date):
+        """Yangi bajarilishni daily_user_stats ga qo'shish (faqat tegishli vazifa bo'lsa)"""
+        assigned_applicable, assigned_params = applicable_sql("at", target_date)
+        task_applicable, task_params = applicable_sql("t", target_date)
+        
+        cursor.execute(f"""
+            INSERT INTO daily_user_stats (stat_date, user_id, filial_id, role_id, assigned, completed)
+            SELECT ?, u.id, u.filial_id, u.role_id,
+                   (SELECT COUNT(*) FROM tasks at
+                    WHERE at.filial_id = u.filial_id AND at.role_id = u.role_id
+                        AND at.is_active = 1 AND {assigned_applicable}),
+                   1
             FROM users u
-            LEFT JOIN roles r ON u.role_id = r.id
-            LEFT JOIN tasks t ON t.role_id = u.role_id 
-                AND t.filial_id = u.filial_id 
-                AND t.task_type IN ({placeholders})
-                AND t.is_active = 1
-            LEFT JOIN task_completions tc ON t.id = tc.task_id 
-                AND tc.user_id = u.id 
-                AND tc.completion_date = ?
-            WHERE u.filial_id = ? AND u.is_active = 1
-            GROUP BY u.id, u.full_name, r.name
-            ORDER BY r.name, u.full_name
-        """, (*task_types, target_date, filial_id))
+            INNER JOIN tasks t ON t.id = ?
+                AND t.filial_id = u.filial_id AND t.role_id = u.role_id
+                AND t.is_active = 1 AND {task_applicable}
+            WHERE u.id = ?
+            ON CONFLICT (stat_date, user_id) DO UPDATE SET completed = completed + 1
+        """, (target_date, *assigned_params, task_id, *task_params, user_id))
+    
+    @writes("history")
+    def refresh_daily_stats(self, start_date, end_date=None):
+        """daily_user_stats ni sanalar oralig'i uchun qayta qurish va kunlarni yopish.
+        
+        Kunlik job kechagi kunni yopadi; eski kunlarni to'ldirish yoki
+        tuzatish uchun manage.py rebuild-stats ishlatiladi. Hisob joriy
+        userlar va vazifalar holati bo'yicha olinadi. Arxiv fayli
+        o'chirilgan oylar o'tkazib yuboriladi - ularning yig'indisi saqlanadi.
+        """
+        end_date = end_date or start_date
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        purged = archive.purged_months(conn)
         
-        user_stats = cursor.fetchall()
+        days = 0
+        current = start_date
+        while current <= end_date:
+            if archive.month_key(current) in purged:
+                current += timedelta(days=1)
+                continue
+            
+            with archive.completions_source(conn, current, current) as source:
+                rows = self._compute_user_rows(cursor, current, source=source)
+            cursor.execute("DELETE FROM daily_user_stats WHERE stat_date = ?", (current,))
+            cursor.executemany("""
+                INSERT INTO daily_user_stats (stat_date, user_id, filial_id, role_id, assigned, completed)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, [
+                (current, row.user_id, row.filial_id, row.role_id, row.total, row.completed)
+                for row in rows
+            ])
+            cursor.execute(
+                "INSERT OR REPLACE INTO daily_stats_days (stat_date) VALUES (?)", (current,)
+            )
+            conn.commit()
+            days += 1
+            current += timedelta(days=1)
         
         conn.close()
-        return role_stats, user_stats
+        return days
+
+    # ===== USER TARIXI =====
+    
+    def get_user_daily_history(self, user_id, start_date, end_date):
+        """User ning kunlik natijalari: [DayResult, ...]"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.row_factory = DayResult.factory
+        cursor.execute("""
+            SELECT stat_date, assigned, completed
+            FROM daily_user_stats
+            WHERE user_id = ? AND stat_date BETWEEN ? AND ?
+            ORDER BY stat_date
+        """, (user_id, start_date, end_date))
+        history = cursor.fetchall()
+        conn.close()
+        return history
+    
+    @cached("history")
+    def get_user_statistics(self, user_id, today):
+        """User ning yopilgan kunlar bo'yicha statistikasi (bugun kirmaydi).
+        
+        Faqat daily_user_stats dan indeks bo'yicha oraliq so'rovlar -
+        bir yillik tarix uchun ham kunma-kun hisoblanmaydi.
+        """
+        yesterday = today - timedelta(days=1)
+        week_start = today - timedelta(days=7)
+        month_start = today - timedelta(days=30)
+        mtd_start = today.replace(day=1)
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        # 7 kun, 30 kun va oy boshidan - bitta oraliq so'rovda
+        cursor.execute("""
+            SELECT
+                COALESCE(SUM(CASE WHEN stat_date >= ? THEN assigned END), 0),
+                COALESCE(SUM(CASE WHEN stat_date >= ? THEN completed END), 0),
+                COALESCE(SUM(assigned), 0),
+                COALESCE(SUM(completed), 0),
+                COALESCE(SUM(CASE WHEN stat_date >= ? THEN assigned END), 0),
+                COALESCE(SUM(CASE WHEN stat_date >= ? THEN completed END), 0)
+            FROM daily_user_stats
+            WHERE user_id = ? AND stat_date BETWEEN ? AND ?
+        """, (week_start, week_start, mtd_start, mtd_start, user_id, month_start, yesterday))
+        (week_assigned, week_completed, month_assigned, month_completed,
+         mtd_assigned, mtd_completed) = cursor.fetchone()
+        
+        # Ketma-ketlik: oxirgi to'liq bajarilmagan kundan keyingi to'liq kunlar
+        cursor.execute("""
+            SELECT MAX(stat_date) FROM daily_user_stats
+            WHERE user_id = ? AND stat_date <= ?
+                AND assigned > 0 AND completed < assigned
+        """, (user_id, yesterday))
+        last_missed = cursor.fetchone()[0]
+        
+        cursor.execute("""
+            SELECT COUNT(*) FROM daily_user_stats
+            WHERE user_id = ? AND stat_date > ? AND stat_date <= ?
+                AND assigned > 0 AND completed >= assigned
+        """, (user_id, last_missed or '', yesterday))
+        streak = cursor.fetchone()[0]
+        
+        # Filial ichidagi o'rin (30 kunlik bajarilish foizi bo'yicha)
+        cursor.execute("""
+            SELECT s.user_id, SUM(s.assigned), SUM(s.completed)
+            FROM daily_user_stats s
+            WHERE s.filial_id = (SELECT filial_id FROM users WHERE id = ?)
+                AND s.stat_date BETWEEN ? AND ?
+            GROUP BY s.user_id
+            HAVING SUM(s.assigned) > 0
+        """, (user_id, month_start, yesterday))
+        rates = {
+            uid: completed / assigned
+            for uid, assigned, completed in cursor.fetchall()
+        }
+        conn.close()
+        
+        rank = None
+        if user_id in rates:
+            rank = 1 + sum(1 for rate in rates.values() if rate > rates[user_id])
+        
+        return UserStatistics(
+            week_assigned, week_completed,
+            month_assigned, month_completed,
+            mtd_assigned, mtd_completed,
+            streak, rank, len(rates)
+        )
+    
+    # ===== FSM HOLATLARI =====
+    
+    def get_fsm_state(self, key):
+        """Saqlangan FSM holati: (state, data_json, updated_at) yoki None"""
+        conn = self.get_connection()
+        row = conn.execute(
+            "SELECT state, data, updated_at FROM fsm_states WHERE key = ?", (key,)
+        ).fetchone()
+        conn.close()
+        return tuple(row) if row else None
+    
+    @writes()
+    def save_fsm_states(self, rows, deleted_keys=()):
+        """O'zgargan FSM holatlarini bitta tranzaksiyada yozish (fsm_storage.py)"""
+        conn = self.get_connection()
+        try:
+            conn.executemany("""
+                INSERT INTO fsm_states (key, state, data, updated_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET
+                    state = excluded.state,
+                    data = excluded.data,
+                    updated_at = excluded.updated_at
+            """, rows)
+            if deleted_keys:
+                conn.execute(
+                    "DELETE FROM fsm_states WHERE key IN (SELECT value FROM json_each(?))",
+                    (json.dumps(list(deleted_keys)),)
+                )
+            conn.commit()
+        finally:
+            conn.close()
+    
+    @writes()
+    def purge_fsm_states(self, before):
+        """Tashlab ketilgan (updated_at < before) holatlarni o'chirish"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM fsm_states WHERE updated_at < ?", (before,))
+        count = cursor.rowcount
+        conn.commit()
+        conn.close()
+        return count
+    
+    # ===== XABARLAR NAVBATI =====
+    
+    def get_pending_outbox(self, now, limit):
+        """Yuborishga tayyor xabarlar: navbat boshi kutmayotgan chatlarniki, id tartibida"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.row_factory = OutboxMessage.factory
+        
+        # Chat ichida tartib - boshi qayta urinishni kutsa, ortidagilar ham kutadi
+        cursor.execute("""
+            WITH heads AS (
+                SELECT chat_id, MIN(id) AS head_id FROM outbox
+                WHERE status = 'pending'
+                GROUP BY chat_id
+            )
+            SELECT o.id, o.chat_id, o.method, o.payload, o.task_id, o.user_id, o.attempts
+            FROM heads h
+            JOIN outbox head ON head.id = h.head_id
+            JOIN outbox o ON o.chat_id = h.chat_id AND o.status = 'pending'
+            WHERE head.next_attempt_at <= ?
+            ORDER BY o.id
+            LIMIT ?
+        """, (now, limit))
+        
+        messages = cursor.fetchall()
+        conn.close()
+        return messages
+    
+    @writes()
+    def mark_outbox_sent(self, outbox_id, message_id=None):
+        """Xabar guruhga yetkazildi"""
+        conn = self.get_connection()
+        conn.execute("""
+            UPDATE outbox
+            SET status = 'sent', attempts = attempts + 1, message_id = ?,
+                sent_at = CURRENT_TIMESTAMP
+            WHERE id = ?
+        """, (message_id, outbox_id))
+        conn.commit()
+        conn.close()
+    
+    @writes()
+    def mark_outbox_failed(self, outbox_id, error, retry_at=None):
+        """Urinish o'tmadi: retry_at da qayta yoki failed"""
+        conn = self.get_connection()
+        if retry_at is None:
+            conn.execute("""
+                UPDATE outbox SET status = 'failed', attempts = attempts + 1, last_error = ?
+                WHERE id = ?
+            """, (error, outbox_id))
+        else:
+            conn.execute("""
+                UPDATE outbox SET attempts = attempts + 1, last_error = ?, next_attempt_at = ?
+                WHERE id = ?
+            """, (error, retry_at, outbox_id))
+        conn.commit()
+        conn.close()
+    
+    @writes()
+    def retry_failed_outbox(self):
+        """failed xabarlarni qayta navbatga qo'yish"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            UPDATE outbox SET status = 'pending', attempts = 0, next_attempt_at = 0
+            WHERE status = 'failed'
+        """)
+        count = cursor.rowcount
+        conn.commit()
+        conn.close()
+        return count
+    
+    @writes()
+    def purge_outbox(self, before):
+        """before ("YYYY-MM-DD HH:MM:SS", UTC) dan oldin yuborilganlarni o'chirish"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM outbox WHERE status = 'sent' AND sent_at < ?", (before,))
+        count = cursor.rowcount
+        conn.commit()
+        conn.close()
+        return count
+    
+    def get_outbox_stats(self):
+        """Navbat holati: OutboxStats"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        counts = dict(cursor.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status"))
+        oldest = cursor.execute(
+            "SELECT MIN(created_at) FROM outbox WHERE status = 'pending'"
+        ).fetchone()[0]
+        last_error = cursor.execute("""
+            SELECT last_error FROM outbox
+            WHERE status != 'sent' AND last_error IS NOT NULL
+            ORDER BY id DESC LIMIT 1
+        """).fetchone()
+        
+        conn.close()
+        return OutboxStats(
+            counts.get("pending", 0), counts.get("sent", 0), counts.get("failed", 0),
+            oldest, last_error[0] if last_error else None
+        )
+    
+    # ===== ZAXIRA NUSXA =====
+    
+    def backup(self):
+        """Bot to'xtamasdan zaxira nusxa olish (backup.py)"""
+        return backup.create_backup(self.db_name)
+    
+    # ===== XIZMAT ISHLARI =====
+    
+    def run_maintenance(self):
+        """Tungi xizmat ishlari (maintenance.py), qadamlar natijasi"""
+        conn = self.get_connection()
+        try:
+            return maintenance.run(
+                conn, self.db_name,
+                config.MAINTENANCE_ANALYSIS_LIMIT,
+                config.MAINTENANCE_VACUUM_PAGES,
+                config.MAINTENANCE_VACUUM_PAUSE / 1000
+            )
+        finally:
+            conn.close()
+    
+    def vacuum(self):
+        """Bir martalik to'liq VACUUM (yozishlarni to'xtatadi - qo'lda)"""
+        conn = self.get_connection()
+        try:
+            return maintenance.vacuum(conn)
+        finally:
+            conn.close()
+    
+    # ===== ARXIV =====
+    
+    def archive_completions(self, today=None):
+        """Yopilgan oylarni task_completions dan arxiv fayllarga ko'chirish.
+        
+        Har bir oy: arxivga nusxa -> tekshirish -> ro'yxatga olish ->
+        issiq jadvaldan kunma-kun o'chirish (qisqa tranzaksiyalar, yozuvchi
+        uzoq kutib qolmaydi). To'xtab qolsa keyingi ishga tushishda davom
+        etadi. Oxirida saqlash muddati o'tgan arxiv fayllari o'chiriladi.
+        Ko'chirilgan qatorlar sonini qaytaradi.
+        """
+        today = today or date.today()
+        cutoff = archive.hot_start(today)
+        moved = 0
+        
+        conn = self.get_connection()
+        try:
+            months = [row[0] for row in conn.execute("""
+                SELECT DISTINCT substr(completion_date, 1, 7)
+                FROM task_completions
+                WHERE completion_date < ?
+                ORDER BY 1
+            """, (cutoff,)).fetchall()]
+            
+            for key in months:
+                moved += self._archive_month(conn, key)
+            
+            self._purge_archives(conn, today)
+        finally:
+            conn.close()
+        
+        return moved
+    
+    def _archive_month(self, conn, key):
+        """Bitta oyni arxiv fayliga ko'chirish"""
+        start = archive.month_start(key)
+        end = archive.add_months(start, 1)
+        path = archive.archive_path(key)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        
+        schema = archive.attach(conn, key, path)
+        try:
+            archive.create_archive_table(conn, schema)
+            conn.execute(f"""
+                INSERT OR IGNORE INTO {schema}.task_completions ({archive.COLUMNS})
+                SELECT {archive.COLUMNS} FROM main.task_completions
+                WHERE completion_date >= ? AND completion_date < ?
+            """, (start, end))
+            conn.commit()
+            
+            # O'chirishdan oldin - har bir qator arxivda borligini tekshirish
+            missing = conn.execute(f"""
+                SELECT COUNT(*) FROM main.task_completions m
+                WHERE m.completion_date >= ? AND m.completion_date < ?
+                    AND NOT EXISTS (
+                        SELECT 1 FROM {schema}.task_completions a WHERE a.id = m.id
+                    )
+            """, (start, end)).fetchone()[0]
+            if missing:
+                raise RuntimeError(f"Arxiv {key}: {missing} ta qator ko'chirilmadi")
+            
+            row_count = conn.execute(
+                f"SELECT COUNT(*) FROM {schema}.task_completions"
+            ).fetchone()[0]
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            archive.detach(conn, key)
+        
+        # Ro'yxatga olingandan keyin o'qishlar shu oyni arxivdan oladi
+        conn.execute("""
+            INSERT INTO completion_archives (month, path, row_count) VALUES (?, ?, ?)
+            ON CONFLICT (month) DO UPDATE SET path = excluded.path,
+                row_count = excluded.row_count, archived_at = CURRENT_TIMESTAMP
+        """, (key, path, row_count))
+        conn.commit()
+        
+        moved = 0
+        current = start
+        while current < end:
+            cursor = conn.execute(
+                "DELETE FROM task_completions WHERE completion_date = ?", (current,)
+            )
+            moved += cursor.rowcount
+            conn.commit()
+            current += timedelta(days=1)
+        
+        print(f"✅ Arxiv {key}: {moved} ta qator -> {path}")
+        return moved
+    
+    def _purge_archives(self, conn, today):
+        """Saqlash muddati o'tgan arxiv fayllarini o'chirish"""
+        if config.ARCHIVE_RETENTION_MONTHS <= 0:
+            return
+        
+        oldest = archive.month_key(
+            archive.add_months(today.replace(day=1), -config.ARCHIVE_RETENTION_MONTHS)
+        )
+        for key, path, purged in archive.archived_months(conn):
+            if purged or key >= oldest:
+                continue
+            if os.path.exists(path):
+                os.remove(path)
+            conn.execute(
+                "UPDATE completion_archives SET purged_at = CURRENT_TIMESTAMP WHERE month = ?",
+                (key,)
+            )
+            conn.commit()
+            print(f"🗑 Arxiv {key} saqlash muddati o'tdi, fayl o'chirildi")
+
+class AsyncDatabase:
+    """Database metodlarining async versiyasi.
+    
+    Har bir metod alohida thread pool da bajariladi, shuning uchun
+    sekin so'rov yoki band yozish event loop ni to'xtatib qo'ymaydi.
+    Yozuvchi ishga tushirilgan bo'lsa (start_writer), @writes metodlari
+    yagona yozuvchi navbatiga yuboriladi.
+    """
+    
+    def __init__(self, database, max_workers=config.DB_POOL_SIZE):
+        self._db = database
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="db")
+        self.writer = None
+    
+    def start_writer(self):
+        """Yagona yozuvchini ishga tushirish (event loop ichida, faqat SQLite)"""
+        if not isinstance(self._db, Database):
+            return
+        if self.writer is None:
+            self.writer = DatabaseWriter(self._db)
+        self.writer.start()
+    
+    async def stop_writer(self):
+        """Navbatdagi yozishlarni tugatib, yozuvchini to'xtatish"""
+        if self.writer is not None:
+            await self.writer.stop()
+            self.writer = None
+    
+    def __getattr__(self, name):
+        method = getattr(self._db, name)
+        if not callable(method):
+            raise AttributeError(name)
+        is_write = getattr(method, "is_write", False)
+        
+        @functools.wraps(method)
+        async def wrapper(*args, **kwargs):
+            writer = self.writer
+            if is_write and writer is not None and writer.running:
+                return await writer.submit(method, *args, **kwargs)
+            
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._executor, functools.partial(method, *args, **kwargs)
+            )
+        
+        # Keyingi chaqiruvlar uchun saqlab qo'yish
+        setattr(self, name, wrapper)
+        return wrapper
+    
+    def close(self):
+        """Thread pool ni to'xtatish va ulanishlarni yopish"""
+        self._executor.shutdown(wait=True)
+        self._db.close()
+
+def create_storage(backend=config.STORAGE_BACKEND):
+    """config.STORAGE_BACKEND bo'yicha omborni yaratish"""
+    if backend == "memory":
+        from memory_storage import MemoryDatabase
+        return MemoryDatabase()
+    if backend != "sqlite":
+        raise ValueError(f"Noma'lum STORAGE_BACKEND: {backend}")
+    return Database()
+
 
-# Global database obyekti
-db = Database()
\ No newline at end of file
+# Global database obyektlari
+db = create_storage()
+adb = AsyncDatabase(db)
\ No newline at end of file
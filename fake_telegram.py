@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+# fake_telegram.py
+"""
+Lokal soxta Telegram Bot API - webhook va polling o'tkazuvchanligini o'lchash
+
+    python fake_telegram.py updates.jsonl       # yozib olingan update lar (JSON qatorlar)
+    python fake_telegram.py --generate 2000     # sun'iy /start xabarlari
+    python fake_telegram.py --generate 2000 --rate 100   # sekundiga 100 ta
+    python fake_telegram.py --generate 200 --flood       # Telegram flood limitlari bilan
+
+Bot shu serverga ulanib ishga tushiriladi:
+
+    TELEGRAM_API_URL=http://127.0.0.1:8081 RUN_MODE=polling python bot.py
+    TELEGRAM_API_URL=http://127.0.0.1:8081 RUN_MODE=webhook \\
+        WEBHOOK_URL=http://127.0.0.1:8080 python bot.py
+
+Rejim botning o'zidan aniqlanadi: setWebhook chaqirsa - update lar
+webhook ga POST qilinadi (Telegram kabi, max_connections tagacha
+parallel), getUpdates chaqirsa - long polling orqali beriladi.
+--rate berilsa update lar bir tekis "keladi", aks holda hammasi birdan.
+Kechikish - update kelgan paytdan shu chatga birinchi javobgacha
+(polling da keyingi getUpdates ni kutish ham shunga kiradi). Oxirida o'tkazuvchanlik (update/s) va kechikish (p50/p95) chiqadi.
+--flood bilan send* so'rovlari FLOOD_LIMITS dan oshsa Telegram kabi 429
+(retry_after) qaytadi, ularning soni ham hisobotda chiqadi.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import time
+from collections import defaultdict, deque
+
+from aiohttp import ClientSession, web
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+BOT_USER = {"id": 1, "is_bot": True, "first_name": "Fake", "username": "fake_bot"}
+
+# (so'rovlar soni, oyna soniyada) - Telegram ning taxminiy limitlari
+FLOOD_LIMITS = {
+    "group": (20, 60.0),
+    "private": (3, 3.0),
+    "global": (30, 1.0),
+}
+
+
+def load_updates(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def generate_updates(count, text="/start"):
+    """Har biri alohida userdan bitta xabar"""
+    now = int(time.time())
+    return [
+        {
+            "update_id": i,
+            "message": {
+                "message_id": i,
+                "date": now,
+                "chat": {"id": 10_000 + i, "type": "private"},
+                "from": {"id": 10_000 + i, "is_bot": False, "first_name": f"User {i}"},
+                "text": text,
+            },
+        }
+        for i in range(1, count + 1)
+    ]
+
+
+def chat_of(update):
+    """Update qaysi chatga tegishli (javobni bog'lash uchun)"""
+    for key in ("message", "edited_message", "channel_post"):
+        if key in update:
+            return update[key]["chat"]["id"]
+    if "callback_query" in update:
+        query = update["callback_query"]
+        message = query.get("message")
+        return message["chat"]["id"] if message else query["from"]["id"]
+    for key in ("inline_query", "my_chat_member", "chat_member"):
+        if key in update:
+            return update[key]["from"]["id"]
+    return None
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+class FakeTelegram:
+    """Bot API ning kerakli qismi va o'lchovlar"""
+
+    def __init__(self, updates, idle, rate=None, flood=False):
+        # update_id lar ketma-ket bo'lishi kerak (polling offset)
+        self.updates = [dict(update, update_id=i) for i, update in enumerate(updates, 1)]
+        self.idle = idle
+        self.rate = rate
+        self.flood = flood
+        self.flooded = 0
+        self.sent = defaultdict(deque)  # chat_id / "global" -> yuborilgan vaqtlar
+        self.mode = None
+        self.started = None
+        self.finished = None
+        self.delivered = 0
+        self.calls = 0
+        self.last_activity = time.monotonic()
+        self.latencies = []
+        self.waiting = defaultdict(deque)  # chat_id -> yetkazilgan vaqtlar
+        self.message_ids = itertools.count(1)
+        self.done = asyncio.Event()
+
+    def create_app(self):
+        app = web.Application()
+        app.router.add_post("/bot{token}/{method}", self.handle)
+        return app
+
+    async def _params(self, request):
+        if request.content_type == "application/json":
+            return await request.json()
+        return dict(await request.post())
+
+    async def handle(self, request):
+        method = request.match_info["method"].lower()
+        data = await self._params(request)
+
+        if method == "getme":
+            result = BOT_USER
+        elif method == "getupdates":
+            result = await self.get_updates(data)
+        elif method == "setwebhook":
+            result = True
+            asyncio.create_task(self.push(data))
+        elif method in ("deletewebhook", "close", "logout"):
+            result = True
+        elif (self.flood and method.startswith(("send", "copy", "forward"))
+              and (retry_after := self._throttled(data))):
+            self.flooded += 1
+            return web.json_response(status=429, data={
+                "ok": False,
+                "error_code": 429,
+                "description": f"Too Many Requests: retry after {retry_after}",
+                "parameters": {"retry_after": retry_after},
+            })
+        else:
+            result = self.reply(method, data)
+        return web.json_response({"ok": True, "result": result})
+
+    def _throttled(self, data):
+        """Limitdan oshsa - retry_after (soniya), aks holda 0 va so'rov hisoblanadi"""
+        now = time.monotonic()
+        chat_id = int(data.get("chat_id") or 0)
+        windows = [("global", FLOOD_LIMITS["global"])]
+        windows.append((chat_id, FLOOD_LIMITS["group" if chat_id < 0 else "private"]))
+
+        retry_after = 0
+        for key, (limit, window) in windows:
+            times = self.sent[key]
+            while times and now - times[0] >= window:
+                times.popleft()
+            if len(times) >= limit:
+                retry_after = max(retry_after, math.ceil(times[0] + window - now))
+        if not retry_after:
+            for key, _ in windows:
+                self.sent[key].append(now)
+        return retry_after
+
+    def _start(self):
+        if self.started is None:
+            self.started = self.last_activity = time.monotonic()
+
+    def _arrival(self, update):
+        """Update "Telegramga kelgan" payt"""
+        if not self.rate:
+            return self.started
+        return self.started + (update["update_id"] - 1) / self.rate
+
+    def _arrived(self):
+        """Hozirgacha kelgan update lar soni"""
+        if not self.rate:
+            return len(self.updates)
+        return min(int((time.monotonic() - self.started) * self.rate) + 1, len(self.updates))
+
+    def _deliver(self, update):
+        self.last_activity = time.monotonic()
+        self.delivered += 1
+        chat_id = chat_of(update)
+        if chat_id is not None:
+            self.waiting[chat_id].append(self._arrival(update))
+
+    def reply(self, method, data):
+        """Botdan chiquvchi so'rov - kechikishni yozib olish"""
+        now = time.monotonic()
+        self.calls += 1
+        self.last_activity = now
+
+        chat_id = data.get("chat_id")
+        if chat_id is not None:
+            chat_id = int(chat_id)
+            if self.waiting.get(chat_id):
+                self.latencies.append(now - self.waiting[chat_id].popleft())
+
+        if method == "sendmediagroup":
+            return [self._message(chat_id, data)]
+        if method.startswith(("send", "edit", "copy", "forward")):
+            if data.get("inline_message_id"):
+                return True
+            return self._message(chat_id, data)
+        if method == "getfile":
+            return {"file_id": data.get("file_id"), "file_unique_id": "fake", "file_path": "fake"}
+        return True
+
+    def _message(self, chat_id, data):
+        return {
+            "message_id": next(self.message_ids),
+            "date": int(time.time()),
+            "chat": {"id": chat_id or 0, "type": "private"},
+            "text": data.get("text") or data.get("caption") or "",
+        }
+
+    async def get_updates(self, data):
+        """Long polling: offset dan keyingi update lar yoki timeout"""
+        self.mode = self.mode or "polling"
+        self._start()
+        offset = int(data.get("offset") or 0)
+        limit = int(data.get("limit") or 100)
+        start = max(offset - 1, 0)
+        deadline = time.monotonic() + float(data.get("timeout") or 0)
+
+        # Yangi update kelishi bilan javob qaytadi (haqiqiy long polling kabi)
+        while True:
+            batch = self.updates[start:min(start + limit, self._arrived())]
+            if batch or start >= len(self.updates) or time.monotonic() >= deadline:
+                break
+            await asyncio.sleep(0.001)
+
+        if not batch:
+            await asyncio.sleep(max(deadline - time.monotonic(), 0))
+            return []
+        for update in batch:
+            if update["update_id"] > self.delivered:
+                self._deliver(update)
+        return batch
+
+    async def push(self, data):
+        """Webhook: update larni Telegram kabi parallel POST qilish"""
+        self.mode = "webhook"
+        await asyncio.sleep(0.2)
+        self._start()
+        url = data["url"]
+        headers = {SECRET_HEADER: data.get("secret_token", "")}
+        limit = asyncio.Semaphore(int(data.get("max_connections") or 40))
+
+        async with ClientSession() as session:
+            async def send(update):
+                async with limit:
+                    self._deliver(update)
+                    async with session.post(url, json=update, headers=headers) as response:
+                        if response.status != 200:
+                            print(f"⚠️ Webhook {response.status} (update {update['update_id']})")
+
+            tasks = []
+            for update in self.updates:
+                delay = self._arrival(update) - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                tasks.append(asyncio.create_task(send(update)))
+            await asyncio.gather(*tasks)
+
+    async def watch(self):
+        """Hammasi yetkazilib, bot jim bo'lib qolguncha kutish"""
+        while True:
+            await asyncio.sleep(0.05)
+            if self.delivered < len(self.updates):
+                continue
+            answered = not any(self.waiting.values())
+            if answered or time.monotonic() - self.last_activity > self.idle:
+                self.finished = self.last_activity
+                self.done.set()
+                return
+
+    def report(self):
+        elapsed = max(self.finished - self.started, 1e-9)
+        unanswered = sum(len(times) for times in self.waiting.values())
+        print(f"📡 Rejim: {self.mode}")
+        print(f"📨 Update lar: {self.delivered} ta, bot so'rovlari: {self.calls} ta")
+        print(f"⏱ Vaqt: {elapsed:.2f} s - {self.delivered / elapsed:.0f} update/s")
+        print(
+            f"⌛ Kechikish: p50 {percentile(self.latencies, 0.5) * 1000:.1f} ms, "
+            f"p95 {percentile(self.latencies, 0.95) * 1000:.1f} ms, "
+            f"max {percentile(self.latencies, 1.0) * 1000:.1f} ms"
+        )
+        if unanswered:
+            print(f"⚠️ Javobsiz qolgan: {unanswered} ta")
+        if self.flood:
+            print(f"🚫 429 (flood): {self.flooded} ta")
+
+
+async def serve(args):
+    updates = load_updates(args.updates) if args.updates else generate_updates(args.generate)
+    fake = FakeTelegram(updates, args.idle, args.rate, args.flood)
+
+    runner = web.AppRunner(fake.create_app(), access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, args.host, args.port).start()
+    print(f"🤖 Soxta Bot API: http://{args.host}:{args.port} ({len(updates)} ta update)")
+    print("   Botni TELEGRAM_API_URL shu manzil bilan ishga tushiring...")
+
+    watcher = asyncio.create_task(fake.watch())
+    try:
+        await fake.done.wait()
+        fake.report()
+    finally:
+        watcher.cancel()
+        await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Soxta Telegram Bot API (o'tkazuvchanlik o'lchovi)")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("updates", nargs="?", help="Update lar fayli (har qatorda JSON)")
+    source.add_argument("--generate", type=int, help="N ta sun'iy /start xabari")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--rate", type=float,
+                        help="Sekundiga shuncha update (bo'lmasa - hammasi birdan)")
+    parser.add_argument("--idle", type=float, default=2.0,
+                        help="Bot shuncha soniya jim bo'lsa - tugadi")
+    parser.add_argument("--flood", action="store_true",
+                        help="Telegram flood limitlari (429 retry_after)")
+    asyncio.run(serve(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+# fsm_storage.py
+"""
+FSM holatlari ma'lumotlar omborida (aiogram BaseStorage)
+
+MemoryStorage dan farqi - yarim qolgan jarayonlar (ishchi / vazifa
+qo'shish, vazifani bajarish) restartdan keyin ham davom etadi:
+
+    - O'qish: xotiradagi keshdan, bo'lmasa ombordan (get_fsm_state)
+    - Yozish orqada (write-behind): set_state / set_data faqat keshni
+      o'zgartiradi; o'zgargan kalitlar har FSM_FLUSH_INTERVAL soniyada
+      bitta tranzaksiyada yoziladi (yagona yozuvchi orqali)
+    - Kesh FSM_CACHE_SIZE ta kalit bilan cheklangan (LRU); hali yozilmagan
+      kalit keshdan chiqsa ham navbatda qoladi
+    - FSM_TTL soniya tegilmagan holat tashlab ketilgan hisoblanadi: o'qishda
+      bo'sh qaytadi, ombordan davriy o'chiriladi
+
+Jarayon keskin to'xtasa oxirgi FSM_FLUSH_INTERVAL dagi o'zgarishlar
+yo'qolishi mumkin; oddiy to'xtatishda close() hammasini yozadi.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StorageKey
+
+import config
+from database import adb
+
+logger = logging.getLogger(__name__)
+
+# Ombordan eskirgan holatlarni o'chirish oralig'i (soniya)
+PURGE_INTERVAL = 600
+
+
+def storage_key(key: StorageKey):
+    """StorageKey -> "bot:chat:user:thread:destiny" """
+    thread_id = key.thread_id if key.thread_id is not None else ""
+    return f"{key.bot_id}:{key.chat_id}:{key.user_id}:{thread_id}:{key.destiny}"
+
+
+class DatabaseStorage(BaseStorage):
+    """Omborda saqlanadigan, keshli va TTL li FSM storage"""
+
+    def __init__(self, database=adb,
+                 cache_size=config.FSM_CACHE_SIZE,
+                 ttl=config.FSM_TTL,
+                 flush_interval=config.FSM_FLUSH_INTERVAL):
+        self._db = database
+        self.cache_size = cache_size
+        self.ttl = ttl
+        self.flush_interval = flush_interval
+
+        # key -> [state, data, touched] (touched - unix vaqt)
+        self._cache = OrderedDict()
+        # Hali yozilmagan o'zgarishlar: key -> o'sha yozuv
+        self._dirty = {}
+        self._flusher = None
+        self._last_purge = time.monotonic()
+
+    async def _entry(self, key: StorageKey):
+        name = storage_key(key)
+        entry = self._cache.get(name)
+        if entry is None:
+            entry = self._dirty.get(name)
+        if entry is None:
+            row = await self._db.get_fsm_state(name)
+            entry = [row[0], json.loads(row[1]), row[2]] if row else [None, {}, 0.0]
+            # Kutish paytida boshqa update shu kalitni yuklagan bo'lishi mumkin
+            entry = self._cache.get(name) or entry
+
+        self._cache[name] = entry
+        self._cache.move_to_end(name)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+        # Tashlab ketilgan jarayon - yangidan boshlanadi
+        if (entry[0] is not None or entry[1]) and time.time() - entry[2] > self.ttl:
+            entry[0], entry[1] = None, {}
+            self._mark(name, entry)
+        return name, entry
+
+    def _mark(self, name, entry):
+        entry[2] = time.time()
+        self._dirty[name] = entry
+        if self._flusher is None:
+            self._flusher = asyncio.create_task(self._run())
+
+    async def set_state(self, key: StorageKey, state=None) -> None:
+        name, entry = await self._entry(key)
+        entry[0] = state.state if isinstance(state, State) else state
+        self._mark(name, entry)
+
+    async def get_state(self, key: StorageKey):
+        _, entry = await self._entry(key)
+        return entry[0]
+
+    async def set_data(self, key: StorageKey, data) -> None:
+        name, entry = await self._entry(key)
+        entry[1] = data.copy()
+        self._mark(name, entry)
+
+    async def get_data(self, key: StorageKey):
+        _, entry = await self._entry(key)
+        return entry[1].copy()
+
+    async def flush(self):
+        """Yozilmagan o'zgarishlarni bitta tranzaksiyada yozish, soni qaytadi"""
+        if not self._dirty:
+            return 0
+        pending, self._dirty = self._dirty, {}
+
+        rows = []
+        deleted = []
+        for name, (state, data, touched) in pending.items():
+            if state is None and not data:
+                deleted.append(name)
+                continue
+            try:
+                rows.append((name, state, json.dumps(data, ensure_ascii=False), touched))
+            except (TypeError, ValueError) as e:
+                logger.error(f"❌ FSM {name}: data JSON ga aylanmadi: {e}")
+
+        try:
+            await self._db.save_fsm_states(rows, deleted)
+        except Exception:
+            # Keyingi urinishda - yangiroq o'zgarishlarni bosib ketmasdan
+            for name, entry in pending.items():
+                self._dirty.setdefault(name, entry)
+            raise
+        return len(pending)
+
+    async def purge(self):
+        """Eskirgan holatlarni keshdan va ombordan o'chirish"""
+        before = time.time() - self.ttl
+        for name in [name for name, entry in self._cache.items() if entry[2] < before]:
+            if name not in self._dirty:
+                del self._cache[name]
+        self._last_purge = time.monotonic()
+        return await self._db.purge_fsm_states(before)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+                if time.monotonic() - self._last_purge > PURGE_INTERVAL:
+                    await self.purge()
+            except Exception as e:
+                logger.error(f"❌ FSM holatlarini yozishda xatolik: {e}")
+
+    async def close(self) -> None:
+        """Orqa yozuvchini to'xtatib, qolganini yozish (qayta chaqirsa bo'ladi)"""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        await self.flush()
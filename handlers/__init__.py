@@ -5,10 +5,16 @@ Handlers package
 
 from aiogram import Router
 
+from middlewares import identity_middleware
 from .admin import router as admin_router
 from .user import router as user_router
 from .common import router as common_router
 
 
 router = Router()
-router.include_routers(admin_router, user_router, common_router)
\ No newline at end of file
+router.include_routers(admin_router, user_router, common_router)
+
+# Userni bir marta aniqlab, barcha ichki routerlarga uzatish
+router.message.outer_middleware(identity_middleware)
+router.callback_query.outer_middleware(identity_middleware)
+router.inline_query.outer_middleware(identity_middleware)
\ No newline at end of file
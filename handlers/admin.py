@@ -3,21 +3,36 @@
 Admin panel handlerlari - to'liq versiya
 """
 
+import asyncio
+import re
+from html import escape
+
 from aiogram import Router, F, Bot
-from aiogram.types import Message, CallbackQuery
+from aiogram.types import (
+    Message, CallbackQuery, InlineQuery, InlineQueryResultArticle,
+    InputTextMessageContent, BufferedInputFile
+)
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
+from aiogram.methods import SendMessage
 
-from database import db
+from database import adb
 import config
 from keyboards import (
     admin_main_menu, admin_workers_menu, admin_tasks_menu,
     select_filial_keyboard, select_role_keyboard, 
     select_task_type_keyboard, confirm_keyboard, cancel_btn,
-    admin_workers_list_menu, is_check, cancel_del_btn, admin_tasks_list_menu,
-    admin_admins_menu, admin_admins_list_menu
+    is_check, cancel_del_btn, admin_tasks_list_menu,
+    admin_admins_menu, admin_admins_list_menu, workers_page_keyboard,
+    tasks_page_keyboard, admin_bulk_tasks_menu, multi_select_keyboard,
+    keep_or_select_keyboard
 )
-from utils import format_phone
+from backup import BackupError
+from outbox import outbox
+from recurrence import RuleError, describe, parse_rule
+from roster import RosterError, errors_csv, read_rows, validate
+from sender import Priority, sender
+from utils import format_phone, parse_id_list
 
 router = Router()
 
@@ -30,13 +45,31 @@ class AddWorkerStates(StatesGroup):
     waiting_for_filial = State()
     waiting_for_role = State()
 
+class ImportWorkersStates(StatesGroup):
+    """Ishchilarni fayldan import qilish states"""
+    waiting_for_file = State()
+
 class AddTaskStates(StatesGroup):
     """Vazifa qo'shish states"""
     waiting_for_filial = State()
     waiting_for_role = State()
     waiting_for_type = State()
+    waiting_for_rule = State()
     waiting_for_text = State()
 
+class BulkTaskStates(StatesGroup):
+    """Vazifalar ustida ommaviy amallar states"""
+    waiting_for_filials = State()
+    waiting_for_roles = State()
+    waiting_for_type = State()
+    waiting_for_rule = State()
+    waiting_for_texts = State()
+    waiting_for_delete_ids = State()
+    waiting_for_delete_confirm = State()
+    waiting_for_reassign_ids = State()
+    waiting_for_reassign_filial = State()
+    waiting_for_reassign_role = State()
+
 class DeleteTaskStates(StatesGroup):
     """Vazifa o'chirish states"""
     waiting_for_task_id = State()
@@ -64,16 +97,18 @@ class DeleteAdminStates(StatesGroup):
 
 @router.message.middleware()
 @router.callback_query.middleware()
+@router.inline_query.middleware()
 async def admin_only_middleware(handler, event, data):
     """Faqat adminlar uchun"""
-    user_id = event.from_user.id
-    user = db.get_user_by_telegram_id(user_id)
+    user = data.get("user")  # identity_middleware aniqlagan
     
-    if user and user[8]:  # is_admin
+    if user and user.is_admin:
         return await handler(event, data)
     else:
         if isinstance(event, Message):
             await event.answer("⛔️ Bu bo'lim faqat adminlar uchun!")
+        elif isinstance(event, InlineQuery):
+            await event.answer([], cache_time=60, is_personal=True)
         return
 
 # ===== ASOSIY MENYU =====
@@ -145,9 +180,28 @@ async def admin_statistics(message: Message):
     
     await message.answer(
         message_text,
-        reply_markup=select_filial_keyboard("stats_filial")
+        reply_markup=select_filial_keyboard("stats_filial", include_all=True)
     )
 
+@router.callback_query(F.data == "stats_filial_all")
+async def show_network_statistics(callback: CallbackQuery):
+    """Barcha filiallar bo'yicha umumiy statistika"""
+    from datetime import date, timedelta
+    from utils import format_network_statistics
+    
+    yesterday = date.today() - timedelta(days=1)
+    
+    filials = await adb.get_all_filials()
+    statistics = await adb.get_all_daily_statistics(yesterday)
+    
+    stats_message = format_network_statistics(filials, statistics, yesterday)
+    
+    await callback.message.edit_text(
+        stats_message,
+        reply_markup=select_filial_keyboard("stats_filial", include_all=True)
+    )
+    await callback.answer("✅ Statistika ko'rsatildi")
+
 @router.callback_query(F.data.startswith("stats_filial_"))
 async def show_filial_statistics(callback: CallbackQuery):
     """Filial statistikasini ko'rsatish"""
@@ -157,20 +211,20 @@ async def show_filial_statistics(callback: CallbackQuery):
     filial_id = int(callback.data.split("_")[-1])
     yesterday = date.today() - timedelta(days=1)
     
-    filial = db.get_filial(filial_id)
-    role_stats, user_stats = db.get_daily_statistics(filial_id, yesterday)
+    filial = await adb.get_filial(filial_id)
+    role_stats, user_stats = await adb.get_daily_statistics(filial_id, yesterday)
     
     if not user_stats:
         await callback.message.edit_text(
-            f"📊 {filial[1]} - STATISTIKA\n\n"
+            f"📊 {filial.name} - STATISTIKA\n\n"
             f"Bu filialda hali ishchilar yo'q yoki\n"
             f"kecha hech qanday vazifa bajarilmagan.",
-            reply_markup=select_filial_keyboard("stats_filial")
+            reply_markup=select_filial_keyboard("stats_filial", include_all=True)
         )
         await callback.answer()
         return
     
-    stats_message = format_daily_statistics(filial[1], role_stats, user_stats, yesterday)
+    stats_message = format_daily_statistics(filial.name, role_stats, user_stats, yesterday)
     
     # Telegram 4096 belgidan ko'p xabar yuborishni qabul qilmaydi
     if len(stats_message) > 4000:
@@ -185,25 +239,31 @@ async def show_filial_statistics(callback: CallbackQuery):
 @router.message(F.text == "⚙️ Sozlamalar")
 async def admin_settings(message: Message):
     """Sozlamalar bo'limi"""
-    filials = db.get_all_filials()
-    roles = db.get_all_roles()
-    users = db.get_all_users()
-    tasks = db.get_all_tasks()
-    admins = db.get_admins()
+    filials = await adb.get_all_filials()
+    roles = await adb.get_all_roles()
+    users = await adb.get_all_users()
+    tasks = await adb.get_all_tasks()
+    admins = await adb.get_admins()
     
-    filials_text = "\n".join([f"  {i}. {name}" for i, (_, name) in enumerate(filials, 1)])
-    roles_text = "\n".join([f"  {i}. {name}" for i, (_, name) in enumerate(roles, 1)])
+    filials_text = "\n".join([f"  {i}. {filial.name}" for i, filial in enumerate(filials, 1)])
+    roles_text = "\n".join([f"  {i}. {role.name}" for i, role in enumerate(roles, 1)])
     
     # Admin raqamlari
-    admins_text = "\n".join([f"  • {format_phone(admin[1])}" for admin in admins])
+    admins_text = "\n".join([f"  • {format_phone(admin.phone)}" for admin in admins])
     
     # Guruh ID lari
     groups_info = []
-    for filial_id, filial_name in filials:
-        chat_id = db.get_group_chat_id(filial_id)
-        groups_info.append(f"  • {filial_name}: {chat_id if chat_id else '❌ Guruh topilmadi'}")
+    for filial in filials:
+        chat_id = await adb.get_group_chat_id(filial.id)
+        groups_info.append(f"  • {filial.name}: {chat_id if chat_id else '❌ Guruh topilmadi'}")
     groups_text = "\n".join(groups_info)
     
+    # Kesh samaradorligi
+    cache_stats = await adb.cache_stats()
+    cache_hits = sum(c['hits'] for c in cache_stats.values())
+    cache_total = cache_hits + sum(c['misses'] for c in cache_stats.values())
+    cache_ratio = round(cache_hits / cache_total * 100) if cache_total > 0 else 0
+    
     await message.answer(
         f"⚙️ <b>TIZIM SOZLAMALARI</b>\n\n"
         f"📊 <b>FILIALLAR</b> ({len(filials)} ta):\n{filials_text}\n\n"
@@ -213,9 +273,64 @@ async def admin_settings(message: Message):
         f"👨‍💼 <b>ADMINLAR</b> ({len(admins)} ta):\n{admins_text}\n\n"
         f"📱 <b>GURUHLAR:</b>\n{groups_text}\n\n"
         f"💾 <b>Database:</b> {config.DATABASE_NAME}\n"
+        f"🧠 <b>Kesh:</b> {cache_ratio}% ({cache_hits}/{cache_total})\n"
         f"🕐 <b>Vaqt zonasi:</b> {config.TIMEZONE}"
     )
 
+@router.message(F.text == "/backup")
+async def admin_backup(message: Message):
+    """Zaxira nusxa olish (bot to'xtamaydi)"""
+    status = await message.answer("⏳ Zaxira nusxa olinmoqda...")
+    
+    try:
+        result = await adb.backup()
+    except BackupError as e:
+        await status.edit_text(f"❌ {e}")
+        return
+    except Exception as e:
+        await status.edit_text(f"<b>❌ XATOLIK!</b>\n\nZaxira nusxa olinmadi:\n{escape(str(e))}")
+        return
+    
+    if result is None:
+        await status.edit_text("ℹ️ Ombor xotirada - zaxira nusxa kerak emas.")
+        return
+    
+    await status.edit_text(
+        f"<b>✅ ZAXIRA NUSXA TAYYOR</b>\n\n"
+        f"📁 Fayl: <code>{escape(result.path)}</code>\n"
+        f"💾 Hajmi: {result.size / 1024 / 1024:.2f} MB "
+        f"(siqilmagan: {result.raw_size / 1024 / 1024:.2f} MB)\n"
+        f"⏱ Davomiyligi: {result.duration:.1f} s\n"
+        f"🔍 Tekshiruv: integrity_check - ok\n"
+        f"🗑 Eski nusxalar o'chirildi: {result.removed} ta"
+    )
+
+@router.message(F.text == "/outbox")
+async def admin_outbox(message: Message):
+    """Guruh xabarlari navbati holati"""
+    stats = await adb.get_outbox_stats()
+    
+    text = (
+        f"<b>📮 GURUH XABARLARI</b>\n\n"
+        f"⏳ Navbatda: {stats.pending} ta\n"
+        f"✅ Yuborilgan: {stats.sent} ta (oxirgi {config.OUTBOX_KEEP_DAYS} kun)\n"
+        f"❌ Yuborilmagan: {stats.failed} ta\n"
+    )
+    if stats.oldest_pending:
+        text += f"🕐 Eng eskisi: {stats.oldest_pending} (UTC)\n"
+    if stats.last_error:
+        text += f"\n⚠️ Oxirgi xato:\n<i>{escape(stats.last_error)}</i>\n"
+    if stats.failed:
+        text += "\nBotni guruhga qo'shganingizga ishonch hosil qiling va /outbox_retry - qayta yuborish."
+    await message.answer(text)
+
+@router.message(F.text == "/outbox_retry")
+async def admin_outbox_retry(message: Message):
+    """Yuborilmagan xabarlarni qayta navbatga qo'yish"""
+    count = await adb.retry_failed_outbox()
+    outbox.wake()
+    await message.answer(f"🔄 Qayta navbatga qo'yildi: {count} ta")
+
 # ===== ISHCHI QO'SHISH =====
 
 @router.callback_query(F.data == "admin_add_worker")
@@ -288,13 +403,13 @@ async def process_worker_phone(message: Message, state: FSMContext):
     phone = int(phone_text)
     
     # Bunday telefon mavjudligini tekshirish
-    existing_user = db.get_user_by_phone(phone)
+    existing_user = await adb.get_user_by_phone(phone)
     if existing_user:
         await message.answer(
             f"⚠️ Bu telefon raqami allaqachon ro'yxatdan o'tgan!\n\n"
-            f"👤 Ism: {existing_user[2]}\n"
-            f"🏪 Filial: {existing_user[5]}\n"
-            f"🎭 Rol: {existing_user[7]}\n\n"
+            f"👤 Ism: {existing_user.full_name}\n"
+            f"🏪 Filial: {existing_user.filial_name}\n"
+            f"🎭 Rol: {existing_user.role_name}\n\n"
             f"Boshqa raqam kiriting:"
         )
         return
@@ -317,13 +432,13 @@ async def process_worker_filial(callback: CallbackQuery, state: FSMContext):
     filial_id = int(callback.data.split("_")[-1])
     await state.update_data(filial_id=filial_id)
     
-    filial = db.get_filial(filial_id)
+    filial = await adb.get_filial(filial_id)
     data = await state.get_data()
     
     await callback.message.edit_text(
         f"✅ Ism: {data['full_name']}\n"
         f"✅ Telefon: {format_phone(data['phone'])}\n"
-        f"✅ Filial: {filial[1]}\n\n"
+        f"✅ Filial: {filial.name}\n\n"
         f"4️⃣ Rolni tanlang:",
         reply_markup=select_role_keyboard("worker_role")
     )
@@ -342,17 +457,17 @@ async def process_worker_role(callback: CallbackQuery, state: FSMContext):
     
     # Ishchini yaratish
     try:
-        user_id = db.create_user(full_name, phone, filial_id, role_id, is_admin=False)
+        user_id = await adb.create_user(full_name, phone, filial_id, role_id, is_admin=False)
         
-        filial = db.get_filial(filial_id)
-        role = db.get_role(role_id)
+        filial = await adb.get_filial(filial_id)
+        role = await adb.get_role(role_id)
         
         await callback.message.edit_text(
             f"<b>✅ ISHCHI MUVAFFAQIYATLI QO'SHILDI!</b>\n\n"
             f"👤 Ism: {full_name}\n"
             f"📱 Telefon: {format_phone(phone)}\n"
-            f"🏪 Filial: {filial[1]}\n"
-            f"🎭 Rol: {role[1]}\n"
+            f"🏪 Filial: {filial.name}\n"
+            f"🎭 Rol: {role.name}\n"
             f"🆔 ID: {user_id}\n\n"
             f"📲 KEYINGI QADAM:\n"
             f"Ishchi botga /start buyrug'ini yuborishi\n"
@@ -373,14 +488,111 @@ async def process_worker_role(callback: CallbackQuery, state: FSMContext):
         await state.clear()
         await callback.answer("❌ Xatolik!", show_alert=True)
 
+# ===== ISHCHILARNI FAYLDAN IMPORT =====
+
+@router.callback_query(F.data == "admin_import_workers")
+async def start_import_workers(callback: CallbackQuery, state: FSMContext):
+    """Import boshlash - fayl so'rash"""
+    await callback.message.edit_text(
+        "<b>📥 ISHCHILARNI FAYLDAN IMPORT QILISH</b>\n\n"
+        "CSV yoki XLSX fayl yuboring. Ustunlar:\n"
+        "<b>Ism | Telefon | Filial | Rol</b>\n\n"
+        "📌 Misol: Samandar Aliyev | 998901234567 | Gelyon | Oshpaz\n\n"
+        "💡 Birinchi qator sarlavha bo'lishi mumkin. Filial va rol\n"
+        "nomi yoki ID si bilan yoziladi.",
+        reply_markup=cancel_btn
+    )
+    await state.set_state(ImportWorkersStates.waiting_for_file)
+    await callback.answer()
+
+
+@router.message(ImportWorkersStates.waiting_for_file, F.document)
+async def process_import_file(message: Message, state: FSMContext, bot: Bot):
+    """Faylni o'qish, tekshirish va bitta tranzaksiyada qo'shish"""
+    document = message.document
+    
+    if document.file_size and document.file_size > config.IMPORT_MAX_FILE_SIZE:
+        await message.answer(
+            f"❌ Fayl juda katta! (ko'pi bilan {config.IMPORT_MAX_FILE_SIZE // 1024 // 1024} MB)\n\n"
+            f"Boshqa fayl yuboring:"
+        )
+        return
+    
+    content = (await bot.download(document)).getvalue()
+    
+    try:
+        # XLSX o'qish sekin bo'lishi mumkin - event loop ni to'xtatmaslik uchun
+        rows = await asyncio.to_thread(read_rows, document.file_name, content)
+    except RosterError as e:
+        await message.answer(f"❌ {e}\n\nBoshqa fayl yuboring:")
+        return
+    
+    filials = await adb.get_all_filials()
+    roles = await adb.get_all_roles()
+    valid, errors = validate(rows, filials, roles)
+    
+    created, taken = 0, {}
+    if valid:
+        created, taken = await adb.import_users([row[1:] for row in valid])
+    
+    for line, full_name, phone, filial_id, role_id in valid:
+        if phone in taken:
+            reason = "Telefon allaqachon ro'yxatdan o'tgan"
+            if not taken[phone]:
+                reason += " (o'chirilgan ishchi)"
+            errors.append((line, reason))
+    errors.sort()
+    
+    report = (
+        f"<b>📥 IMPORT NATIJASI</b>\n\n"
+        f"📄 Qatorlar: {len(rows)} ta\n"
+        f"✅ Qo'shildi: {created} ta\n"
+        f"❌ Xatolar: {len(errors)} ta\n"
+    )
+    if errors:
+        report += "\n"
+        for line, reason in errors[:20]:
+            report += f"{line}-qator: {escape(reason)}\n"
+        if len(errors) > 20:
+            report += f"\n...va yana {len(errors) - 20} ta (to'liq hisobot faylda)"
+    
+    await message.answer(report, reply_markup=admin_workers_menu())
+    if len(errors) > 20:
+        await message.answer_document(
+            BufferedInputFile(errors_csv(errors), filename="import_xatolar.csv")
+        )
+    
+    await state.clear()
+
+
+@router.message(ImportWorkersStates.waiting_for_file)
+async def process_import_not_file(message: Message):
+    """Fayl o'rniga boshqa xabar"""
+    await message.answer("📎 Iltimos, CSV yoki XLSX fayl yuboring:", reply_markup=cancel_btn)
+
 # ===== ISHCHILAR RO'YXATI =====
 
-@router.callback_query(F.data == "admin_list_workers")
-async def list_workers(callback: CallbackQuery):
-    """Barcha ishchilar ro'yxati"""
-    users = db.get_all_users()
+def _parse_page_callback(data):
+    """"{prefix}_{filial}_{p|n}_{id}" -> (filial_id, after_id, before_id)"""
+    filial, direction, cursor_id = data.split("_")[-3:]
+    filial_id = int(filial) or None
+    if direction == "p":
+        return filial_id, None, int(cursor_id)
+    return filial_id, int(cursor_id), None
+
+
+def _short(text, limit):
+    return text[:limit] + "..." if len(text) > limit else text
+
+
+async def show_workers_page(callback: CallbackQuery, filial_id=None, after_id=None, before_id=None):
+    """Ishchilar ro'yxatining bitta sahifasi (keyset - bitta indeksli so'rov)"""
+    page = await adb.get_users_page(filial_id, after_id, before_id)
+    if not page.items and (after_id or before_id):
+        # Sahifadagilar o'chirilgan - boshidan ko'rsatish
+        page = await adb.get_users_page(filial_id)
     
-    if not users:
+    if not page.items and not filial_id:
         await callback.message.edit_text(
             "📋 Hozircha ishchilar yo'q.\n\n"
             "➕ Ishchi qo'shish uchun tugmani bosing:",
@@ -389,31 +601,33 @@ async def list_workers(callback: CallbackQuery):
         await callback.answer()
         return
     
-    # Filial bo'yicha guruhlash
-    users_by_filial = {}
-    for user_id, name, phone, filial, role in users:
-        if filial not in users_by_filial:
-            users_by_filial[filial] = []
-        users_by_filial[filial].append((user_id, name, phone, role))
-    
     message = "<b>📋 ISHCHILAR RO'YXATI</b>\n\n"
     
-    for filial, workers in users_by_filial.items():
-        message += f"🏪 {filial} ({len(workers)} ta):\n"
-        message += "━━━━━━━━━━━━━━━━━━━━\n"
-        for user_id, name, phone, role in workers:
-            message += f"👤 {name}\n"
-            message += f"   🎭 {role}\n"
-            message += f"   📱 {format_phone(phone)}\n"
-            message += f"   🆔 ID: {user_id}\n\n"
+    for worker in page.items:
+        message += f"👤 {escape(worker.full_name)}\n"
+        message += f"   🏪 {worker.filial_name or '-'} | 🎭 {worker.role_name or '-'}\n"
+        message += f"   📱 {format_phone(worker.phone)}\n"
+        message += f"   🆔 ID: {worker.id}\n\n"
     
-    message += f"━━━━━━━━━━━━━━━━━━━━\n"
-    message += f"📊 JAMI: {len(users)} ta ishchi"
+    if not page.items:
+        message += "Bu filialda ishchilar yo'q.\n"
     
-    await callback.message.edit_text(message, reply_markup=admin_workers_list_menu())
+    await callback.message.edit_text(message, reply_markup=workers_page_keyboard(page, filial_id))
     await callback.answer()
 
 
+@router.callback_query(F.data == "admin_list_workers")
+async def list_workers(callback: CallbackQuery):
+    """Ishchilar ro'yxati - birinchi sahifa"""
+    await show_workers_page(callback)
+
+
+@router.callback_query(F.data.startswith("workers_page_"))
+async def list_workers_page(callback: CallbackQuery):
+    """Ishchilar ro'yxati - oldingi / keyingi sahifa yoki filial filtri"""
+    await show_workers_page(callback, *_parse_page_callback(callback.data))
+
+
 # ===== ISHCHI O'CHIRISH =====
 
 @router.callback_query(F.data=="admin_delete_worker")
@@ -429,19 +643,19 @@ async def ask_del_woeker_phone(call:CallbackQuery, state:FSMContext):
 
 @router.message(F.text.regexp(r'^998\d{9}$'), DeleteWorkerStates.waiting_for_worker_phone)
 async def ask_del_worker_check(message:Message, state:FSMContext):
-    user = db.get_user_by_phone(int(message.text))
+    user = await adb.get_user_by_phone(int(message.text))
 
     if not user:
         await message.answer(f"<b>📞 +{message.text} - Bu raqam bilan hech qanday ishchi topilmadi.</b>\n\n<i>Iltimos tekshirib qaytadan yuboring!</i>")
         return
     
-    msg = f"<b>👤 {user[2]}</b>\n\n"
-    msg += f"   🏪 {user[5]}\n"
-    msg += f"   🎭 {user[7]}\n"
-    msg += f"   📱 +{user[3]}\n"
-    msg += f"   🆔 ID: {user[0]}\n\n"
+    msg = f"<b>👤 {user.full_name}</b>\n\n"
+    msg += f"   🏪 {user.filial_name}\n"
+    msg += f"   🎭 {user.role_name}\n"
+    msg += f"   📱 +{user.phone}\n"
+    msg += f"   🆔 ID: {user.id}\n\n"
     msg += "Haqiqatdan ham bu ishchini ochirmoqchimisz?"
-    await message.answer(msg, reply_markup=is_check(user[0]))
+    await message.answer(msg, reply_markup=is_check(user.id))
     await state.set_state(DeleteWorkerStates.waiting_for_worker_check)
 
 
@@ -449,7 +663,7 @@ async def ask_del_worker_check(message:Message, state:FSMContext):
 async def del_wrker(call:CallbackQuery, state:FSMContext):
     await call.message.delete()
     user_id = int(call.data.split("_")[1])
-    db.delete_user(user_id)
+    await adb.delete_user(user_id)
     await call.answer("✅ Ishchi o'chirildi!")
     await call.message.answer("<b>🏠 ASOSIY MENYU</b>\n\nQuyidagilardan birini tanlang:", reply_markup=admin_workers_menu())
 
@@ -475,22 +689,22 @@ async def add_admin_1(call:CallbackQuery, state:FSMContext):
 
 @router.message(F.text.regexp(r'^998\d{9}$'), AddAdminStates.waiting_for_admin_phone)
 async def ask_add_admin_check(message:Message, state:FSMContext):
-    user = db.get_user_by_phone(int(message.text))
+    user = await adb.get_user_by_phone(int(message.text))
 
     if not user:
         await message.answer(f"<b>📞 +{message.text} - Bu raqam bilan hech qanday ishchi topilmadi.</b>\n\n<i>Iltimos tekshirib qaytadan yuboring!</i>")
         return
-    elif user[8]:
+    elif user.is_admin:
         await message.answer(f"<b>📞 +{message.text} - Bu raqam egasiga avvalroq admin huquqi berilgan.</b>\n\n<i>Orqaga qaytishingiz yoki boshqa raqam yuborishingiz mumkin!</i>", reply_markup=cancel_del_btn)
         return
     
-    msg = f"<b>👤 {user[2]}</b>\n\n"
-    msg += f"   🏪 {user[5]}\n"
-    msg += f"   🎭 {user[7]}\n"
-    msg += f"   📱 +{user[3]}\n"
-    msg += f"   🆔 ID: {user[0]}\n\n"
+    msg = f"<b>👤 {user.full_name}</b>\n\n"
+    msg += f"   🏪 {user.filial_name}\n"
+    msg += f"   🎭 {user.role_name}\n"
+    msg += f"   📱 +{user.phone}\n"
+    msg += f"   🆔 ID: {user.id}\n\n"
     msg += "Haqiqatdan ham bu ishchiga <b>admin</b> huquqinin bermoqchimisz?"
-    await message.answer(msg, reply_markup=is_check(user[3]))
+    await message.answer(msg, reply_markup=is_check(user.phone))
     await state.set_state(AddAdminStates.waiting_for_admin_check)
 
 
@@ -498,22 +712,22 @@ async def ask_add_admin_check(message:Message, state:FSMContext):
 async def add_admin_check(call:CallbackQuery, state:FSMContext, bot:Bot):
     await call.message.delete()
     phone=int(call.data.split("_")[1])
-    db.add_admin(phone)
+    await adb.add_admin(phone)
     await call.answer("✅ Yangi admin qo'shildi!")
-    user = db.get_user_by_phone(phone)
-    if user[1]:
-        await bot.send_message(user[1], f"<b>{user[2]}</b> - sizga admin huquqi berildi!\n\n<b>Istalgan paytda:</b>\n\n/admin_panel - <i>ni yuborish orqali admin panelga o'tishingiz mumkin.</i>\n\n/start - <i>buyrug'i bilan esa ishchi paneliga qaytishingiz mumkin.</i>")
+    user = await adb.get_user_by_phone(phone)
+    if user.telegram_id:
+        await sender.send(bot, SendMessage(chat_id=user.telegram_id, text=f"<b>{user.full_name}</b> - sizga admin huquqi berildi!\n\n<b>Istalgan paytda:</b>\n\n/admin_panel - <i>ni yuborish orqali admin panelga o'tishingiz mumkin.</i>\n\n/start - <i>buyrug'i bilan esa ishchi paneliga qaytishingiz mumkin.</i>"), Priority.HIGH)
     await call.message.answer("<b>🏠 ASOSIY MENYU</b>\n\nQuyidagilardan birini tanlang:", reply_markup=admin_main_menu())
 
 
 @router.callback_query(F.data=="admin_list_admins")
 async def get_admins_list(call:CallbackQuery, state:FSMContext):
     await call.answer()
-    admins = db.get_admins()
+    admins = await adb.get_admins()
     msg = "<b>📋 ADMINLAR RO'YXATI</b>\n\n"
 
     for admin in admins:
-        msg += f"<b>{admin[0]}</b> - +{admin[1]}\n"
+        msg += f"<b>{admin.full_name}</b> - +{admin.phone}\n"
 
     msg += "\n━━━━━━━━━━━━━━━━━━━━\n"
     msg += f"📊 JAMI: <b>{len(admins)}</b> ta admin"
@@ -537,16 +751,16 @@ async def ask_del_admin(call:CallbackQuery, state:FSMContext):
 
 @router.message(F.text.regexp(r'^998\d{9}$'), DeleteAdminStates.waiting_for_admin_phone)
 async def ask_del_admin_check(message:Message, state:FSMContext):
-    admin = db.get_admin_by_phone(int(message.text))
+    admin = await adb.get_admin_by_phone(int(message.text))
 
     if not admin:
         await message.answer(f"<b>📞 +{message.text} - Bu raqam bilan hech qanday admin topilmadi.</b>\n\n<i>Iltimos tekshirib qaytadan yuboring!</i>")
         return
     
-    msg = f"<b>👤 {admin[0]}</b>\n\n"
-    msg += f"   📱 +{admin[1]}\n\n"
+    msg = f"<b>👤 {admin.full_name}</b>\n\n"
+    msg += f"   📱 +{admin.phone}\n\n"
     msg += "Haqiqatdan ham bu adminni ochirmoqchimisz?"
-    await message.answer(msg, reply_markup=is_check(admin[1]))
+    await message.answer(msg, reply_markup=is_check(admin.phone))
     await state.set_state(DeleteAdminStates.waiting_for_admin_check)
 
 
@@ -554,7 +768,7 @@ async def ask_del_admin_check(message:Message, state:FSMContext):
 async def add_admin_check(call:CallbackQuery, state:FSMContext):
     await call.message.delete()
     user_id=int(call.data.split("_")[1])
-    db.del_admin(user_id)
+    await adb.del_admin(user_id)
     await call.answer("✅ Admin o'chirildi!")
     await call.message.answer("<b>🏠 ASOSIY MENYU</b>\n\nQuyidagilardan birini tanlang:", reply_markup=admin_main_menu())
 
@@ -580,10 +794,10 @@ async def process_task_filial(callback: CallbackQuery, state: FSMContext):
     filial_id = int(callback.data.split("_")[-1])
     await state.update_data(filial_id=filial_id)
     
-    filial = db.get_filial(filial_id)
+    filial = await adb.get_filial(filial_id)
     
     await callback.message.edit_text(
-        f"✅ Filial: {filial[1]}\n\n"
+        f"✅ Filial: {filial.name}\n\n"
         f"2️⃣ Qaysi rol uchun vazifa?\n\n"
         f"Rolni tanlang:",
         reply_markup=select_role_keyboard("task_role")
@@ -599,12 +813,12 @@ async def process_task_role(callback: CallbackQuery, state: FSMContext):
     await state.update_data(role_id=role_id)
     
     data = await state.get_data()
-    filial = db.get_filial(data['filial_id'])
-    role = db.get_role(role_id)
+    filial = await adb.get_filial(data['filial_id'])
+    role = await adb.get_role(role_id)
     
     await callback.message.edit_text(
-        f"✅ Filial: {filial[1]}\n"
-        f"✅ Rol: {role[1]}\n\n"
+        f"✅ Filial: {filial.name}\n"
+        f"✅ Rol: {role.name}\n\n"
         f"3️⃣ Vazifa qanchalik tez-tez bajariladi?\n\n"
         f"Vazifa turini tanlang:",
         reply_markup=select_task_type_keyboard()
@@ -620,14 +834,30 @@ async def process_task_type(callback: CallbackQuery, state: FSMContext):
     await state.update_data(task_type=task_type)
     
     data = await state.get_data()
-    filial = db.get_filial(data['filial_id'])
-    role = db.get_role(data['role_id'])
+    filial = await adb.get_filial(data['filial_id'])
+    role = await adb.get_role(data['role_id'])
+    
+    if task_type == "custom":
+        await callback.message.edit_text(
+            f"✅ Filial: {filial.name}\n"
+            f"✅ Rol: {role.name}\n\n"
+            f"4️⃣ Jadvalni kiriting:\n\n"
+            f"📝 <code>du,chor,ju</code> - hafta kunlari\n"
+            f"📝 <code>har 3 kun</code> - bugundan har 3 kunda\n"
+            f"📝 <code>oy 1,15</code> - oyning 1 va 15-kunlari\n"
+            f"📝 <code>oy oxiri</code> - oyning oxirgi kuni\n"
+            f"📝 <code>oy 2-du</code> - oyning 2-dushanbasi\n"
+            f"📝 <code>oy oxirgi-ju</code> - oyning oxirgi jumasi"
+        )
+        await state.set_state(AddTaskStates.waiting_for_rule)
+        await callback.answer()
+        return
     
     type_name = config.TASK_TYPES.get(task_type, task_type)
     
     await callback.message.edit_text(
-        f"✅ Filial: {filial[1]}\n"
-        f"✅ Rol: {role[1]}\n"
+        f"✅ Filial: {filial.name}\n"
+        f"✅ Rol: {role.name}\n"
         f"✅ Tur: {type_name}\n\n"
         f"4️⃣ Vazifa matnini kiriting:\n\n"
         f"📝 Misol: Nonni tayyorlash\n"
@@ -638,6 +868,28 @@ async def process_task_type(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 
+@router.message(AddTaskStates.waiting_for_rule)
+async def process_task_rule(message: Message, state: FSMContext):
+    """Maxsus jadvalni qabul qilish"""
+    try:
+        rule = parse_rule(message.text.strip())
+    except RuleError as e:
+        await message.answer(
+            f"❌ Jadval noto'g'ri: {e}\n\n"
+            f"Iltimos, qaytadan kiriting:"
+        )
+        return
+    
+    await state.update_data(recurrence=rule)
+    
+    await message.answer(
+        f"✅ Jadval: {describe(rule)}\n\n"
+        f"5️⃣ Vazifa matnini kiriting:\n\n"
+        f"💡 Qisqa va aniq yozing"
+    )
+    await state.set_state(AddTaskStates.waiting_for_text)
+
+
 @router.message(AddTaskStates.waiting_for_text)
 async def process_task_text(message: Message, state: FSMContext):
     """Vazifa matnini qabul qilish va saqlash"""
@@ -654,19 +906,20 @@ async def process_task_text(message: Message, state: FSMContext):
     filial_id = data['filial_id']
     role_id = data['role_id']
     task_type = data['task_type']
+    recurrence = data.get('recurrence')
     
     # Vazifani saqlash
     try:
-        task_id = db.create_task(task_text, task_type, role_id, filial_id)
+        task_id = await adb.create_task(task_text, task_type, role_id, filial_id, recurrence)
         
-        filial = db.get_filial(filial_id)
-        role = db.get_role(role_id)
-        type_name = config.TASK_TYPES.get(task_type, task_type)
+        filial = await adb.get_filial(filial_id)
+        role = await adb.get_role(role_id)
+        type_name = describe(recurrence) if recurrence else config.TASK_TYPES.get(task_type, task_type)
         
         await message.answer(
             f"✅ VAZIFA MUVAFFAQIYATLI QO'SHILDI!\n\n"
-            f"🏪 Filial: {filial[1]}\n"
-            f"🎭 Rol: {role[1]}\n"
+            f"🏪 Filial: {filial.name}\n"
+            f"🎭 Rol: {role.name}\n"
             f"📅 Tur: {type_name}\n"
             f"📝 Vazifa: {task_text}\n"
             f"🆔 ID: {task_id}\n\n"
@@ -688,92 +941,72 @@ async def process_task_text(message: Message, state: FSMContext):
 
 # ===== VAZIFALAR RO'YXATI =====
 
-@router.callback_query(F.data == "admin_list_tasks")
-async def list_tasks(callback: CallbackQuery):
-    """Barcha vazifalar ro'yxati"""
-    tasks = db.get_all_tasks()
+async def show_tasks_page(callback: CallbackQuery, filial_id=None, after_id=None,
+                          before_id=None, deleting=False):
+    """Vazifalar ro'yxatining bitta sahifasi (deleting - o'chirish uchun ID kutilmoqda)"""
+    page = await adb.get_tasks_page(filial_id, None, after_id, before_id)
+    if not page.items and (after_id or before_id):
+        # Sahifadagilar o'chirilgan - boshidan ko'rsatish
+        page = await adb.get_tasks_page(filial_id)
     
-    if not tasks:
+    if not page.items and not filial_id:
         await callback.message.edit_text(
             "📋 Hozircha vazifalar yo'q.\n\n"
-            "➕ Vazifa qo'shish uchun tugmani bosing:",
-            reply_markup=admin_tasks_list_menu()
+            + ("O'chirish uchun vazifa mavjud emas." if deleting
+               else "➕ Vazifa qo'shish uchun tugmani bosing:"),
+            reply_markup=admin_tasks_menu() if deleting else admin_tasks_list_menu()
         )
         await callback.answer()
-        return
-    
-    message = "📋 VAZIFALAR RO'YXATI\n\n"
-    
-    # Filial va rol bo'yicha guruhlash
-    current_filial = None
-    current_role = None
-    task_count = 0
-    
-    for task_id, text, task_type, role, filial in tasks:
-        if filial != current_filial:
-            if current_filial is not None:
-                message += "\n"
-            current_filial = filial
-            message += f"🏪 {filial}\n"
-            message += "━━━━━━━━━━━━━━━━━━━━\n"
-        
-        if role != current_role:
-            if current_role is not None:
-                message += "\n"
-            current_role = role
-            message += f"  🎭 {role}:\n"
-        
-        type_emoji = config.TASK_TYPES.get(task_type, task_type)
-        message += f"    {type_emoji} {text}\n"
-        message += f"       (ID: {task_id})\n"
-        task_count += 1
-    
-    message += "\n━━━━━━━━━━━━━━━━━━━━\n"
-    message += f"📊 JAMI: {task_count} ta vazifa"
-    
-    # Telegram xabar limiti
-    if len(message) > 4000:
-        await callback.message.answer(message[:4000])
-        await callback.message.answer(message[4000:], reply_markup=admin_tasks_menu())
+        return False
+    
+    if deleting:
+        message = "🗑 VAZIFA O'CHIRISH\n\n"
+        message += "O'chirmoqchi bo'lgan vazifaning ID raqamini kiriting:\n\n"
+        message += "📋 VAZIFALAR:\n"
+        for task in page.items:
+            message += f"ID:{task.id} - {escape(_short(task.text, 30))}\n"
+        message += "\n💡 Vazifa ID sini kiriting (masalan: 5)"
     else:
-        await callback.message.edit_text(message, reply_markup=admin_tasks_menu())
+        message = "📋 VAZIFALAR RO'YXATI\n\n"
+        for task in page.items:
+            type_emoji = config.TASK_TYPES.get(task.task_type, task.task_type)
+            message += f"{type_emoji} {escape(_short(task.text, 300))}\n"
+            message += f"   🏪 {task.filial_name} | 🎭 {task.role_name} | 🆔 {task.id}\n\n"
+    
+    if not page.items:
+        message += "\nBu filialda vazifalar yo'q."
     
+    await callback.message.edit_text(
+        message, reply_markup=tasks_page_keyboard(page, filial_id, deleting)
+    )
     await callback.answer()
+    return True
+
+
+@router.callback_query(F.data == "admin_list_tasks")
+async def list_tasks(callback: CallbackQuery):
+    """Vazifalar ro'yxati - birinchi sahifa"""
+    await show_tasks_page(callback)
+
+
+@router.callback_query(F.data.startswith("tasks_page_"))
+async def list_tasks_page(callback: CallbackQuery):
+    """Vazifalar ro'yxati - oldingi / keyingi sahifa yoki filial filtri"""
+    await show_tasks_page(callback, *_parse_page_callback(callback.data))
 
 # ===== VAZIFA O'CHIRISH =====
 
 @router.callback_query(F.data == "admin_delete_task")
 async def start_delete_task(callback: CallbackQuery, state: FSMContext):
     """Vazifa o'chirish boshlash"""
-    tasks = db.get_all_tasks()
-    
-    if not tasks:
-        await callback.message.edit_text(
-            "📋 Hozircha vazifalar yo'q.\n\n"
-            "O'chirish uchun vazifa mavjud emas.",
-            reply_markup=admin_tasks_menu()
-        )
-        await callback.answer()
-        return
-    
-    message = "🗑 VAZIFA O'CHIRISH\n\n"
-    message += "O'chirmoqchi bo'lgan vazifaning ID raqamini kiriting:\n\n"
-    
-    # Birinchi 10 ta vazifani ko'rsatish
-    message += "📋 VAZIFALAR:\n"
-    for i, (task_id, text, task_type, role, filial) in enumerate(tasks[:10], 1):
-        type_emoji = config.TASK_TYPES.get(task_type, task_type)
-        short_text = text[:30] + "..." if len(text) > 30 else text
-        message += f"{i}. ID:{task_id} - {short_text}\n"
-    
-    if len(tasks) > 10:
-        message += f"\n...va yana {len(tasks) - 10} ta vazifa\n"
-    
-    message += "\n💡 Vazifa ID sini kiriting (masalan: 5)"
-    
-    await callback.message.edit_text(message)
-    await state.set_state(DeleteTaskStates.waiting_for_task_id)
-    await callback.answer()
+    if await show_tasks_page(callback, deleting=True):
+        await state.set_state(DeleteTaskStates.waiting_for_task_id)
+
+
+@router.callback_query(F.data.startswith("deltasks_page_"))
+async def delete_task_page(callback: CallbackQuery):
+    """O'chirish ro'yxati - boshqa sahifa (ID kutish holati saqlanadi)"""
+    await show_tasks_page(callback, *_parse_page_callback(callback.data), deleting=True)
 
 @router.message(DeleteTaskStates.waiting_for_task_id)
 async def process_delete_task(message: Message, state: FSMContext):
@@ -790,7 +1023,7 @@ async def process_delete_task(message: Message, state: FSMContext):
     task_id = int(task_id_text)
     
     # Vazifa mavjudligini tekshirish
-    task = db.get_task(task_id)
+    task = await adb.get_task(task_id)
     
     if not task:
         await message.answer(
@@ -799,20 +1032,19 @@ async def process_delete_task(message: Message, state: FSMContext):
         )
         return
     
-    task_id, task_text, task_type, role_name, filial_name = task
-    type_name = config.TASK_TYPES.get(task_type, task_type)
+    type_name = config.TASK_TYPES.get(task.task_type, task.task_type)
     
     # Tasdiqlash so'rash
     await message.answer(
         f"⚠️ DIQQAT!\n\n"
         f"Quyidagi vazifani o'chirmoqchimisiz?\n\n"
-        f"🏪 Filial: {filial_name}\n"
-        f"🎭 Rol: {role_name}\n"
+        f"🏪 Filial: {task.filial_name}\n"
+        f"🎭 Rol: {task.role_name}\n"
         f"📅 Tur: {type_name}\n"
-        f"📝 Vazifa: {task_text}\n"
-        f"🆔 ID: {task_id}\n\n"
+        f"📝 Vazifa: {task.text}\n"
+        f"🆔 ID: {task.id}\n\n"
         f"❗️ Bu amalni bekor qilib bo'lmaydi!",
-        reply_markup=confirm_keyboard(f"delete_task_{task_id}")
+        reply_markup=confirm_keyboard(f"delete_task_{task.id}")
     )
     
     await state.clear()
@@ -824,20 +1056,18 @@ async def confirm_delete_task(callback: CallbackQuery):
     
     try:
         # Vazifa ma'lumotlarini olish
-        task = db.get_task(task_id)
+        task = await adb.get_task(task_id)
         
         if task:
-            task_id, task_text, task_type, role_name, filial_name = task
-            
             # O'chirish
-            db.delete_task(task_id)
+            await adb.delete_task(task.id)
             
             await callback.message.edit_text(
                 f"✅ VAZIFA O'CHIRILDI!\n\n"
-                f"🏪 Filial: {filial_name}\n"
-                f"🎭 Rol: {role_name}\n"
-                f"📝 Vazifa: {task_text}\n"
-                f"🆔 ID: {task_id}\n\n"
+                f"🏪 Filial: {task.filial_name}\n"
+                f"🎭 Rol: {task.role_name}\n"
+                f"📝 Vazifa: {task.text}\n"
+                f"🆔 ID: {task.id}\n\n"
                 f"✅ Vazifa tizimdan olib tashlandi."
             )
         else:
@@ -863,6 +1093,372 @@ async def cancel_delete_task(callback: CallbackQuery):
     )
     await callback.answer()
 
+# ===== OMMAVIY AMALLAR =====
+
+# Ro'yxat belgilari: "- ", "* ", "• ", "1. ", "2) "
+_BULLET = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s*")
+
+
+def _names(records, ids):
+    return ", ".join(record.name for record in records if record.id in ids)
+
+
+async def _toggle_selection(callback: CallbackQuery, state: FSMContext, key, records):
+    """Ko'p tanlov tugmasi: tanlanganlar ro'yxati ("done" bo'lsa) yoki None"""
+    data = await state.get_data()
+    selected = set(data.get(key, []))
+    choice = callback.data.split("_")[-1]
+    
+    if choice == "done":
+        if not selected:
+            await callback.answer("⚠️ Kamida bittasini tanlang!", show_alert=True)
+            return None
+        await callback.answer()
+        return sorted(selected)
+    
+    if choice == "all":
+        all_ids = {record.id for record in records}
+        selected = set() if selected == all_ids else all_ids
+    else:
+        selected ^= {int(choice)}
+    
+    await state.update_data(**{key: sorted(selected)})
+    prefix = callback.data.rsplit("_", 1)[0]
+    await callback.message.edit_reply_markup(
+        reply_markup=multi_select_keyboard(prefix, records, selected)
+    )
+    await callback.answer()
+    return None
+
+
+@router.callback_query(F.data == "admin_bulk_tasks")
+async def bulk_tasks_menu(callback: CallbackQuery, state: FSMContext):
+    """Ommaviy amallar menyusi"""
+    await state.clear()
+    await callback.message.edit_text(
+        "<b>📦 OMMAVIY AMALLAR</b>\n\n"
+        "Bir nechta filial, rol yoki vazifa ustida bitta amal.\n"
+        "Har bir amal bitta tranzaksiyada bajariladi.",
+        reply_markup=admin_bulk_tasks_menu()
+    )
+    await callback.answer()
+
+
+@router.callback_query(F.data == "admin_bulk_create")
+async def bulk_create_start(callback: CallbackQuery, state: FSMContext):
+    """Ommaviy qo'shish - filiallarni tanlash"""
+    filials = await adb.get_all_filials()
+    await state.set_state(BulkTaskStates.waiting_for_filials)
+    await state.update_data(filial_ids=[], role_ids=[])
+    await callback.message.edit_text(
+        "<b>➕ OMMAVIY QO'SHISH</b>\n\n"
+        "1️⃣ Filiallarni tanlang (bir nechtasini):",
+        reply_markup=multi_select_keyboard("bulkf", filials, set())
+    )
+    await callback.answer()
+
+
+@router.callback_query(BulkTaskStates.waiting_for_filials, F.data.startswith("bulkf_"))
+async def bulk_create_filials(callback: CallbackQuery, state: FSMContext):
+    """Filiallar tanlandi - rollarni tanlash"""
+    filials = await adb.get_all_filials()
+    filial_ids = await _toggle_selection(callback, state, "filial_ids", filials)
+    if filial_ids is None:
+        return
+    
+    roles = await adb.get_all_roles()
+    await state.set_state(BulkTaskStates.waiting_for_roles)
+    await callback.message.edit_text(
+        f"✅ Filiallar: {_names(filials, filial_ids)}\n\n"
+        f"2️⃣ Rollarni tanlang (bir nechtasini):",
+        reply_markup=multi_select_keyboard("bulkr", roles, set())
+    )
+
+
+@router.callback_query(BulkTaskStates.waiting_for_roles, F.data.startswith("bulkr_"))
+async def bulk_create_roles(callback: CallbackQuery, state: FSMContext):
+    """Rollar tanlandi - vazifa turini tanlash"""
+    roles = await adb.get_all_roles()
+    role_ids = await _toggle_selection(callback, state, "role_ids", roles)
+    if role_ids is None:
+        return
+    
+    data = await state.get_data()
+    filials = await adb.get_all_filials()
+    await state.set_state(BulkTaskStates.waiting_for_type)
+    await callback.message.edit_text(
+        f"✅ Filiallar: {_names(filials, data['filial_ids'])}\n"
+        f"✅ Rollar: {_names(roles, role_ids)}\n\n"
+        f"3️⃣ Vazifa turini tanlang:",
+        reply_markup=select_task_type_keyboard("bulktype")
+    )
+
+
+@router.callback_query(BulkTaskStates.waiting_for_type, F.data.startswith("bulktype_"))
+async def bulk_create_type(callback: CallbackQuery, state: FSMContext):
+    """Vazifa turi tanlandi - maxsus jadval yoki matnlar"""
+    task_type = callback.data.split("_")[-1]
+    await state.update_data(task_type=task_type)
+    
+    if task_type == "custom":
+        await callback.message.edit_text(
+            "4️⃣ Jadvalni kiriting:\n\n"
+            "📝 <code>du,chor,ju</code> - hafta kunlari\n"
+            "📝 <code>har 3 kun</code> - bugundan har 3 kunda\n"
+            "📝 <code>oy 1,15</code> - oyning 1 va 15-kunlari\n"
+            "📝 <code>oy oxiri</code> - oyning oxirgi kuni\n"
+            "📝 <code>oy 2-du</code> - oyning 2-dushanbasi"
+        )
+        await state.set_state(BulkTaskStates.waiting_for_rule)
+        await callback.answer()
+        return
+    
+    await callback.message.edit_text(
+        f"✅ Tur: {config.TASK_TYPES.get(task_type, task_type)}\n\n"
+        f"4️⃣ Vazifa matnlarini yuboring - har bir qatorda bitta vazifa:\n\n"
+        f"📝 Misol:\n"
+        f"Oshxonani tozalash\n"
+        f"Muzlatgich haroratini tekshirish\n"
+        f"Kassa hisobotini topshirish"
+    )
+    await state.set_state(BulkTaskStates.waiting_for_texts)
+    await callback.answer()
+
+
+@router.message(BulkTaskStates.waiting_for_rule)
+async def bulk_create_rule(message: Message, state: FSMContext):
+    """Maxsus jadvalni qabul qilish"""
+    try:
+        rule = parse_rule(message.text.strip())
+    except RuleError as e:
+        await message.answer(f"❌ Jadval noto'g'ri: {e}\n\nIltimos, qaytadan kiriting:")
+        return
+    
+    await state.update_data(recurrence=rule)
+    await message.answer(
+        f"✅ Jadval: {describe(rule)}\n\n"
+        f"5️⃣ Vazifa matnlarini yuboring - har bir qatorda bitta vazifa:"
+    )
+    await state.set_state(BulkTaskStates.waiting_for_texts)
+
+
+@router.message(BulkTaskStates.waiting_for_texts)
+async def bulk_create_texts(message: Message, state: FSMContext):
+    """Matnlar x filiallar x rollar - bitta tranzaksiyada yaratish"""
+    lines = [_BULLET.sub("", line).strip() for line in (message.text or "").splitlines()]
+    texts = [line for line in lines if len(line) >= 3]
+    short = [line for line in lines if line and len(line) < 3]
+    
+    if not texts:
+        await message.answer(
+            "❌ Vazifa matni topilmadi!\n\n"
+            "Har bir qatorda kamida 3 ta belgidan iborat vazifa yozing:"
+        )
+        return
+    
+    data = await state.get_data()
+    recurrence = data.get('recurrence')
+    task_type = data['task_type']
+    
+    try:
+        created, skipped = await adb.create_tasks(
+            texts, task_type, data['role_ids'], data['filial_ids'], recurrence
+        )
+    except Exception as e:
+        await message.answer(f"<b>❌ XATOLIK!</b>\n\nVazifalarni saqlashda muammo:\n{str(e)}")
+        await state.clear()
+        return
+    
+    type_name = describe(recurrence) if recurrence else config.TASK_TYPES.get(task_type, task_type)
+    summary = (
+        f"<b>✅ OMMAVIY QO'SHISH TUGADI</b>\n\n"
+        f"📝 Matnlar: {len(set(texts))} ta\n"
+        f"🏪 Filiallar: {len(data['filial_ids'])} ta\n"
+        f"🎭 Rollar: {len(data['role_ids'])} ta\n"
+        f"📅 Tur: {type_name}\n\n"
+        f"✅ Yaratildi: {created} ta\n"
+        f"⏭ Allaqachon bor: {skipped} ta"
+    )
+    if short:
+        summary += f"\n⚠️ Juda qisqa qatorlar o'tkazib yuborildi: {len(short)} ta"
+    
+    await message.answer(summary, reply_markup=admin_main_menu())
+    await state.clear()
+
+
+@router.callback_query(F.data == "admin_bulk_delete")
+async def bulk_delete_start(callback: CallbackQuery, state: FSMContext):
+    """Ommaviy o'chirish - ID lar"""
+    await state.set_state(BulkTaskStates.waiting_for_delete_ids)
+    await callback.message.edit_text(
+        "<b>🗑 OMMAVIY O'CHIRISH</b>\n\n"
+        "O'chiriladigan vazifalar ID larini yuboring:\n\n"
+        "📝 Misol: <code>5, 7, 12-20</code>\n\n"
+        "💡 ID larni \"📋 Vazifalar ro'yxati\" yoki qidiruvdan oling",
+        reply_markup=cancel_btn
+    )
+    await callback.answer()
+
+
+@router.message(BulkTaskStates.waiting_for_delete_ids)
+async def bulk_delete_ids(message: Message, state: FSMContext):
+    """ID larni qabul qilish va tasdiqlash so'rash"""
+    try:
+        task_ids = parse_id_list(message.text or "")
+    except ValueError as e:
+        await message.answer(f"❌ ID lar noto'g'ri: {e}\n\n📝 Misol: 5, 7, 12-20")
+        return
+    
+    await state.update_data(task_ids=task_ids)
+    await state.set_state(BulkTaskStates.waiting_for_delete_confirm)
+    await message.answer(
+        f"⚠️ DIQQAT!\n\n"
+        f"{len(task_ids)} ta ID bo'yicha faol vazifalar o'chiriladi.\n\n"
+        f"❗️ Bu amalni bekor qilib bo'lmaydi!",
+        reply_markup=confirm_keyboard("bulk_delete")
+    )
+
+
+@router.callback_query(BulkTaskStates.waiting_for_delete_confirm, F.data.startswith("bulk_delete_"))
+async def bulk_delete_confirm(callback: CallbackQuery, state: FSMContext):
+    """Tasdiqlangan - bitta so'rovda o'chirish"""
+    data = await state.get_data()
+    await state.clear()
+    
+    if callback.data.endswith("_no"):
+        await callback.message.edit_text("❌ Bekor qilindi.", reply_markup=admin_tasks_menu())
+        await callback.answer()
+        return
+    
+    task_ids = data['task_ids']
+    count = await adb.deactivate_tasks(task_ids)
+    await callback.message.edit_text(
+        f"<b>✅ OMMAVIY O'CHIRISH TUGADI</b>\n\n"
+        f"🆔 Yuborilgan ID lar: {len(task_ids)} ta\n"
+        f"🗑 O'chirildi: {count} ta\n"
+        f"⏭ Topilmadi yoki faol emas: {len(task_ids) - count} ta",
+        reply_markup=admin_tasks_menu()
+    )
+    await callback.answer("✅ O'chirildi!")
+
+
+@router.callback_query(F.data == "admin_bulk_reassign")
+async def bulk_reassign_start(callback: CallbackQuery, state: FSMContext):
+    """Qayta biriktirish - ID lar"""
+    await state.set_state(BulkTaskStates.waiting_for_reassign_ids)
+    await callback.message.edit_text(
+        "<b>🔀 QAYTA BIRIKTIRISH</b>\n\n"
+        "Boshqa filial / rolga o'tkaziladigan vazifalar ID larini yuboring:\n\n"
+        "📝 Misol: <code>5, 7, 12-20</code>",
+        reply_markup=cancel_btn
+    )
+    await callback.answer()
+
+
+@router.message(BulkTaskStates.waiting_for_reassign_ids)
+async def bulk_reassign_ids(message: Message, state: FSMContext):
+    """ID lar qabul qilindi - yangi filialni tanlash"""
+    try:
+        task_ids = parse_id_list(message.text or "")
+    except ValueError as e:
+        await message.answer(f"❌ ID lar noto'g'ri: {e}\n\n📝 Misol: 5, 7, 12-20")
+        return
+    
+    filials = await adb.get_all_filials()
+    await state.update_data(task_ids=task_ids)
+    await state.set_state(BulkTaskStates.waiting_for_reassign_filial)
+    await message.answer(
+        f"✅ {len(task_ids)} ta ID\n\n"
+        f"1️⃣ Yangi filialni tanlang:",
+        reply_markup=keep_or_select_keyboard("bulkrf", filials, "➖ Filial o'zgarmasin")
+    )
+
+
+@router.callback_query(BulkTaskStates.waiting_for_reassign_filial, F.data.startswith("bulkrf_"))
+async def bulk_reassign_filial(callback: CallbackQuery, state: FSMContext):
+    """Filial tanlandi - yangi rolni tanlash"""
+    choice = callback.data.split("_")[-1]
+    await state.update_data(filial_id=None if choice == "keep" else int(choice))
+    
+    roles = await adb.get_all_roles()
+    await state.set_state(BulkTaskStates.waiting_for_reassign_role)
+    await callback.message.edit_text(
+        "2️⃣ Yangi rolni tanlang:",
+        reply_markup=keep_or_select_keyboard("bulkrr", roles, "➖ Rol o'zgarmasin")
+    )
+    await callback.answer()
+
+
+@router.callback_query(BulkTaskStates.waiting_for_reassign_role, F.data.startswith("bulkrr_"))
+async def bulk_reassign_role(callback: CallbackQuery, state: FSMContext):
+    """Rol tanlandi - bitta so'rovda o'tkazish"""
+    choice = callback.data.split("_")[-1]
+    role_id = None if choice == "keep" else int(choice)
+    data = await state.get_data()
+    await state.clear()
+    
+    filial_id = data['filial_id']
+    task_ids = data['task_ids']
+    
+    if filial_id is None and role_id is None:
+        await callback.message.edit_text(
+            "ℹ️ Filial ham, rol ham tanlanmadi - hech narsa o'zgarmadi.",
+            reply_markup=admin_tasks_menu()
+        )
+        await callback.answer()
+        return
+    
+    count = await adb.reassign_tasks(task_ids, filial_id, role_id)
+    filial = await adb.get_filial(filial_id) if filial_id else None
+    role = await adb.get_role(role_id) if role_id else None
+    unchanged = "o'zgarmadi"
+    
+    await callback.message.edit_text(
+        f"<b>✅ QAYTA BIRIKTIRISH TUGADI</b>\n\n"
+        f"🏪 Filial: {filial.name if filial else unchanged}\n"
+        f"🎭 Rol: {role.name if role else unchanged}\n\n"
+        f"🔀 O'tkazildi: {count} ta\n"
+        f"⏭ Topilmadi yoki faol emas: {len(task_ids) - count} ta",
+        reply_markup=admin_tasks_menu()
+    )
+    await callback.answer("✅ Bajarildi!")
+
+# ===== INLINE QIDIRUV =====
+
+@router.inline_query()
+async def inline_search(inline_query: InlineQuery):
+    """@bot <ism / telefon / vazifa matni> - ishchi va vazifalarni qidirish.
+    
+    Tanlangan ishchi telefon raqamini, vazifa esa ID sini yuboradi -
+    ishchi/admin o'chirish, admin qo'shish va vazifa o'chirish
+    bosqichlari shu xabarni to'g'ridan-to'g'ri qabul qiladi.
+    """
+    text = inline_query.query.strip()
+    results = []
+    
+    if text:
+        workers = await adb.search_users(text)
+        tasks = await adb.search_tasks(text)
+        
+        for worker in workers:
+            results.append(InlineQueryResultArticle(
+                id=f"worker_{worker.id}",
+                title=f"👤 {worker.full_name}",
+                description=f"🏪 {worker.filial_name or '-'} | 🎭 {worker.role_name or '-'} | {format_phone(worker.phone)}",
+                input_message_content=InputTextMessageContent(message_text=str(worker.phone))
+            ))
+        
+        for task in tasks:
+            type_name = config.TASK_TYPES.get(task.task_type, task.task_type)
+            results.append(InlineQueryResultArticle(
+                id=f"task_{task.id}",
+                title=f"📝 {_short(task.text, 60)}",
+                description=f"{type_name} | 🏪 {task.filial_name} | 🎭 {task.role_name} | 🆔 {task.id}",
+                input_message_content=InputTextMessageContent(message_text=str(task.id))
+            ))
+    
+    await inline_query.answer(results, cache_time=5, is_personal=True)
+
 # ===== BEKOR QILISH VA ORQAGA =====
 
 @router.callback_query(F.data == "admin_cancel")
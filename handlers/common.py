@@ -8,38 +8,35 @@ from aiogram.filters import CommandStart
 from aiogram.types import Message, CallbackQuery
 from aiogram.fsm.context import FSMContext
 
-from database import db
+from database import adb
+from models import User
 import config
 from keyboards import admin_main_menu, user_main_menu, phone_ask
 
 router = Router()
 
 @router.message(CommandStart())
-async def cmd_start(message: Message, state: FSMContext):
+async def cmd_start(message: Message, state: FSMContext, user: User | None):
     """Start komandasi - login"""
     await state.clear()
     
-    telegram_id = message.from_user.id
-    
-    # Avval telegram_id orqali tekshirish
-    user = db.get_user_by_telegram_id(telegram_id)
-    
+    # user - telegram_id orqali identity_middleware da aniqlangan
     if user:
         # User allaqachon tizimda
-        # is_admin = user[8]
-        is_admin = config.ADMIN == user[1]
+        # is_admin = user.is_admin
+        is_admin = config.ADMIN == user.telegram_id
         
         if is_admin:
             await message.answer(
-                f"Assalomu alaykum, {user[2]}!\n\n"
+                f"Assalomu alaykum, {user.full_name}!\n\n"
                 "🔑 Admin paneliga xush kelibsiz.",
                 reply_markup=admin_main_menu()
             )
         else:
             await message.answer(
-                f"Assalomu alaykum, {user[2]}!\n\n"
-                f"🏪 Filial: {user[5]}\n"
-                f"🎭 Rol: {user[7]}\n\n"
+                f"Assalomu alaykum, {user.full_name}!\n\n"
+                f"🏪 Filial: {user.filial_name}\n"
+                f"🎭 Rol: {user.role_name}\n\n"
                 """Vazifalaringizni ko'rish uchun menyudan <b>"📋 Vazifalar ro'yxati"</b> ni tanlang.""",
                 reply_markup=user_main_menu()
             )
@@ -60,27 +57,27 @@ async def process_phone_login(message: Message):
     telegram_id = message.from_user.id
     
     # Telefon orqali userni topish
-    user = db.get_user_by_phone(phone)
+    user = await adb.get_user_by_phone(phone)
     
     if user:
         # User mavjud - telegram_id ni yangilash
-        db.update_user_telegram_id(phone, telegram_id)
+        await adb.update_user_telegram_id(phone, telegram_id)
         
-        is_admin = user[8]
+        is_admin = user.is_admin
         
         if is_admin:
             await message.answer(
                 f"✅ Muvaffaqiyatli kirdingiz!\n\n"
-                f"👤 {user[2]}\n"
+                f"👤 {user.full_name}\n"
                 f"🔑 Admin",
                 reply_markup=admin_main_menu()
             )
         else:
             await message.answer(
                 f"✅ Muvaffaqiyatli kirdingiz!\n\n"
-                f"👤 {user[2]}\n"
-                f"🏪 Filial: {user[5]}\n"
-                f"🎭 Rol: {user[7]}",
+                f"👤 {user.full_name}\n"
+                f"🏪 Filial: {user.filial_name}\n"
+                f"🎭 Rol: {user.role_name}",
                 reply_markup=user_main_menu()
             )
     else:
@@ -91,19 +88,15 @@ async def process_phone_login(message: Message):
 
 
 @router.message(F.text=="/admin_panel")
-async def process_phone_login(message: Message):
-    telegram_id = message.from_user.id
-    
-    # Telegram orqali userni topish
-    user = db.get_user_by_telegram_id(telegram_id)
-    
+async def process_phone_login(message: Message, user: User | None):
+    # user - telegram_id orqali identity_middleware da aniqlangan
     if user:
-        is_admin = user[8]
+        is_admin = user.is_admin
         
         if is_admin:
             await message.answer(
                 f"✅ Muvaffaqiyatli kirdingiz!\n\n"
-                f"👤 {user[2]}\n"
+                f"👤 {user.full_name}\n"
                 f"🔑 Admin",
                 reply_markup=admin_main_menu()
             )
@@ -123,27 +116,27 @@ async def get_contact(message:Message):
     telegram_id = message.from_user.id
     
     # Telefon orqali userni topish
-    user = db.get_user_by_phone(phone)
+    user = await adb.get_user_by_phone(phone)
     
     if user:
         # User mavjud - telegram_id ni yangilash
-        db.update_user_telegram_id(phone, telegram_id)
+        await adb.update_user_telegram_id(phone, telegram_id)
         
-        is_admin = user[8]
+        is_admin = user.is_admin
         
         if is_admin:
             await message.answer(
                 f"✅ Muvaffaqiyatli kirdingiz!\n\n"
-                f"👤 {user[2]}\n"
+                f"👤 {user.full_name}\n"
                 f"🔑 Admin",
                 reply_markup=admin_main_menu()
             )
         else:
             await message.answer(
                 f"✅ Muvaffaqiyatli kirdingiz!\n\n"
-                f"👤 {user[2]}\n"
-                f"🏪 Filial: {user[5]}\n"
-                f"🎭 Rol: {user[7]}",
+                f"👤 {user.full_name}\n"
+                f"🏪 Filial: {user.filial_name}\n"
+                f"🎭 Rol: {user.role_name}",
                 reply_markup=user_main_menu()
             )
     else:
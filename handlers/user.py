@@ -4,15 +4,22 @@ User panel handlerlari
 """
 
 from aiogram import Router, F, Bot
-from aiogram.types import Message, CallbackQuery
+from aiogram.types import (
+    Message, CallbackQuery,
+    InputMediaAudio, InputMediaDocument, InputMediaPhoto, InputMediaVideo
+)
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
+from aiogram.methods import CopyMessage, SendMediaGroup, SendMessage
 from datetime import date
 
-from database import db
+from database import adb
+from middlewares import album_middleware
+from models import User
 import config
+from outbox import outbox, outbox_entry
 from keyboards import user_main_menu, user_tasks_keyboard, task_action_keyboard, back_to_tasks_keyboard
-from utils import format_user_tasks_message, format_task_completion_caption
+from utils import format_user_tasks_message, format_task_completion_caption, format_user_statistics
 
 router = Router()
 
@@ -20,6 +27,27 @@ router = Router()
 class TaskCompletionStates(StatesGroup):
     waiting_for_media = State()
 
+# Dalil bo'la oladigan fayl turlari (bir nechtasi bo'lsa - birinchisi)
+EVIDENCE_TYPES = ("video", "photo", "voice", "audio", "document")
+
+# Albomda kelishi mumkin bo'lgan turlar
+ALBUM_MEDIA = {
+    "photo": InputMediaPhoto,
+    "video": InputMediaVideo,
+    "audio": InputMediaAudio,
+    "document": InputMediaDocument,
+}
+
+def evidence_item(message: Message):
+    """Xabardagi fayl: (media_type, file_id, file_unique_id, media_group_id) yoki None"""
+    for media_type in EVIDENCE_TYPES:
+        media = getattr(message, media_type)
+        if media:
+            if media_type == "photo":
+                media = media[-1]  # eng katta o'lcham
+            return media_type, media.file_id, media.file_unique_id, message.media_group_id
+    return None
+
 # Global bot obyekti (bot.py dan uzatiladi)
 # bot_instance = None
 
@@ -33,30 +61,30 @@ class TaskCompletionStates(StatesGroup):
 @router.callback_query.middleware()
 async def user_only_middleware(handler, event, data):
     """Faqat ro'yxatdan o'tgan userlar uchun"""
-    user_id = event.from_user.id
-    user = db.get_user_by_telegram_id(user_id)
+    user = data.get("user")  # identity_middleware aniqlagan
     
-    if user and not user[8]:  # is_admin emas
+    if user and not user.is_admin:
         return await handler(event, data)
     else:
         if isinstance(event, Message):
             await event.answer("⛔️ Siz tizimda ro'yxatdan o'tmagansiz!")
         return
 
+# Albom bo'laklari bitta handler chaqiruviga yig'iladi
+router.message.middleware(album_middleware)
+
 # ===== VAZIFALAR RO'YXATI =====
 
 @router.message(F.text == "📋 Vazifalar ro'yxati")
-async def show_tasks(message: Message):
+async def show_tasks(message: Message, user: User):
     """Bugungi vazifalarni ko'rsatish"""
-    user_id = message.from_user.id
-    user = db.get_user_by_telegram_id(user_id)
-    
+
     if not user:
         await message.answer("<b>❌ Xatolik yuz berdi.</b> /start ni bosib qaytadan kiriting.")
         return
     
     today = date.today()
-    tasks = db.get_user_tasks(user[0], today)
+    tasks = await adb.get_user_tasks(user.id, today)
     
     if not tasks:
         await message.answer(
@@ -74,13 +102,11 @@ async def show_tasks(message: Message):
     )
 
 @router.callback_query(F.data == "refresh_tasks")
-async def refresh_tasks(callback: CallbackQuery):
+async def refresh_tasks(callback: CallbackQuery, user: User):
     """Vazifalarni yangilash"""
-    user_id = callback.from_user.id
-    user = db.get_user_by_telegram_id(user_id)
-    
+
     today = date.today()
-    tasks = db.get_user_tasks(user[0], today)
+    tasks = await adb.get_user_tasks(user.id, today)
     
     if not tasks:
         await callback.message.edit_text(
@@ -102,37 +128,33 @@ async def refresh_tasks(callback: CallbackQuery):
 # ===== VAZIFA TANLASH =====
 
 @router.callback_query(F.data.startswith("task_"))
-async def select_task(callback: CallbackQuery):
+async def select_task(callback: CallbackQuery, user: User):
     """Vazifani tanlash"""
     task_id = int(callback.data.split("_")[1])
-    user_id = callback.from_user.id
-    user = db.get_user_by_telegram_id(user_id)
     
     # Vazifa ma'lumotlarini olish
-    task = db.get_task(task_id)
+    task = await adb.get_task(task_id)
     if not task:
         await callback.answer("<b>❌ Vazifa topilmadi!</b>", show_alert=True)
         return
     
     # Bajarilganligini tekshirish
     today = date.today()
-    tasks = db.get_user_tasks(user[0], today)
+    tasks = await adb.get_user_tasks(user.id, today)
     completed = False
     
-    for t_id, t_text, t_type, t_completed in tasks:
-        if t_id == task_id:
-            completed = t_completed
+    for user_task in tasks:
+        if user_task.id == task_id:
+            completed = user_task.completed
             break
     
-    task_id, task_text, task_type, role_name, filial_name = task
-    
     status = "✅ Bajarilgan" if completed else "❗ Bajarilmagan"
     
     await callback.message.edit_text(
         f"<b>📝 VAZIFA MA'LUMOTLARI</b>\n\n"
-        f"🎭 Rol: {role_name}\n"
-        f"🏪 Filial: {filial_name}\n"
-        f"📋 Vazifa: {task_text}\n\n"
+        f"🎭 Rol: {task.role_name}\n"
+        f"🏪 Filial: {task.filial_name}\n"
+        f"📋 Vazifa: {task.text}\n\n"
         f"📊 Holat: {status}\n\n"
         f"{'✅ Bu vazifa allaqachon bajarilgan.' if completed else '📎 Bajarilgan ishni tasdiqlovchi fayl yuboring.'}",
         reply_markup=task_action_keyboard(task_id, completed)
@@ -145,13 +167,11 @@ async def already_completed(callback: CallbackQuery):
     await callback.answer("✅ Bu vazifa allaqachon bajarilgan!", show_alert=True)
 
 @router.callback_query(F.data == "back_to_tasks")
-async def back_to_tasks(callback: CallbackQuery):
+async def back_to_tasks(callback: CallbackQuery, user: User):
     """Vazifalar ro'yxatiga qaytish"""
-    user_id = callback.from_user.id
-    user = db.get_user_by_telegram_id(user_id)
-    
+
     today = date.today()
-    tasks = db.get_user_tasks(user[0], today)
+    tasks = await adb.get_user_tasks(user.id, today)
     
     tasks_message = format_user_tasks_message(user, tasks, today)
     
@@ -185,8 +205,8 @@ async def start_task_completion(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 @router.message(TaskCompletionStates.waiting_for_media)
-async def process_task_completion(message: Message, state: FSMContext, bot:Bot):
-    """Yuborilgan faylni qabul qilish va guruhga yuborish"""
+async def process_task_completion(message: Message, state: FSMContext, bot:Bot, user: User, album=None):
+    """Yuborilgan fayl(lar)ni qabul qilish va guruh xabarini navbatga qo'yish"""
     
     # if not bot_instance:
     #     await message.answer("❌ Bot xatolik yuz berdi. /start ni bosib qaytadan urinib ko'ring.")
@@ -196,26 +216,21 @@ async def process_task_completion(message: Message, state: FSMContext, bot:Bot):
     data = await state.get_data()
     task_id = data['task_id']
     
-    user_id = message.from_user.id
-    user = db.get_user_by_telegram_id(user_id)
-    
     if not user:
         await message.answer("❌ Xatolik yuz berdi.")
         await state.clear()
         return
     
     # Vazifa ma'lumotlarini olish
-    task = db.get_task(task_id)
+    task = await adb.get_task(task_id)
     if not task:
         await message.answer("❌ Vazifa topilmadi!")
         await state.clear()
         return
     
-    task_id, task_text, task_type, role_name, filial_name = task
-    
     # Guruh chat_id ni olish
-    # group_chat_id = db.get_group_chat_id(user[4])  # filial_id
-    group_chat_id = config.GROUP_LINKS[int(user[4])]  # filial_id
+    # group_chat_id = await adb.get_group_chat_id(user.filial_id)  # filial_id
+    group_chat_id = config.GROUP_LINKS[int(user.filial_id)]  # filial_id
     
     if not group_chat_id:
         await message.answer("❌ Guruh topilmadi!")
@@ -223,108 +238,96 @@ async def process_task_completion(message: Message, state: FSMContext, bot:Bot):
         return
     
     # Caption tayyorlash
-    caption = format_task_completion_caption(user, task_text)
+    caption = format_task_completion_caption(user, task.text)
     
-    # Media turini aniqlash va guruhga yuborish
-    media_type = None
-    media_file_id = None
+    # Dalillar: albom bo'lsa barcha fayllar, aks holda bitta xabar
+    items = [(item, evidence_item(item)) for item in album or [message]]
+    items = [(item, evidence) for item, evidence in items if evidence]
+    evidence = [evidence for _, evidence in items]
     text_message = None
     
-    try:
-        if message.video:
-            media_type = "video"
-            media_file_id = message.video.file_id
-            await bot.send_video(
-                chat_id=group_chat_id,
-                video=message.video.file_id,
-                caption=caption
-            )
-        elif message.photo:
-            media_type = "photo"
-            media_file_id = message.photo[-1].file_id
-            await bot.send_photo(
-                chat_id=group_chat_id,
-                photo=message.photo[-1].file_id,
-                caption=caption
-            )
-        elif message.voice:
-            media_type = "voice"
-            media_file_id = message.voice.file_id
-            await bot.send_voice(
-                chat_id=group_chat_id,
-                voice=message.voice.file_id,
-                caption=caption
-            )
-        elif message.audio:
-            media_type = "audio"
-            media_file_id = message.audio.file_id
-            await bot.send_audio(
-                chat_id=group_chat_id,
-                audio=message.audio.file_id,
-                caption=caption
-            )
-        elif message.document:
-            media_type = "document"
-            media_file_id = message.document.file_id
-            await bot.send_document(
-                chat_id=group_chat_id,
-                document=message.document.file_id,
-                caption=caption
-            )
-        elif message.text:
-            media_type = "text"
-            text_message = message.text
-            await bot.send_message(
-                chat_id=group_chat_id,
-                text=f"{caption}\n\n💬 Xabar: {message.text}"
-            )
-        else:
-            await message.answer(
-                "❌ Noto'g'ri fayl turi!\n\n"
-                "Iltimos, video, rasm, audio, hujjat yoki matn yuboring."
-            )
-            return
-        
-        # Vazifani bajarildi deb belgilash
-        db.complete_task(task_id, user[0], media_type, media_file_id, text_message)
-        
-        # Userga tasdiqlash
+    if len(items) > 1:
+        # Albom - guruhga bitta send_media_group bilan
+        media_type, media_file_id = evidence[0][:2]
+        method = SendMediaGroup(
+            chat_id=group_chat_id,
+            media=[
+                ALBUM_MEDIA[item_type](media=file_id, caption=caption if position == 0 else None)
+                for position, (item_type, file_id, *_) in enumerate(evidence)
+            ]
+        )
+    elif items:
+        # Bitta fayl - turidan qat'i nazar copy_message
+        media_type, media_file_id = evidence[0][:2]
+        method = CopyMessage(
+            chat_id=group_chat_id,
+            from_chat_id=items[0][0].chat.id,
+            message_id=items[0][0].message_id,
+            caption=caption
+        )
+    elif message.text:
+        media_type = "text"
+        media_file_id = None
+        text_message = message.text
+        method = SendMessage(
+            chat_id=group_chat_id,
+            text=f"{caption}\n\n💬 Xabar: {message.text}"
+        )
+    else:
         await message.answer(
-            "<b>✅ QABUL QILINDI!</b>\n\n"
-            "Vazifa bajarildi deb belgilandi.\n"
-            "Guruhga yuborildi: ✔️",
-            reply_markup=back_to_tasks_keyboard()
+            "❌ Noto'g'ri fayl turi!\n\n"
+            "Iltimos, video, rasm, audio, hujjat yoki matn yuboring."
+        )
+        return
+    
+    try:
+        # Bajarilish va guruh xabari - bitta tranzaksiyada, xabarni outbox yetkazadi
+        await adb.complete_task(
+            task_id, user.id, media_type, media_file_id, text_message,
+            outbox=outbox_entry(method), evidence=evidence
         )
-        
-        await state.clear()
-        
     except Exception as e:
         await message.answer(
-            f"<b>❌ Guruhga yuborishda xatolik:</b>\n<i>{str(e)}</i>\n\n"
-            f"Botni guruhga qo'shganingizga ishonch hosil qiling!"
+            f"<b>❌ Saqlashda xatolik:</b>\n<i>{str(e)}</i>\n\n"
+            f"Iltimos, qaytadan yuboring."
         )
-        await state.clear()
+        return
+    
+    outbox.wake()
+    
+    # Userga tasdiqlash
+    await message.answer(
+        "<b>✅ QABUL QILINDI!</b>\n\n"
+        "Vazifa bajarildi deb belgilandi.\n"
+        "Guruhga yuborilmoqda: ⏳",
+        reply_markup=back_to_tasks_keyboard()
+    )
+    
+    await state.clear()
 
 # ===== STATISTIKA =====
 
 @router.message(F.text == "📊 Mening statistikam")
-async def my_statistics(message: Message):
+async def my_statistics(message: Message, user: User):
     """User statistikasi"""
+    today = date.today()
+    
+    # Bugungi natija jonli, o'tgan kunlar esa rollup dan
+    tasks = await adb.get_user_tasks(user.id, today)
+    stats = await adb.get_user_statistics(user.id, today)
+    
+    today_completed = sum(1 for task in tasks if task.completed)
+    
     await message.answer(
-        "<b>📊 MENING STATISTIKAM</b>\n\n"
-        "Bu bo'lim ishlab chiqilmoqda...\n\n"
-        "Hozircha admin sizning ishlayotganingizni\n"
-        "har kuni guruhdan ko'rib turadi."
+        format_user_statistics(user, stats, today_completed, len(tasks), today)
     )
 
 # ===== MA'LUMOT =====
 
 @router.message(F.text == "ℹ️ Ma'lumot")
-async def user_info(message: Message):
+async def user_info(message: Message, user: User):
     """User haqida ma'lumot"""
-    user_id = message.from_user.id
-    user = db.get_user_by_telegram_id(user_id)
-    
+
     if not user:
         await message.answer("❌ Xatolik yuz berdi.")
         return
@@ -333,10 +336,10 @@ async def user_info(message: Message):
     
     await message.answer(
         f"<b>ℹ️ MENING MA'LUMOTLARIM</b>\n\n"
-        f"👤 Ism: {user[2]}\n"
-        f"📱 Telefon: {format_phone(user[3])}\n"
-        f"🏪 Filial: {user[5]}\n"
-        f"🎭 Rol: {user[7]}\n\n"
+        f"👤 Ism: {user.full_name}\n"
+        f"📱 Telefon: {format_phone(user.phone)}\n"
+        f"🏪 Filial: {user.filial_name}\n"
+        f"🎭 Rol: {user.role_name}\n\n"
         f"📋 Vazifalaringizni ko'rish uchun\n"
         f"'Vazifalar ro'yxati' tugmasini bosing."
     )
@@ -49,28 +49,14 @@ def admin_workers_menu():
             ],
             [
                 InlineKeyboardButton(
-                    text="🔙 Orqaga",
-                    callback_data="admin_back_main"
-                )
-            ]
-        ]
-    )
-
-
-def admin_workers_list_menu():
-    """Admin — ishchilar bo‘limi menyusi"""
-    return InlineKeyboardMarkup(
-        inline_keyboard=[
-            [
-                InlineKeyboardButton(
-                    text="➖ Ishchi o'chirish",
-                    callback_data="admin_delete_worker"
+                    text="📥 Fayldan import",
+                    callback_data="admin_import_workers"
                 )
             ],
             [
                 InlineKeyboardButton(
                     text="🔙 Orqaga",
-                    callback_data="admin_back_list_main"
+                    callback_data="admin_back_main"
                 )
             ]
         ]
@@ -97,6 +83,12 @@ def admin_tasks_menu():
                     callback_data="admin_delete_task"
                 )
             ],
+            [
+                InlineKeyboardButton(
+                    text="📦 Ommaviy amallar",
+                    callback_data="admin_bulk_tasks"
+                )
+            ],
             [
                 InlineKeyboardButton(
                     text="🔙 Orqaga",
@@ -131,7 +123,81 @@ def admin_tasks_list_menu():
     )
 
 
-def select_filial_keyboard(callback_prefix="filial"):
+def _page_nav_row(prefix, filial_id, page):
+    """Oldingi / keyingi sahifa tugmalari: {prefix}_{filial}_{p|n}_{id}"""
+    row = []
+    if page.has_prev:
+        row.append(InlineKeyboardButton(
+            text="⬅️ Oldingi",
+            callback_data=f"{prefix}_{filial_id or 0}_p_{page.first_id}"
+        ))
+    if page.has_next:
+        row.append(InlineKeyboardButton(
+            text="Keyingi ➡️",
+            callback_data=f"{prefix}_{filial_id or 0}_n_{page.last_id}"
+        ))
+    return row
+
+
+def _filial_filter_row(prefix, filial_id):
+    """Filial bo'yicha filtr - tanlangani ✅ bilan, bosilsa birinchi sahifa"""
+    from database import db
+    filials = db.get_all_filials()
+
+    options = [(0, "🌐 Barchasi")] + [(filial.id, filial.name) for filial in filials]
+    return [
+        InlineKeyboardButton(
+            text=f"✅ {name}" if (filial_id or 0) == option_id else name,
+            callback_data=f"{prefix}_{option_id}_n_0"
+        )
+        for option_id, name in options
+    ]
+
+
+def workers_page_keyboard(page, filial_id=None):
+    """Ishchilar ro'yxati sahifasi"""
+    buttons = []
+    nav_row = _page_nav_row("workers_page", filial_id, page)
+    if nav_row:
+        buttons.append(nav_row)
+    buttons.append(_filial_filter_row("workers_page", filial_id))
+    buttons.append([
+        InlineKeyboardButton(text="➖ Ishchi o'chirish", callback_data="admin_delete_worker")
+    ])
+    buttons.append([
+        InlineKeyboardButton(text="🔙 Orqaga", callback_data="admin_back_list_main")
+    ])
+    return InlineKeyboardMarkup(inline_keyboard=buttons)
+
+
+def tasks_page_keyboard(page, filial_id=None, deleting=False):
+    """Vazifalar ro'yxati sahifasi (deleting - o'chirish uchun ID kutilmoqda)"""
+    prefix = "deltasks_page" if deleting else "tasks_page"
+    buttons = []
+    nav_row = _page_nav_row(prefix, filial_id, page)
+    if nav_row:
+        buttons.append(nav_row)
+    buttons.append(_filial_filter_row(prefix, filial_id))
+
+    if deleting:
+        buttons.append([
+            InlineKeyboardButton(text="🔎 Qidirish", switch_inline_query_current_chat="")
+        ])
+        buttons.append([
+            InlineKeyboardButton(text="🔙 Bekor qilish", callback_data="admin_cancel")
+        ])
+    else:
+        buttons.append([
+            InlineKeyboardButton(text="➕ Vazifa qo'shish", callback_data="admin_add_task"),
+            InlineKeyboardButton(text="🗑 Vazifa o'chirish", callback_data="admin_delete_task")
+        ])
+        buttons.append([
+            InlineKeyboardButton(text="🔙 Orqaga", callback_data="admin_back_main")
+        ])
+    return InlineKeyboardMarkup(inline_keyboard=buttons)
+
+
+def select_filial_keyboard(callback_prefix="filial", include_all=False):
     """Filial tanlash klaviaturasi"""
     from database import db
     filials = db.get_all_filials()
@@ -139,13 +205,21 @@ def select_filial_keyboard(callback_prefix="filial"):
     buttons = [
         [
             InlineKeyboardButton(
-                text=f"🏪 {name}",
-                callback_data=f"{callback_prefix}_{fid}"
+                text=f"🏪 {filial.name}",
+                callback_data=f"{callback_prefix}_{filial.id}"
             )
         ]
-        for fid, name in filials
+        for filial in filials
     ]
 
+    if include_all:
+        buttons.append([
+            InlineKeyboardButton(
+                text="🌐 Barcha filiallar",
+                callback_data=f"{callback_prefix}_all"
+            )
+        ])
+
     buttons.append([
         InlineKeyboardButton(
             text="🔙 Orqaga",
@@ -164,11 +238,11 @@ def select_role_keyboard(callback_prefix="role"):
     buttons = [
         [
             InlineKeyboardButton(
-                text=f"🎭 {name}",
-                callback_data=f"{callback_prefix}_{rid}"
+                text=f"🎭 {role.name}",
+                callback_data=f"{callback_prefix}_{role.id}"
             )
         ]
-        for rid, name in roles
+        for role in roles
     ]
 
     buttons.append([
@@ -181,18 +255,69 @@ def select_role_keyboard(callback_prefix="role"):
     return InlineKeyboardMarkup(inline_keyboard=buttons)
 
 
-def select_task_type_keyboard():
+def select_task_type_keyboard(callback_prefix="tasktype"):
     """Vazifa turi tanlash klaviaturasi"""
     return InlineKeyboardMarkup(
         inline_keyboard=[
-            [InlineKeyboardButton(text="🔴 Har kunlik", callback_data="tasktype_daily")],
-            [InlineKeyboardButton(text="🔵 Har dushanba", callback_data="tasktype_monday")],
-            [InlineKeyboardButton(text="🟢 Har oy", callback_data="tasktype_monthly")],
+            [InlineKeyboardButton(text="🔴 Har kunlik", callback_data=f"{callback_prefix}_daily")],
+            [InlineKeyboardButton(text="🔵 Har dushanba", callback_data=f"{callback_prefix}_monday")],
+            [InlineKeyboardButton(text="🟢 Har oy", callback_data=f"{callback_prefix}_monthly")],
+            [InlineKeyboardButton(text="🟣 Maxsus jadval", callback_data=f"{callback_prefix}_custom")],
             [InlineKeyboardButton(text="🔙 Bekor qilish", callback_data="admin_cancel")],
         ]
     )
 
 
+def multi_select_keyboard(callback_prefix, records, selected):
+    """Bir nechtasini tanlash (filial / rol): bosilganda ✅ yoqiladi / o'chadi"""
+    buttons = [
+        [
+            InlineKeyboardButton(
+                text=f"{'✅' if record.id in selected else '▫️'} {record.name}",
+                callback_data=f"{callback_prefix}_{record.id}"
+            )
+        ]
+        for record in records
+    ]
+
+    buttons.append([
+        InlineKeyboardButton(text="🌐 Hammasi", callback_data=f"{callback_prefix}_all"),
+        InlineKeyboardButton(text="➡️ Davom etish", callback_data=f"{callback_prefix}_done"),
+    ])
+    buttons.append([
+        InlineKeyboardButton(text="🔙 Bekor qilish", callback_data="admin_cancel")
+    ])
+
+    return InlineKeyboardMarkup(inline_keyboard=buttons)
+
+
+def keep_or_select_keyboard(callback_prefix, records, keep_text):
+    """Bittasini tanlash yoki o'zgartirmaslik (qayta biriktirish uchun)"""
+    buttons = [
+        [InlineKeyboardButton(text=record.name, callback_data=f"{callback_prefix}_{record.id}")]
+        for record in records
+    ]
+    buttons.append([
+        InlineKeyboardButton(text=keep_text, callback_data=f"{callback_prefix}_keep")
+    ])
+    buttons.append([
+        InlineKeyboardButton(text="🔙 Bekor qilish", callback_data="admin_cancel")
+    ])
+    return InlineKeyboardMarkup(inline_keyboard=buttons)
+
+
+def admin_bulk_tasks_menu():
+    """Admin — vazifalar ustida ommaviy amallar"""
+    return InlineKeyboardMarkup(
+        inline_keyboard=[
+            [InlineKeyboardButton(text="➕ Ommaviy qo'shish", callback_data="admin_bulk_create")],
+            [InlineKeyboardButton(text="🗑 Ommaviy o'chirish", callback_data="admin_bulk_delete")],
+            [InlineKeyboardButton(text="🔀 Qayta biriktirish", callback_data="admin_bulk_reassign")],
+            [InlineKeyboardButton(text="🔙 Orqaga", callback_data="admin_back_main")],
+        ]
+    )
+
+
 def confirm_keyboard(callback_prefix="confirm"):
     """Tasdiqlash klaviaturasi"""
     return InlineKeyboardMarkup(
@@ -233,19 +358,17 @@ def user_main_menu():
 
 def user_tasks_keyboard(tasks):
     """
-    tasks = [
-        (task_id, task_text, task_type, completed_bool)
-    ]
+    tasks = [UserTask, ...]
     """
     buttons = []
 
-    for task_id, task_text, task_type, completed in tasks:
-        emoji = "✅" if completed else "❗"
-        short_text = (task_text[:40] + "...") if len(task_text) > 40 else task_text
+    for task in tasks:
+        emoji = "✅" if task.completed else "❗"
+        short_text = (task.text[:40] + "...") if len(task.text) > 40 else task.text
 
         buttons.append([InlineKeyboardButton(
             text=f"[{emoji}] {short_text}",
-            callback_data=f"task_{task_id}"
+            callback_data=f"task_{task.id}"
         )])
 
     buttons.append([
@@ -329,6 +452,9 @@ def is_check(user_id):
 
 
 cancel_del_btn = InlineKeyboardMarkup(inline_keyboard=[
+        [
+            InlineKeyboardButton(text="🔎 Qidirish", switch_inline_query_current_chat="")
+        ],
         [
             InlineKeyboardButton(text="🔙 Orqaga", callback_data="back_from_del_worker")
         ]
@@ -0,0 +1,145 @@
+# maintenance.py
+"""
+Tungi xizmat ishlari - SQLite statistikasi, bo'sh joy va WAL
+
+    1. ANALYZE (analysis_limit bilan - katta jadvalda ham qisqa)
+       va PRAGMA optimize - so'rov rejalari eskirmasin
+    2. FTS indekslarini birlashtirish (search.py)
+    3. incremental_vacuum - soft delete / arxivdan keyin bo'shagan
+       sahifalarni faylga qaytarish, kichik bo'laklarda
+    4. wal_checkpoint - WAL faylini asosiy bazaga ko'chirish va qisqartirish
+
+Har bir qadam qisqa tranzaksiya; bo'laklar orasida yozuvchiga navbat
+beriladi. incremental_vacuum faqat auto_vacuum = INCREMENTAL bo'lgan
+bazada ishlaydi: yangi baza shunday yaratiladi, eskisi bir marta
+`python manage.py vacuum` bilan o'tkaziladi.
+"""
+
+import os
+import time
+
+
+FTS_TABLES = ("users_fts", "tasks_fts")
+
+AUTO_VACUUM_INCREMENTAL = 2
+
+
+class StepResult:
+    """Bitta qadam: nomi, davomiyligi (s), bo'shatilgan joy (bayt), izoh"""
+
+    __slots__ = ("name", "duration", "reclaimed", "detail")
+
+    def __init__(self, name, duration, reclaimed=0, detail=""):
+        self.name = name
+        self.duration = duration
+        self.reclaimed = reclaimed
+        self.detail = detail
+
+    def __str__(self):
+        text = f"{self.name}: {self.duration * 1000:.0f} ms"
+        if self.reclaimed:
+            text += f", {self.reclaimed // 1024} KB bo'shatildi"
+        if self.detail:
+            text += f" ({self.detail})"
+        return text
+
+
+def _pragma(conn, name):
+    return conn.execute(f"PRAGMA {name}").fetchone()[0]
+
+
+def _file_size(path):
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+
+def analyze(conn, limit):
+    """Statistikani yangilash (analysis_limit - har indeksdan namuna)"""
+    started = time.perf_counter()
+    conn.execute(f"PRAGMA analysis_limit = {int(limit)}")
+    conn.execute("ANALYZE")
+    conn.execute("PRAGMA optimize")
+    conn.commit()
+    return StepResult("analyze", time.perf_counter() - started)
+
+
+def optimize_fts(conn):
+    """FTS5 indeks bo'laklarini birlashtirish"""
+    started = time.perf_counter()
+    existing = {row[0] for row in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table'"
+    ).fetchall()}
+    tables = [table for table in FTS_TABLES if table in existing]
+    for table in tables:
+        conn.execute(f"INSERT INTO {table}({table}) VALUES ('optimize')")
+        conn.commit()
+    return StepResult("fts", time.perf_counter() - started, detail=", ".join(tables))
+
+
+def incremental_vacuum(conn, chunk_pages, pause):
+    """Bo'sh sahifalarni bo'laklab qaytarish (faqat INCREMENTAL rejimda)"""
+    started = time.perf_counter()
+    if _pragma(conn, "auto_vacuum") != AUTO_VACUUM_INCREMENTAL:
+        free = _pragma(conn, "freelist_count") * _pragma(conn, "page_size")
+        return StepResult(
+            "vacuum", time.perf_counter() - started,
+            detail=f"auto_vacuum o'chiq, {free // 1024} KB bo'sh - manage.py vacuum"
+        )
+
+    page_size = _pragma(conn, "page_size")
+    freed = 0
+    while True:
+        free = _pragma(conn, "freelist_count")
+        if not free:
+            break
+        # execute() pragmani bir qadam (bitta sahifa) bajaradi,
+        # executescript - oxirigacha
+        conn.executescript(f"PRAGMA incremental_vacuum({min(free, chunk_pages)})")
+        step = free - _pragma(conn, "freelist_count")
+        if step <= 0:
+            break
+        freed += step
+        time.sleep(pause)
+    return StepResult("vacuum", time.perf_counter() - started, freed * page_size)
+
+
+def checkpoint(conn, db_name):
+    """WAL ni bazaga ko'chirish; hammasi ko'chgan bo'lsa faylni qisqartirish.
+
+    PASSIVE hech kimni kutmaydi. TRUNCATE faqat WAL to'liq ko'chganda -
+    unda u bir zumda tugaydi.
+    """
+    started = time.perf_counter()
+    wal = db_name + "-wal"
+    before = _file_size(wal)
+    busy, frames, done = conn.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchone()
+    if not busy and frames == done:
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+    return StepResult(
+        "checkpoint", time.perf_counter() - started,
+        max(before - _file_size(wal), 0),
+        f"{done}/{frames} sahifa"
+    )
+
+
+def run(conn, db_name, analysis_limit, chunk_pages, pause):
+    """Barcha qadamlar ketma-ket: [StepResult, ...]"""
+    return [
+        analyze(conn, analysis_limit),
+        optimize_fts(conn),
+        incremental_vacuum(conn, chunk_pages, pause),
+        checkpoint(conn, db_name),
+    ]
+
+
+def vacuum(conn):
+    """Bir martalik to'liq VACUUM va auto_vacuum = INCREMENTAL ga o'tish.
+
+    Butun bazani qayta yozadi va shu vaqt yozishlarni to'xtatadi -
+    faqat qo'lda, kam yuklama vaqtida.
+    """
+    started = time.perf_counter()
+    size = _pragma(conn, "page_count") * _pragma(conn, "page_size")
+    conn.execute(f"PRAGMA auto_vacuum = {AUTO_VACUUM_INCREMENTAL}")
+    conn.execute("VACUUM")
+    reclaimed = size - _pragma(conn, "page_count") * _pragma(conn, "page_size")
+    return StepResult("vacuum", time.perf_counter() - started, max(reclaimed, 0))
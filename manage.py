@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# manage.py
+"""
+Xizmat buyruqlari (bot ishlab turganda ham ishlatish mumkin)
+
+    python manage.py rebuild-stats 2026-01-01 [2026-01-31]
+    python manage.py archive-completions
+    python manage.py backup
+    python manage.py maintenance
+    python manage.py vacuum       (bir marta, bot to'xtatilganda)
+"""
+
+import argparse
+from datetime import date, timedelta
+
+from database import db
+
+
+def rebuild_stats(args):
+    """daily_user_stats ni qayta qurish (to'ldirish / tuzatish)"""
+    start = date.fromisoformat(args.start)
+    end = date.fromisoformat(args.end) if args.end else start
+    
+    # Bugungi kun hali yopilmagan
+    yesterday = date.today() - timedelta(days=1)
+    if end > yesterday:
+        end = yesterday
+    
+    if start > end:
+        print("❌ Sanalar oralig'i noto'g'ri (faqat o'tgan kunlar qayta quriladi)")
+        return
+    
+    days = db.refresh_daily_stats(start, end)
+    print(f"✅ {days} kunlik statistika qayta qurildi: {start} - {end}")
+
+
+def archive_completions(args):
+    """Yopilgan oylarni arxiv fayllarga ko'chirish (scheduler kutmasdan)"""
+    moved = db.archive_completions()
+    print(f"✅ {moved} ta bajarilish arxivga ko'chirildi")
+
+
+def backup(args):
+    """Zaxira nusxa olish (scheduler kutmasdan)"""
+    result = db.backup()
+    print(f"✅ Zaxira nusxa: {result.path}")
+    print(f"   {result.raw_size // 1024} KB -> {result.size // 1024} KB, {result.duration:.1f} s")
+
+
+def run_maintenance(args):
+    """Tungi xizmat ishlarini hozir bajarish"""
+    for step in db.run_maintenance():
+        print(f"🧹 {step}")
+
+
+def vacuum(args):
+    """To'liq VACUUM va incremental_vacuum rejimiga o'tish"""
+    step = db.vacuum()
+    print(f"✅ {step}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Workly Bot xizmat buyruqlari")
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    rebuild = commands.add_parser("rebuild-stats", help="Kunlik statistikani qayta qurish")
+    rebuild.add_argument("start", help="Boshlanish sanasi (YYYY-MM-DD)")
+    rebuild.add_argument("end", nargs="?", help="Tugash sanasi (YYYY-MM-DD)")
+    rebuild.set_defaults(func=rebuild_stats)
+    
+    archive = commands.add_parser("archive-completions", help="Eski oylarni arxivlash")
+    archive.set_defaults(func=archive_completions)
+    
+    backup_cmd = commands.add_parser("backup", help="Zaxira nusxa olish")
+    backup_cmd.set_defaults(func=backup)
+    
+    maintenance_cmd = commands.add_parser("maintenance", help="ANALYZE, vacuum, checkpoint")
+    maintenance_cmd.set_defaults(func=run_maintenance)
+    
+    vacuum_cmd = commands.add_parser("vacuum", help="To'liq VACUUM (yozishlarni to'xtatadi)")
+    vacuum_cmd.set_defaults(func=vacuum)
+    
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,815 @@
+# memory_storage.py
+"""
+Xotiradagi ma'lumotlar ombori - testlar va benchmarklar uchun
+
+SQLite siz, faqat dict va indekslar. Natijalar database.Database bilan
+bir xil yozuvlar (models.py) va bir xil tartibda qaytariladi.
+config.STORAGE_BACKEND = "memory" bo'lsa ishlatiladi.
+"""
+
+import functools
+import threading
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+import config
+from migrations import INITIAL_FILIALS, INITIAL_ROLES, SUPER_ADMIN
+from models import (
+    Admin, Completion, DayResult, Evidence, Filial, OutboxMessage, OutboxStats, Page, Role,
+    RoleStats, StatsRow, Task, User, UserDayStats, UserStatistics, UserTask, Worker
+)
+from recurrence import LEGACY_RULES, compile_rule, date_signature, matches
+from search import phone_local, tokens
+from storage import Storage
+
+
+def _locked(method):
+    """Metodni ombor qulfi ostida bajarish (AsyncDatabase thread pool i uchun)"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def _day(value):
+    """Sana kaliti - SQLite dagidek ISO matn"""
+    return value.isoformat() if isinstance(value, date) else value
+
+
+def _integer(value):
+    """BIGINT ustun kabi: raqamli matn songa aylanadi"""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return value
+
+
+def _keyset_page(items, after_id=None, before_id=None, limit=None):
+    """id bo'yicha tartiblangan yozuvlardan keyset sahifa (Database._keyset_page kabi)"""
+    limit = limit or config.PAGE_SIZE
+    if before_id:
+        rows = [item for item in items if item.id < before_id][-(limit + 1):]
+        return Page(rows[-limit:], len(rows) > limit, True)
+    rows = [item for item in items if item.id > (after_id or 0)][:limit + 1]
+    return Page(rows[:limit], bool(after_id), len(rows) > limit)
+
+
+def _matches_words(words, *fields):
+    """Har bir qidiruv so'zi maydonlardagi biror so'zning prefiksi (FTS5 "w"* kabi)"""
+    field_words = [word for field in fields for word in tokens(str(field))]
+    return all(
+        any(candidate.startswith(word) for candidate in field_words)
+        for word in words
+    )
+
+
+def _nulls_first(value):
+    """ORDER BY dagi kabi: NULL birinchi"""
+    return (value is not None, value if value is not None else "")
+
+
+class MemoryDatabase(Storage):
+    """Xotiradagi ombor (jarayon tugasa ma'lumotlar yo'qoladi)"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._last_ids = defaultdict(int)
+
+        self._filials = {}
+        self._roles = {}
+        self._group_chats = {}
+
+        # Userlar va ularning indekslari
+        self._users = {}
+        self._users_by_phone = {}
+        self._users_by_telegram = {}
+
+        # Vazifalar; faol vazifalar (filial, rol) bo'yicha
+        self._tasks = {}
+        self._active_tasks = defaultdict(dict)
+
+        # Bajarilishlar: (task_id, user_id, sana) -> id, sana -> {id: Completion}
+        self._completion_keys = {}
+        self._completions_by_day = defaultdict(dict)
+        # (task_id, user_id, day) -> [Evidence, ...]
+        self._evidence = {}
+
+        # Kunlik yig'indi: sana -> {user_id: [filial_id, role_id, assigned, completed]}
+        self._daily_stats = defaultdict(dict)
+        self._daily_stats_by_user = defaultdict(dict)
+        self._closed_days = set()
+
+        # FSM holatlari: key -> (state, data_json, updated_at)
+        self._fsm_states = {}
+
+        # Guruh xabarlari navbati: id -> qator (dict), id tartibida
+        self._outbox = {}
+
+        self._insert_initial_data()
+
+    def _new_id(self, table):
+        self._last_ids[table] += 1
+        return self._last_ids[table]
+
+    def _insert_initial_data(self):
+        """Boshlang'ich ma'lumotlar (migrations bilan bir xil)"""
+        for name in INITIAL_FILIALS:
+            self._filials[self._new_id("filials")] = name
+        for filial_id, chat_id in enumerate(config.GROUP_LINKS[:len(INITIAL_FILIALS)], 1):
+            self._group_chats[filial_id] = _integer(chat_id)
+        for name in INITIAL_ROLES:
+            self._roles[self._new_id("roles")] = name
+        self.create_user(*SUPER_ADMIN, None, None, is_admin=True)
+
+    # ===== FILIAL VA ROLLAR =====
+
+    @_locked
+    def get_all_filials(self):
+        return [Filial(fid, name) for fid, name in sorted(self._filials.items())]
+
+    @_locked
+    def get_filial(self, filial_id):
+        name = self._filials.get(_integer(filial_id))
+        return Filial(_integer(filial_id), name) if name is not None else None
+
+    @_locked
+    def get_all_roles(self):
+        return [Role(rid, name) for rid, name in sorted(self._roles.items())]
+
+    @_locked
+    def get_role(self, role_id):
+        name = self._roles.get(_integer(role_id))
+        return Role(_integer(role_id), name) if name is not None else None
+
+    # ===== USERLAR =====
+
+    def _user_record(self, user):
+        return User(
+            user["id"], user["telegram_id"], user["full_name"], user["phone"],
+            user["filial_id"], self._filials.get(user["filial_id"]),
+            user["role_id"], self._roles.get(user["role_id"]), user["is_admin"]
+        )
+
+    @_locked
+    def create_user(self, full_name, phone, filial_id, role_id, is_admin=False):
+        phone = _integer(phone)
+        if phone in self._users_by_phone:
+            raise ValueError(f"Telefon raqam band: {phone}")
+
+        user = {
+            "id": self._new_id("users"),
+            "telegram_id": None,
+            "full_name": full_name,
+            "phone": phone,
+            "filial_id": filial_id,
+            "role_id": role_id,
+            "is_admin": int(bool(is_admin)),
+            "is_active": 1,
+        }
+        self._users[user["id"]] = user
+        self._users_by_phone[phone] = user
+        return user["id"]
+
+    @_locked
+    def import_users(self, rows):
+        taken = {
+            phone: bool(self._users_by_phone[phone]["is_active"])
+            for _, phone, _, _ in rows if phone in self._users_by_phone
+        }
+        new_rows = [row for row in rows if row[1] not in taken]
+        for full_name, phone, filial_id, role_id in new_rows:
+            self.create_user(full_name, phone, filial_id, role_id)
+        return len(new_rows), taken
+
+    @_locked
+    def get_user_by_phone(self, phone):
+        user = self._users_by_phone.get(_integer(phone))
+        if user is None or not user["is_active"]:
+            return None
+        return self._user_record(user)
+
+    @_locked
+    def get_user_by_telegram_id(self, telegram_id):
+        user = self._users_by_telegram.get(_integer(telegram_id))
+        if user is None or not user["is_active"]:
+            return None
+        return self._user_record(user)
+
+    @_locked
+    def update_user_telegram_id(self, phone, telegram_id):
+        user = self._users_by_phone.get(_integer(phone))
+        if user is None:
+            return
+
+        telegram_id = _integer(telegram_id)
+        owner = self._users_by_telegram.get(telegram_id)
+        if owner is not None and owner is not user:
+            raise ValueError(f"Telegram ID band: {telegram_id}")
+
+        self._users_by_telegram.pop(user["telegram_id"], None)
+        user["telegram_id"] = telegram_id
+        if telegram_id is not None:
+            self._users_by_telegram[telegram_id] = user
+
+    @_locked
+    def get_all_users(self, filial_id=None):
+        users = [
+            user for user in self._users.values()
+            if user["is_active"] and (not filial_id or user["filial_id"] == filial_id)
+        ]
+
+        def sort_key(user):
+            key = (_nulls_first(self._roles.get(user["role_id"])), user["full_name"], user["id"])
+            if not filial_id:
+                key = (_nulls_first(self._filials.get(user["filial_id"])),) + key
+            return key
+
+        return [
+            Worker(
+                user["id"], user["full_name"], user["phone"],
+                self._filials.get(user["filial_id"]), self._roles.get(user["role_id"])
+            )
+            for user in sorted(users, key=sort_key)
+        ]
+
+    @_locked
+    def get_users_page(self, filial_id=None, after_id=None, before_id=None, limit=None):
+        users = [
+            Worker(
+                user["id"], user["full_name"], user["phone"],
+                self._filials.get(user["filial_id"]), self._roles.get(user["role_id"])
+            )
+            for user in sorted(self._users.values(), key=lambda user: user["id"])
+            if user["is_active"] and (not filial_id or user["filial_id"] == filial_id)
+        ]
+        return _keyset_page(users, after_id, before_id, limit)
+
+    @_locked
+    def search_users(self, text, limit=None):
+        # bm25 reytingi yo'q - mos kelganlar id bo'yicha
+        words = tokens(text)
+        if not words:
+            return []
+        found = [
+            user for user in sorted(self._users.values(), key=lambda user: user["id"])
+            if user["is_active"] and _matches_words(
+                words, user["full_name"], user["phone"], phone_local(user["phone"])
+            )
+        ]
+        return [
+            Worker(
+                user["id"], user["full_name"], user["phone"],
+                self._filials.get(user["filial_id"]), self._roles.get(user["role_id"])
+            )
+            for user in found[:limit or config.SEARCH_RESULTS_LIMIT]
+        ]
+
+    @_locked
+    def delete_user(self, user_id):
+        user = self._users.get(_integer(user_id))
+        if user is not None:
+            user["is_active"] = 0
+
+    @_locked
+    def add_admin(self, phone):
+        user = self._users_by_phone.get(_integer(phone))
+        if user is not None:
+            user["is_admin"] = 1
+
+    @_locked
+    def get_admins(self):
+        return [
+            Admin(user["full_name"], user["phone"])
+            for user in self._users.values() if user["is_admin"]
+        ]
+
+    @_locked
+    def get_admin_by_phone(self, phone):
+        user = self._users_by_phone.get(_integer(phone))
+        if user is None or not user["is_admin"]:
+            return None
+        return Admin(user["full_name"], user["phone"])
+
+    @_locked
+    def del_admin(self, phone):
+        user = self._users_by_phone.get(_integer(phone))
+        if user is not None:
+            user["is_admin"] = 0
+
+    # ===== VAZIFALAR =====
+
+    def _task_record(self, task):
+        return Task(
+            task["id"], task["text"], task["task_type"],
+            self._roles.get(task["role_id"]), self._filials.get(task["filial_id"])
+        )
+
+    def _applicable_tasks(self, filial_id, role_id, signature):
+        """(filial, rol) uchun shu sanada amal qiladigan faol vazifalar"""
+        if filial_id is None or role_id is None:
+            return []  # SQL dagi kabi NULL hech narsaga teng emas
+        return [
+            task for task in self._active_tasks.get((filial_id, role_id), {}).values()
+            if matches(task["masks"], signature)
+        ]
+
+    @staticmethod
+    def _task_applies_to(task, user, signature):
+        """Vazifa shu sanada aynan shu user ga tegishlimi"""
+        return (
+            task is not None and user is not None and task["is_active"]
+            and user["filial_id"] is not None and user["role_id"] is not None
+            and task["filial_id"] == user["filial_id"]
+            and task["role_id"] == user["role_id"]
+            and matches(task["masks"], signature)
+        )
+
+    @_locked
+    def create_task(self, text, task_type, role_id, filial_id, recurrence=None):
+        recurrence = recurrence or LEGACY_RULES.get(task_type, task_type)
+        task = {
+            "id": self._new_id("tasks"),
+            "text": text,
+            "task_type": task_type,
+            "role_id": role_id,
+            "filial_id": filial_id,
+            "recurrence": recurrence,
+            "masks": compile_rule(recurrence),
+            "is_active": 1,
+        }
+        self._tasks[task["id"]] = task
+        self._active_tasks[(filial_id, role_id)][task["id"]] = task
+        return task["id"]
+
+    @_locked
+    def create_tasks(self, texts, task_type, role_ids, filial_ids, recurrence=None):
+        texts = list(dict.fromkeys(texts))
+        created = skipped = 0
+        for text in texts:
+            for filial_id in sorted(set(filial_ids)):
+                for role_id in sorted(set(role_ids)):
+                    active = self._active_tasks[(filial_id, role_id)].values()
+                    if any(task["text"] == text for task in active):
+                        skipped += 1
+                        continue
+                    self.create_task(text, task_type, role_id, filial_id, recurrence)
+                    created += 1
+        return created, skipped
+
+    @_locked
+    def get_user_tasks(self, user_id, target_date):
+        user = self._users.get(user_id)
+        if user is None:
+            return []
+
+        day = _day(target_date)
+        tasks = self._applicable_tasks(user["filial_id"], user["role_id"], date_signature(target_date))
+        tasks.sort(key=lambda task: (task["task_type"], task["id"]))
+        return [
+            UserTask(
+                task["id"], task["text"], task["task_type"],
+                1 if (task["id"], user_id, day) in self._completion_keys else 0
+            )
+            for task in tasks
+        ]
+
+    @_locked
+    def complete_task(self, task_id, user_id, media_type=None, media_file_id=None, text_message=None,
+                      outbox=None, evidence=()):
+        today = date.today()
+        day = _day(today)
+        key = (task_id, user_id, day)
+        completed_at = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
+
+        completion_id = self._completion_keys.get(key)
+        if completion_id is not None:
+            # Qayta yuborilgan - faqat faylni yangilash
+            self._completions_by_day[day][completion_id] = Completion(
+                completion_id, task_id, user_id, day, completed_at,
+                media_type, media_file_id, text_message
+            )
+        else:
+            completion_id = self._new_id("task_completions")
+            self._completion_keys[key] = completion_id
+            self._completions_by_day[day][completion_id] = Completion(
+                completion_id, task_id, user_id, day, completed_at,
+                media_type, media_file_id, text_message
+            )
+            self._increment_daily_stats(task_id, user_id, today)
+
+        items = list(evidence) or ([(media_type, media_file_id, None, None)] if media_file_id else [])
+        self._evidence[key] = [Evidence(position, *item) for position, item in enumerate(items)]
+
+        if outbox is None:
+            return None
+        chat_id, method, payload = outbox
+        outbox_id = self._new_id("outbox")
+        self._outbox[outbox_id] = {
+            "id": outbox_id, "chat_id": chat_id, "method": method, "payload": payload,
+            "task_id": task_id, "user_id": user_id, "status": "pending", "attempts": 0,
+            "next_attempt_at": 0, "last_error": None, "message_id": None,
+            "created_at": completed_at, "sent_at": None,
+        }
+        return outbox_id
+
+    @_locked
+    def get_task_evidence(self, task_id, user_id, completion_date):
+        return list(self._evidence.get((task_id, user_id, _day(completion_date)), []))
+
+    @_locked
+    def get_completions(self, start_date, end_date, filial_id=None):
+        start, end = _day(start_date), _day(end_date)
+        completions = []
+        for day in sorted(d for d in self._completions_by_day if start <= d <= end):
+            for completion in self._completions_by_day[day].values():
+                task = self._tasks.get(completion.task_id)
+                if filial_id and (task is None or task["filial_id"] != filial_id):
+                    continue
+                completions.append(completion)
+        return completions
+
+    @_locked
+    def get_task(self, task_id):
+        task = self._tasks.get(_integer(task_id))
+        return self._task_record(task) if task is not None else None
+
+    @_locked
+    def get_all_tasks(self, filial_id=None, role_id=None, task_type=None):
+        tasks = [
+            task for task in self._tasks.values()
+            if task["is_active"]
+            and (not filial_id or task["filial_id"] == filial_id)
+            and (not role_id or task["role_id"] == role_id)
+            and (not task_type or task["task_type"] == task_type)
+        ]
+        tasks.sort(key=lambda task: (
+            _nulls_first(self._filials.get(task["filial_id"])),
+            _nulls_first(self._roles.get(task["role_id"])),
+            task["task_type"], task["id"]
+        ))
+        return [self._task_record(task) for task in tasks]
+
+    @_locked
+    def get_tasks_page(self, filial_id=None, role_id=None, after_id=None, before_id=None, limit=None):
+        tasks = [
+            self._task_record(task)
+            for task in sorted(self._tasks.values(), key=lambda task: task["id"])
+            if task["is_active"]
+            and (not filial_id or task["filial_id"] == filial_id)
+            and (not role_id or task["role_id"] == role_id)
+        ]
+        return _keyset_page(tasks, after_id, before_id, limit)
+
+    @_locked
+    def search_tasks(self, text, limit=None):
+        # bm25 reytingi yo'q - mos kelganlar id bo'yicha
+        words = tokens(text)
+        if not words:
+            return []
+        found = [
+            task for task in sorted(self._tasks.values(), key=lambda task: task["id"])
+            if task["is_active"] and _matches_words(words, task["text"])
+        ]
+        return [self._task_record(task) for task in found[:limit or config.SEARCH_RESULTS_LIMIT]]
+
+    @_locked
+    def deactivate_tasks(self, task_ids):
+        count = 0
+        for task_id in set(task_ids):
+            task = self._tasks.get(_integer(task_id))
+            if task is not None and task["is_active"]:
+                self.delete_task(task_id)
+                count += 1
+        return count
+
+    @_locked
+    def reassign_tasks(self, task_ids, filial_id=None, role_id=None):
+        count = 0
+        for task_id in set(task_ids):
+            task = self._tasks.get(_integer(task_id))
+            if task is None or not task["is_active"]:
+                continue
+            self._active_tasks[(task["filial_id"], task["role_id"])].pop(task["id"], None)
+            if filial_id is not None:
+                task["filial_id"] = filial_id
+            if role_id is not None:
+                task["role_id"] = role_id
+            self._active_tasks[(task["filial_id"], task["role_id"])][task["id"]] = task
+            count += 1
+        return count
+
+    @_locked
+    def delete_task(self, task_id):
+        task = self._tasks.get(_integer(task_id))
+        if task is not None:
+            task["is_active"] = 0
+            self._active_tasks[(task["filial_id"], task["role_id"])].pop(task["id"], None)
+
+    # ===== GURUHLAR =====
+
+    @_locked
+    def get_group_chat_id(self, filial_id):
+        return self._group_chats.get(filial_id)
+
+    @_locked
+    def get_all_group_chats(self):
+        return dict(self._group_chats)
+
+    # ===== STATISTIKA =====
+
+    def _compute_user_rows(self, target_date, filial_id=None):
+        """Jonli hisob - database.Database._compute_user_rows bilan bir xil"""
+        day = _day(target_date)
+        signature = date_signature(target_date)
+
+        task_counts = {}
+        completed = defaultdict(int)
+        for completion in self._completions_by_day.get(day, {}).values():
+            task = self._tasks.get(completion.task_id)
+            user = self._users.get(completion.user_id)
+            if not self._task_applies_to(task, user, signature):
+                continue
+            completed[user["id"]] += 1
+
+        rows = []
+        for user in self._users.values():
+            if not user["is_active"] or user["filial_id"] is None:
+                continue
+            if filial_id is not None and user["filial_id"] != filial_id:
+                continue
+
+            group = (user["filial_id"], user["role_id"])
+            if group not in task_counts:
+                task_counts[group] = len(self._applicable_tasks(*group, signature))
+
+            role_name = self._roles.get(user["role_id"])
+            rows.append(StatsRow(
+                user["filial_id"], user["id"], user["full_name"],
+                user["role_id"] if role_name is not None else None, role_name,
+                task_counts[group], completed[user["id"]]
+            ))
+
+        rows.sort(key=lambda row: (row.filial_id, _nulls_first(row.role_name), row.full_name))
+        return rows
+
+    def _read_rollup_rows(self, target_date, filial_id=None):
+        """Yopilgan kun uchun yig'indidan o'qish (yopilmagan bo'lsa None)"""
+        day = _day(target_date)
+        if day not in self._closed_days:
+            return None
+
+        rows = []
+        for user_id, (f_id, role_id, assigned, completed) in self._daily_stats[day].items():
+            if filial_id is not None and f_id != filial_id:
+                continue
+            user = self._users.get(user_id)
+            if user is None:
+                continue
+            role_name = self._roles.get(role_id)
+            rows.append(StatsRow(
+                f_id, user_id, user["full_name"],
+                role_id if role_name is not None else None, role_name,
+                assigned, completed
+            ))
+
+        rows.sort(key=lambda row: (_nulls_first(row.filial_id), _nulls_first(row.role_name), row.full_name))
+        return rows
+
+    def _statistics_rows(self, target_date, filial_id=None):
+        rows = self._read_rollup_rows(target_date, filial_id)
+        if rows is None:
+            rows = self._compute_user_rows(target_date, filial_id)
+        return rows
+
+    @staticmethod
+    def _build_statistics(user_rows):
+        """User qatorlaridan {filial_id: (role_stats, user_stats)} yasash"""
+        statistics = {}
+        role_totals = {}
+        for row in user_rows:
+            statistics.setdefault(row.filial_id, ([], []))[1].append(UserDayStats(
+                row.user_id, row.full_name, row.role_name, row.total, row.completed
+            ))
+            if row.role_id is None:
+                continue
+            totals = role_totals.setdefault((row.filial_id, row.role_id), [row.role_name, 0, 0, 0])
+            totals[1] += 1
+            totals[2] += row.total
+            totals[3] += row.completed
+
+        for (f_id, role_id), (role_name, user_count, total, completed) in sorted(role_totals.items()):
+            statistics[f_id][0].append(RoleStats(role_id, role_name, user_count, total, completed))
+
+        return statistics
+
+    @_locked
+    def get_daily_statistics(self, filial_id, target_date):
+        statistics = self._build_statistics(self._statistics_rows(target_date, filial_id))
+        return statistics.get(filial_id, ([], []))
+
+    @_locked
+    def get_all_daily_statistics(self, target_date):
+        return self._build_statistics(self._statistics_rows(target_date))
+
+    # ===== KUNLIK YIG'INDI =====
+
+    def _set_daily_stats(self, day, user_id, entry):
+        self._daily_stats[day][user_id] = entry
+        self._daily_stats_by_user[user_id][day] = entry
+
+    def _increment_daily_stats(self, task_id, user_id, target_date):
+        """Yangi bajarilishni kunlik yig'indiga qo'shish (faqat tegishli vazifa bo'lsa)"""
+        task = self._tasks.get(task_id)
+        user = self._users.get(user_id)
+        signature = date_signature(target_date)
+        if not self._task_applies_to(task, user, signature):
+            return
+
+        day = _day(target_date)
+        entry = self._daily_stats[day].get(user_id)
+        if entry is not None:
+            entry[3] += 1
+            return
+
+        assigned = len(self._applicable_tasks(user["filial_id"], user["role_id"], signature))
+        self._set_daily_stats(day, user_id, [user["filial_id"], user["role_id"], assigned, 1])
+
+    @_locked
+    def refresh_daily_stats(self, start_date, end_date=None):
+        end_date = end_date or start_date
+
+        days = 0
+        current = start_date
+        while current <= end_date:
+            day = _day(current)
+            for user_id in self._daily_stats.pop(day, {}):
+                self._daily_stats_by_user[user_id].pop(day, None)
+            for row in self._compute_user_rows(current):
+                self._set_daily_stats(day, row.user_id, [row.filial_id, row.role_id, row.total, row.completed])
+            self._closed_days.add(day)
+            days += 1
+            current += timedelta(days=1)
+
+        return days
+
+    # ===== USER TARIXI =====
+
+    def _user_days(self, user_id, start, end):
+        """User ning [start, end] oralig'idagi kunlari: [(sana, entry), ...]"""
+        return sorted(
+            (day, entry) for day, entry in self._daily_stats_by_user.get(user_id, {}).items()
+            if start <= day <= end
+        )
+
+    @_locked
+    def get_user_daily_history(self, user_id, start_date, end_date):
+        return [
+            DayResult(day, assigned, completed)
+            for day, (_, _, assigned, completed) in self._user_days(user_id, _day(start_date), _day(end_date))
+        ]
+
+    @_locked
+    def get_user_statistics(self, user_id, today):
+        yesterday = _day(today - timedelta(days=1))
+        week_start = _day(today - timedelta(days=7))
+        month_start = _day(today - timedelta(days=30))
+        mtd_start = _day(today.replace(day=1))
+
+        totals = [0] * 6
+        for day, (_, _, assigned, completed) in self._user_days(user_id, month_start, yesterday):
+            totals[2] += assigned
+            totals[3] += completed
+            if day >= week_start:
+                totals[0] += assigned
+                totals[1] += completed
+            if day >= mtd_start:
+                totals[4] += assigned
+                totals[5] += completed
+
+        # Ketma-ketlik: oxirgi to'liq bajarilmagan kundan keyingi to'liq kunlar
+        history = self._user_days(user_id, "", yesterday)
+        streak = 0
+        for day, (_, _, assigned, completed) in reversed(history):
+            if assigned > 0 and completed < assigned:
+                break
+            if assigned > 0:
+                streak += 1
+
+        # Filial ichidagi o'rin (30 kunlik bajarilish foizi bo'yicha)
+        user = self._users.get(user_id)
+        filial_id = user["filial_id"] if user is not None else None
+        sums = defaultdict(lambda: [0, 0])
+        if filial_id is not None:
+            for day, users in self._daily_stats.items():
+                if not month_start <= day <= yesterday:
+                    continue
+                for uid, (f_id, _, assigned, completed) in users.items():
+                    if f_id == filial_id:
+                        sums[uid][0] += assigned
+                        sums[uid][1] += completed
+        rates = {
+            uid: completed / assigned
+            for uid, (assigned, completed) in sums.items() if assigned > 0
+        }
+
+        rank = None
+        if user_id in rates:
+            rank = 1 + sum(1 for rate in rates.values() if rate > rates[user_id])
+
+        return UserStatistics(*totals, streak, rank, len(rates))
+
+    # ===== FSM HOLATLARI =====
+
+    @_locked
+    def get_fsm_state(self, key):
+        return self._fsm_states.get(key)
+
+    @_locked
+    def save_fsm_states(self, rows, deleted_keys=()):
+        for key, state, data, updated_at in rows:
+            self._fsm_states[key] = (state, data, updated_at)
+        for key in deleted_keys:
+            self._fsm_states.pop(key, None)
+
+    @_locked
+    def purge_fsm_states(self, before):
+        expired = [key for key, row in self._fsm_states.items() if row[2] < before]
+        for key in expired:
+            del self._fsm_states[key]
+        return len(expired)
+
+    # ===== XABARLAR NAVBATI =====
+
+    @_locked
+    def get_pending_outbox(self, now, limit):
+        pending = [row for row in self._outbox.values() if row["status"] == "pending"]
+        heads = {}
+        for row in pending:
+            heads.setdefault(row["chat_id"], row)
+        ready = [
+            row for row in pending
+            if heads[row["chat_id"]]["next_attempt_at"] <= now
+        ]
+        return [
+            OutboxMessage(
+                row["id"], row["chat_id"], row["method"], row["payload"],
+                row["task_id"], row["user_id"], row["attempts"]
+            )
+            for row in ready[:limit]
+        ]
+
+    @_locked
+    def mark_outbox_sent(self, outbox_id, message_id=None):
+        row = self._outbox.get(outbox_id)
+        if row is not None:
+            row["status"] = "sent"
+            row["attempts"] += 1
+            row["message_id"] = message_id
+            row["sent_at"] = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
+
+    @_locked
+    def mark_outbox_failed(self, outbox_id, error, retry_at=None):
+        row = self._outbox.get(outbox_id)
+        if row is None:
+            return
+        row["attempts"] += 1
+        row["last_error"] = error
+        if retry_at is None:
+            row["status"] = "failed"
+        else:
+            row["next_attempt_at"] = retry_at
+
+    @_locked
+    def retry_failed_outbox(self):
+        count = 0
+        for row in self._outbox.values():
+            if row["status"] == "failed":
+                row.update(status="pending", attempts=0, next_attempt_at=0)
+                count += 1
+        return count
+
+    @_locked
+    def purge_outbox(self, before):
+        expired = [
+            outbox_id for outbox_id, row in self._outbox.items()
+            if row["status"] == "sent" and row["sent_at"] < before
+        ]
+        for outbox_id in expired:
+            del self._outbox[outbox_id]
+        return len(expired)
+
+    @_locked
+    def get_outbox_stats(self):
+        counts = defaultdict(int)
+        for row in self._outbox.values():
+            counts[row["status"]] += 1
+        pending = [row["created_at"] for row in self._outbox.values() if row["status"] == "pending"]
+        errors = [
+            row["last_error"] for row in self._outbox.values()
+            if row["status"] != "sent" and row["last_error"] is not None
+        ]
+        return OutboxStats(
+            counts["pending"], counts["sent"], counts["failed"],
+            min(pending) if pending else None, errors[-1] if errors else None
+        )
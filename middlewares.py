@@ -0,0 +1,54 @@
+# middlewares.py
+"""
+Umumiy middleware lar
+"""
+
+import asyncio
+
+import config
+from database import adb
+
+# Yig'ilayotgan albomlar: (chat_id, media_group_id) -> [Message, ...]
+_albums = {}
+
+
+async def identity_middleware(handler, event, data):
+    """Telegram userni har bir update uchun bir marta aniqlash.
+    
+    Topilgan User (yoki None) handler larga data["user"] orqali uzatiladi.
+    """
+    from_user = getattr(event, "from_user", None)
+    data["user"] = await adb.get_user_by_telegram_id(from_user.id) if from_user else None
+    return await handler(event, data)
+
+
+async def album_middleware(handler, event, data):
+    """Albom (media group) xabarlarini bitta handler chaqiruviga yig'ish.
+    
+    Telegram albomni har bir fayl uchun alohida update qilib yuboradi.
+    Birinchisi MEDIA_GROUP_WAIT soniya jimlikkacha kutadi va handler ga
+    data["album"] (message_id tartibida) bilan o'tadi; qolganlari shu
+    ro'yxatga qo'shiladi va handler chaqirilmaydi. Update lar parallel
+    qayta ishlanishi kerak (polling, WEBHOOK_WORKERS > 1).
+    """
+    media_group_id = getattr(event, "media_group_id", None)
+    if media_group_id is None:
+        return await handler(event, data)
+    
+    key = (event.chat.id, media_group_id)
+    album = _albums.get(key)
+    if album is not None:
+        album.append(event)
+        return None
+    
+    album = _albums[key] = [event]
+    try:
+        size = 0
+        while len(album) != size:
+            size = len(album)
+            await asyncio.sleep(config.MEDIA_GROUP_WAIT)
+    finally:
+        del _albums[key]
+    
+    data["album"] = sorted(album, key=lambda message: message.message_id)
+    return await handler(event, data)
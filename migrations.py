@@ -0,0 +1,507 @@
+# migrations.py
+"""
+Database sxemasi migratsiyalari - versiyalar bo'yicha
+"""
+
+import sqlite3
+
+import config
+from recurrence import compile_rule
+
+
+# Boshlang'ich ma'lumotlar (memory_storage ham ishlatadi)
+INITIAL_FILIALS = ('Gelyon', 'Marxabo', 'Vogzal')
+INITIAL_ROLES = ('Oshpaz', 'Ofitsiant', 'Kassa', 'Menejer')
+SUPER_ADMIN = ("Super Admin", 998770451117)
+
+
+def _initial_schema(cursor):
+    """1. Asosiy jadvallar va boshlang'ich ma'lumotlar"""
+
+    # Filiallar jadvali
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS filials (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+
+    # Guruhlar jadvali
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS group_chats (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        filial_id INTEGER UNIQUE,
+        chat_id BIGINT NOT NULL,
+        chat_title TEXT,
+        added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        is_active BOOLEAN DEFAULT 1,
+        FOREIGN KEY (filial_id) REFERENCES filials(id)
+    )
+    """)
+
+    # Rollar jadvali
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS roles (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+
+    # Foydalanuvchilar jadvali
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        telegram_id BIGINT UNIQUE,
+        full_name TEXT NOT NULL,
+        phone BIGINT NOT NULL UNIQUE,
+        filial_id INTEGER,
+        role_id INTEGER,
+        is_admin BOOLEAN DEFAULT 0,
+        is_active BOOLEAN DEFAULT 1,
+        registered_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (filial_id) REFERENCES filials(id),
+        FOREIGN KEY (role_id) REFERENCES roles(id)
+    )
+    """)
+
+    # Vazifalar jadvali
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS tasks (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        text TEXT NOT NULL,
+        task_type TEXT NOT NULL,
+        role_id INTEGER,
+        filial_id INTEGER,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        is_active BOOLEAN DEFAULT 1,
+        FOREIGN KEY (role_id) REFERENCES roles(id),
+        FOREIGN KEY (filial_id) REFERENCES filials(id)
+    )
+    """)
+
+    # Bajarilgan vazifalar jadvali
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS task_completions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        task_id INTEGER,
+        user_id INTEGER,
+        completion_date DATE NOT NULL,
+        completed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        media_type TEXT,
+        media_file_id TEXT,
+        text_message TEXT,
+        FOREIGN KEY (task_id) REFERENCES tasks(id),
+        FOREIGN KEY (user_id) REFERENCES users(id),
+        UNIQUE(task_id, user_id, completion_date)
+    )
+    """)
+
+    _insert_initial_data(cursor)
+
+
+def _insert_initial_data(cursor):
+    """Boshlang'ich ma'lumotlarni kiritish"""
+
+    # Filiallar
+    cursor.execute("SELECT COUNT(*) FROM filials")
+    if cursor.fetchone()[0] == 0:
+        filials = [(name,) for name in INITIAL_FILIALS]
+        cursor.executemany("INSERT INTO filials (name) VALUES (?)", filials)
+
+    # Guruhlar
+    cursor.execute("SELECT COUNT(*) FROM group_chats")
+    if cursor.fetchone()[0] == 0:
+        groups = [
+            (1, config.GROUP_LINKS[0], 'Gelyon Guruh'),
+            (2, config.GROUP_LINKS[1], 'Marxabo Guruh'),
+            (3, config.GROUP_LINKS[2], 'Vogzal Guruh')
+        ]
+        cursor.executemany(
+            "INSERT INTO group_chats (filial_id, chat_id, chat_title) VALUES (?, ?, ?)",
+            groups
+        )
+
+    # Rollar
+    cursor.execute("SELECT COUNT(*) FROM roles")
+    if cursor.fetchone()[0] == 0:
+        roles = [(name,) for name in INITIAL_ROLES]
+        cursor.executemany("INSERT INTO roles (name) VALUES (?)", roles)
+
+    cursor.execute("SELECT COUNT(*) FROM users WHERE is_admin = 1")
+    admin_count = cursor.fetchone()[0]
+
+    if admin_count == 0:
+        cursor.execute("""
+            INSERT INTO users (full_name, phone, filial_id, role_id, is_admin)
+            VALUES (?, ?, ?, ?, ?)
+        """, (*SUPER_ADMIN, None, None, 1))
+
+
+def _hot_query_indexes(cursor):
+    """2. Asosiy so'rovlar uchun indekslar
+
+    EXPLAIN QUERY PLAN natijasida get_user_tasks va get_all_tasks da
+    tasks to'liq skanerlanardi (SCAN t), get_daily_statistics esa har
+    safar users va tasks uchun AUTOMATIC INDEX qurardi.
+    """
+    # get_user_tasks, get_daily_statistics, get_all_tasks(filial_id=...)
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_tasks_active_filial_role
+    ON tasks(filial_id, role_id, task_type) WHERE is_active = 1
+    """)
+
+    # get_daily_statistics, get_all_users(filial_id=...)
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_users_active_filial_role
+    ON users(filial_id, role_id) WHERE is_active = 1
+    """)
+
+    # Bir kunlik bajarilganlar (statistika) - covering indeks
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_completions_date_user
+    ON task_completions(completion_date, user_id, task_id)
+    """)
+
+
+def _daily_user_stats(cursor):
+    """3. Kunlik yig'indi (rollup) jadvali
+
+    daily_user_stats - har bir user uchun kunlik tayinlangan/bajarilgan
+    vazifalar soni. daily_stats_days - to'liq qurilgan (yopilgan) kunlar;
+    faqat shu kunlar statistikasi rollup dan o'qiladi.
+    """
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS daily_user_stats (
+        stat_date DATE NOT NULL,
+        user_id INTEGER NOT NULL,
+        filial_id INTEGER,
+        role_id INTEGER,
+        assigned INTEGER NOT NULL DEFAULT 0,
+        completed INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (stat_date, user_id),
+        FOREIGN KEY (user_id) REFERENCES users(id)
+    ) WITHOUT ROWID
+    """)
+
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS daily_stats_days (
+        stat_date DATE PRIMARY KEY,
+        built_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+
+
+def _user_history_indexes(cursor):
+    """4. User tarixi uchun indekslar ("Mening statistikam")"""
+    # Bitta user ning sanalar oralig'i
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_daily_user_stats_user
+    ON daily_user_stats(user_id, stat_date, assigned, completed)
+    """)
+
+    # Filial ichidagi reyting - covering indeks
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_daily_user_stats_filial
+    ON daily_user_stats(filial_id, stat_date, user_id, assigned, completed)
+    """)
+
+
+def _task_recurrence(cursor):
+    """5. Vazifa takrorlanish qoidalari (recurrence.py)
+
+    Har bir vazifa qoidasi bitmask larga kompilyatsiya qilinib saqlanadi;
+    "(filial, rol, sana) uchun qaysi vazifalar" - bitta indeks bo'yicha
+    qidiruv va bitwise tekshiruv.
+    """
+    for column in (
+        "recurrence TEXT",
+        "weekday_mask INTEGER NOT NULL DEFAULT 0",
+        "monthday_mask INTEGER NOT NULL DEFAULT 0",
+        "nth_weekday_mask INTEGER NOT NULL DEFAULT 0",
+        "interval_days INTEGER NOT NULL DEFAULT 0",
+        "anchor_day INTEGER NOT NULL DEFAULT 0",
+    ):
+        cursor.execute(f"ALTER TABLE tasks ADD COLUMN {column}")
+
+    # Mavjud daily / monday / monthly vazifalarni ko'chirish
+    cursor.execute("SELECT DISTINCT task_type FROM tasks")
+    for (task_type,) in cursor.fetchall():
+        masks = compile_rule(task_type)
+        cursor.execute("""
+            UPDATE tasks SET recurrence = ?, weekday_mask = ?, monthday_mask = ?,
+                             nth_weekday_mask = ?, interval_days = ?, anchor_day = ?
+            WHERE task_type = ?
+        """, (task_type, *masks, task_type))
+
+    # task_type endi filtrlashda ishlatilmaydi - indeks maskalar bilan covering
+    cursor.execute("DROP INDEX IF EXISTS idx_tasks_active_filial_role")
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_tasks_active_schedule
+    ON tasks(filial_id, role_id, weekday_mask, monthday_mask,
+             nth_weekday_mask, interval_days, anchor_day) WHERE is_active = 1
+    """)
+
+
+def _completion_archives(cursor):
+    """6. Oylik arxivlar ro'yxati (archive.py)
+
+    Yopilgan oylar task_completions dan alohida fayllarga ko'chiriladi;
+    purged_at - saqlash muddati o'tib fayl o'chirilgan vaqt.
+    """
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS completion_archives (
+        month TEXT PRIMARY KEY,
+        path TEXT NOT NULL,
+        row_count INTEGER NOT NULL DEFAULT 0,
+        archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        purged_at TIMESTAMP
+    )
+    """)
+
+
+def _pagination_indexes(cursor):
+    """7. Admin ro'yxatlarini sahifalash (keyset) uchun indekslar
+
+    Filtrsiz sahifa PRIMARY KEY bo'yicha o'qiladi; filial filtri bilan
+    (filial_id, id) - keyingi sahifa bitta indeks oralig'i.
+    """
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_users_active_filial_id
+    ON users(filial_id, id) WHERE is_active = 1
+    """)
+
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_tasks_active_filial_id
+    ON tasks(filial_id, id) WHERE is_active = 1
+    """)
+
+
+def _full_text_search(cursor):
+    """8. Ishchilar va vazifalar bo'yicha FTS5 qidiruv (search.py)
+
+    Alohida FTS jadvallari triggerlar bilan yangilanadi; is_active
+    qidiruvda users / tasks bilan join orqali tekshiriladi.
+    prefix='2 3' - qisqa prefiks so'rovlari uchun qo'shimcha indeks.
+    """
+    cursor.execute("""
+    CREATE VIRTUAL TABLE IF NOT EXISTS users_fts USING fts5(
+        full_name, phone, phone_local,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )
+    """)
+
+    cursor.execute("""
+    CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
+        text,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )
+    """)
+
+    # users -> users_fts
+    cursor.execute("""
+    CREATE TRIGGER IF NOT EXISTS users_fts_insert AFTER INSERT ON users BEGIN
+        INSERT INTO users_fts (rowid, full_name, phone, phone_local)
+        VALUES (new.id, new.full_name, new.phone, substr(CAST(new.phone AS TEXT), -9));
+    END
+    """)
+    cursor.execute("""
+    CREATE TRIGGER IF NOT EXISTS users_fts_update AFTER UPDATE OF full_name, phone ON users BEGIN
+        DELETE FROM users_fts WHERE rowid = old.id;
+        INSERT INTO users_fts (rowid, full_name, phone, phone_local)
+        VALUES (new.id, new.full_name, new.phone, substr(CAST(new.phone AS TEXT), -9));
+    END
+    """)
+    cursor.execute("""
+    CREATE TRIGGER IF NOT EXISTS users_fts_delete AFTER DELETE ON users BEGIN
+        DELETE FROM users_fts WHERE rowid = old.id;
+    END
+    """)
+
+    # tasks -> tasks_fts
+    cursor.execute("""
+    CREATE TRIGGER IF NOT EXISTS tasks_fts_insert AFTER INSERT ON tasks BEGIN
+        INSERT INTO tasks_fts (rowid, text) VALUES (new.id, new.text);
+    END
+    """)
+    cursor.execute("""
+    CREATE TRIGGER IF NOT EXISTS tasks_fts_update AFTER UPDATE OF text ON tasks BEGIN
+        DELETE FROM tasks_fts WHERE rowid = old.id;
+        INSERT INTO tasks_fts (rowid, text) VALUES (new.id, new.text);
+    END
+    """)
+    cursor.execute("""
+    CREATE TRIGGER IF NOT EXISTS tasks_fts_delete AFTER DELETE ON tasks BEGIN
+        DELETE FROM tasks_fts WHERE rowid = old.id;
+    END
+    """)
+
+    # Mavjud qatorlar
+    cursor.execute("""
+        INSERT INTO users_fts (rowid, full_name, phone, phone_local)
+        SELECT id, full_name, phone, substr(CAST(phone AS TEXT), -9) FROM users
+    """)
+    cursor.execute("INSERT INTO tasks_fts (rowid, text) SELECT id, text FROM tasks")
+
+
+def _fsm_states(cursor):
+    """9. FSM holatlari (fsm_storage.py) - restartdan keyin ham davom etadi
+
+    key - "bot:chat:user:thread:destiny"; data - JSON. updated_at (unix
+    vaqt) bo'yicha tashlab ketilgan holatlar davriy o'chiriladi.
+    """
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS fsm_states (
+        key TEXT PRIMARY KEY,
+        state TEXT,
+        data TEXT NOT NULL DEFAULT '{}',
+        updated_at REAL NOT NULL
+    ) WITHOUT ROWID
+    """)
+
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_fsm_states_updated
+    ON fsm_states(updated_at)
+    """)
+
+
+def _outbox(cursor):
+    """10. Guruhga yuboriladigan xabarlar navbati (outbox.py)
+
+    Bajarilish va uning xabari bitta tranzaksiyada yoziladi - ishchi
+    Telegramni kutmaydi, xabarni fon ishchisi yetkazadi. status:
+    pending - navbatda, sent - yuborildi, failed - urinishlar tugadi.
+    next_attempt_at - keyingi urinish (unix vaqt).
+    """
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS outbox (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        chat_id INTEGER NOT NULL,
+        method TEXT NOT NULL,
+        payload TEXT NOT NULL,
+        task_id INTEGER,
+        user_id INTEGER,
+        status TEXT NOT NULL DEFAULT 'pending',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        next_attempt_at REAL NOT NULL DEFAULT 0,
+        last_error TEXT,
+        message_id INTEGER,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        sent_at TIMESTAMP
+    )
+    """)
+
+    # Navbatdagilar - chat bo'yicha tartib bilan (yuborilganlar indeksga kirmaydi)
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_outbox_pending
+    ON outbox(chat_id, id) WHERE status = 'pending'
+    """)
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_outbox_status
+    ON outbox(status, created_at)
+    """)
+
+
+def _task_evidence(cursor):
+    """11. Bajarilish dalillari - albomdagi har bir fayl alohida qator
+
+    task_completions da faqat birinchi fayl qoladi (media_type,
+    media_file_id); to'liq ro'yxat shu yerda, position tartibida.
+    Bajarilish kaliti - (task_id, user_id, completion_date). Mavjud
+    bajarilishlarning fayllari ko'chiriladi.
+    """
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS task_evidence (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        task_id INTEGER NOT NULL,
+        user_id INTEGER NOT NULL,
+        completion_date DATE NOT NULL,
+        position INTEGER NOT NULL,
+        media_type TEXT NOT NULL,
+        file_id TEXT NOT NULL,
+        file_unique_id TEXT,
+        media_group_id TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_task_evidence_completion
+    ON task_evidence(task_id, user_id, completion_date, position)
+    """)
+
+    cursor.execute("""
+        INSERT INTO task_evidence (task_id, user_id, completion_date, position, media_type, file_id)
+        SELECT task_id, user_id, completion_date, 0, media_type, media_file_id
+        FROM task_completions
+        WHERE media_file_id IS NOT NULL
+    """)
+
+
+# (versiya, tavsif, funksiya) - faqat oxiriga qo'shiladi, o'zgartirilmaydi!
+MIGRATIONS = [
+    (1, "Asosiy jadvallar", _initial_schema),
+    (2, "Asosiy so'rovlar uchun indekslar", _hot_query_indexes),
+    (3, "Kunlik yig'indi jadvali", _daily_user_stats),
+    (4, "User tarixi indekslari", _user_history_indexes),
+    (5, "Vazifa takrorlanish qoidalari", _task_recurrence),
+    (6, "Bajarilishlar arxivi", _completion_archives),
+    (7, "Sahifalash indekslari", _pagination_indexes),
+    (8, "To'liq matnli qidiruv", _full_text_search),
+    (9, "FSM holatlari", _fsm_states),
+    (10, "Guruh xabarlari navbati", _outbox),
+    (11, "Bajarilish dalillari", _task_evidence),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(conn):
+    """Joriy sxema versiyasi (jadval bo'lmasa 0)"""
+    try:
+        return conn.execute("SELECT MAX(version) FROM schema_version").fetchone()[0] or 0
+    except sqlite3.OperationalError:
+        return 0
+
+
+def migrate(conn):
+    """Qo'llanilmagan migratsiyalarni tartib bilan bajarish"""
+    current = get_schema_version(conn)
+
+    # Tez yo'l - sxema allaqachon yangi
+    if current >= LATEST_VERSION:
+        return current
+
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        description TEXT,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+
+    for version, description, step in MIGRATIONS:
+        if version <= current:
+            continue
+
+        # Har bir migratsiya alohida tranzaksiyada
+        cursor = conn.cursor()
+        try:
+            cursor.execute("BEGIN")
+            step(cursor)
+            cursor.execute(
+                "INSERT INTO schema_version (version, description) VALUES (?, ?)",
+                (version, description)
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+        print(f"✅ Migratsiya {version}: {description}")
+        current = version
+
+    return current
@@ -0,0 +1,182 @@
+# models.py
+"""
+Database qatorlari uchun ixcham yozuvlar
+"""
+
+import sys
+
+
+class Record:
+    """Jadval qatori - __slots__ asosida (dict siz, kam xotira)"""
+
+    __slots__ = ()
+
+    # Kam xil qiymatli matn maydonlari (filial/rol nomi, sana) - har bir
+    # qatorda yangi str yaratilmasin, bitta nusxa ishlatilsin
+    _interned = ()
+
+    def __init__(self, *values):
+        for name, value in zip(self.__slots__, values):
+            setattr(self, name, value)
+
+    @classmethod
+    def from_row(cls, row):
+        """Tuple qatordan yozuv yaratish (None bo'lsa None)"""
+        return cls(*row) if row is not None else None
+
+    @classmethod
+    def factory(cls, cursor, row):
+        """sqlite3 row_factory: cursor.row_factory = Task.factory"""
+        record = cls(*row)
+        for name in cls._interned:
+            value = getattr(record, name)
+            if type(value) is str:
+                setattr(record, name, sys.intern(value))
+        return record
+
+    def __iter__(self):
+        # Tuple kabi ochish mumkin: user_id, name, ... = record
+        return (getattr(self, name) for name in self.__slots__)
+
+    def __eq__(self, other):
+        return type(self) is type(other) and tuple(self) == tuple(other)
+
+    def __hash__(self):
+        return hash((type(self), tuple(self)))
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+class Filial(Record):
+    """Filial"""
+
+    __slots__ = ("id", "name")
+
+
+class Role(Record):
+    """Rol"""
+
+    __slots__ = ("id", "name")
+
+
+class User(Record):
+    """Foydalanuvchi (filial va rol nomlari bilan)"""
+
+    __slots__ = (
+        "id", "telegram_id", "full_name", "phone",
+        "filial_id", "filial_name", "role_id", "role_name", "is_admin"
+    )
+    _interned = ("filial_name", "role_name")
+
+
+class Worker(Record):
+    """Ishchilar ro'yxatidagi qator"""
+
+    __slots__ = ("id", "full_name", "phone", "filial_name", "role_name")
+    _interned = ("filial_name", "role_name")
+
+
+class Admin(Record):
+    """Admin (ism va telefon)"""
+
+    __slots__ = ("full_name", "phone")
+
+
+class Task(Record):
+    """Vazifa (rol va filial nomlari bilan)"""
+
+    __slots__ = ("id", "text", "task_type", "role_name", "filial_name")
+    _interned = ("task_type", "role_name", "filial_name")
+
+
+class UserTask(Record):
+    """User ning bugungi vazifasi va holati"""
+
+    __slots__ = ("id", "text", "task_type", "completed")
+    _interned = ("task_type",)
+
+
+class Completion(Record):
+    """Bajarilgan vazifa"""
+
+    __slots__ = (
+        "id", "task_id", "user_id", "completion_date", "completed_at",
+        "media_type", "media_file_id", "text_message"
+    )
+    _interned = ("completion_date", "media_type")
+
+
+class Evidence(Record):
+    """Bajarilish dalili - bitta fayl (albomda position tartibida)"""
+
+    __slots__ = ("position", "media_type", "file_id", "file_unique_id", "media_group_id")
+    _interned = ("media_type",)
+
+
+class StatsRow(Record):
+    """Statistika hisobidagi user qatori (bir kun uchun)"""
+
+    __slots__ = (
+        "filial_id", "user_id", "full_name", "role_id", "role_name",
+        "total", "completed"
+    )
+    _interned = ("role_name",)
+
+
+class RoleStats(Record):
+    """Rol bo'yicha kunlik statistika"""
+
+    __slots__ = ("role_id", "role_name", "user_count", "total", "completed")
+
+
+class UserDayStats(Record):
+    """User ning kunlik statistikasi"""
+
+    __slots__ = ("user_id", "full_name", "role_name", "total", "completed")
+
+
+class DayResult(Record):
+    """User tarixidagi bir kun"""
+
+    __slots__ = ("stat_date", "assigned", "completed")
+    _interned = ("stat_date",)
+
+
+class UserStatistics(Record):
+    """User ning yopilgan kunlar bo'yicha statistikasi"""
+
+    __slots__ = (
+        "week_assigned", "week_completed",
+        "month_assigned", "month_completed",
+        "mtd_assigned", "mtd_completed",
+        "streak", "rank", "filial_size"
+    )
+
+
+class OutboxMessage(Record):
+    """Guruhga yuborilishi kerak bo'lgan xabar (payload - JSON)"""
+
+    __slots__ = ("id", "chat_id", "method", "payload", "task_id", "user_id", "attempts")
+    _interned = ("method",)
+
+
+class OutboxStats(Record):
+    """Xabarlar navbati holati; oldest_pending - eng eski kutayotgani (UTC)"""
+
+    __slots__ = ("pending", "sent", "failed", "oldest_pending", "last_error")
+
+
+class Page(Record):
+    """Keyset sahifa: items - yozuvlar (id bo'yicha), has_prev / has_next"""
+
+    __slots__ = ("items", "has_prev", "has_next")
+
+    @property
+    def first_id(self):
+        return self.items[0].id if self.items else None
+
+    @property
+    def last_id(self):
+        return self.items[-1].id if self.items else None
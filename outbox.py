@@ -0,0 +1,218 @@
+# outbox.py
+"""
+Guruh xabarlari navbati (transactional outbox) - yetkazuvchi
+
+Ishchi vazifani topshirganda bajarilish va guruhga ketadigan xabar
+bitta tranzaksiyada yoziladi (adb.complete_task(..., outbox=...)) va
+ishchi Telegramni kutmasdan javob oladi. Xabarni shu yerdagi fon
+ishchisi yetkazadi:
+
+    - Navbat har OUTBOX_POLL_INTERVAL soniyada, yangi xabar bo'lsa
+      darhol (wake()) o'qiladi
+    - Bitta chat xabarlari id tartibida, ketma-ket; turli chatlar
+      parallel - sender.py orqali, flood limitlari ichida
+    - Vaqtinchalik xato - OUTBOX_BACKOFF * 2^urinish kutib qayta, chatning
+      qolgan xabarlari ham kutadi (tartib buzilmaydi)
+    - 400 / 403 / 404 yoki OUTBOX_MAX_ATTEMPTS urinishdan keyin - failed;
+      admin /outbox da ko'radi va qayta navbatga qo'yadi
+
+Yuborilgandan keyin, belgilanishidan oldin jarayon to'xtasa xabar
+qayta yuboriladi (kamida bir marta).
+"""
+
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime, timedelta
+
+from aiogram import Bot
+from aiogram.client.default import Default
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError, TelegramNotFound
+from aiogram.methods import (
+    CopyMessage, SendAudio, SendDocument, SendMediaGroup, SendMessage, SendPhoto, SendVideo, SendVoice
+)
+
+import config
+from database import adb
+from sender import Priority, sender
+
+logger = logging.getLogger(__name__)
+
+METHODS = {
+    cls.__name__: cls
+    for cls in (
+        CopyMessage, SendAudio, SendDocument, SendMediaGroup, SendMessage, SendPhoto, SendVideo, SendVoice
+    )
+}
+
+# Qayta urinishdan foyda yo'q - chat topilmadi, bot guruhdan chiqarilgan, ...
+PERMANENT_ERRORS = (TelegramBadRequest, TelegramForbiddenError, TelegramNotFound)
+
+# Qayta urinishlar orasidagi eng uzoq kutish va eski yozuvlarni tozalash (soniya)
+MAX_BACKOFF = 3600
+PURGE_INTERVAL = 3600
+
+
+def _plain(value):
+    """model_dump() natijasidan None va Default (bot sozlamasi, yuborishda
+    qo'yiladi) larni olib tashlash; InputMedia "type" maydoni qoladi"""
+    if isinstance(value, dict):
+        return {
+            key: _plain(item) for key, item in value.items()
+            if item is not None and not isinstance(item, Default)
+        }
+    if isinstance(value, list):
+        return [_plain(item) for item in value]
+    return value
+
+
+def outbox_entry(method):
+    """SendVideo(...) -> complete_task(outbox=...) uchun (chat_id, method, payload)"""
+    payload = _plain(method.model_dump())
+    return method.chat_id, type(method).__name__, json.dumps(payload, ensure_ascii=False)
+
+
+def build_method(message):
+    """OutboxMessage -> aiogram metod obyekti"""
+    return METHODS[message.method](**json.loads(message.payload))
+
+
+def _error_text(error):
+    return f"{type(error).__name__}: {getattr(error, 'message', error)}"[:500]
+
+
+class OutboxDelivery:
+    """Navbatdagi xabarlarni guruhlarga yetkazuvchi fon ishchisi"""
+
+    def __init__(self, database=adb,
+                 batch_size=config.OUTBOX_BATCH_SIZE,
+                 poll_interval=config.OUTBOX_POLL_INTERVAL,
+                 max_attempts=config.OUTBOX_MAX_ATTEMPTS,
+                 backoff=config.OUTBOX_BACKOFF,
+                 keep_days=config.OUTBOX_KEEP_DAYS):
+        self._db = database
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.keep_days = keep_days
+
+        self.bot = None
+        self.delivered = 0
+        self.failed = 0
+        self._wakeup = asyncio.Event()
+        self._task = None
+        self._stopping = False
+        self._last_purge = 0.0
+
+    @property
+    def running(self):
+        return self._task is not None and not self._task.done()
+
+    def start(self, bot: Bot):
+        """Yetkazuvchini ishga tushirish (event loop ichida)"""
+        self.bot = bot
+        if not self.running:
+            self._stopping = False
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    def wake(self):
+        """Yangi xabar yozildi - keyingi so'rovni kutmasdan yetkazish"""
+        self._wakeup.set()
+
+    async def stop(self, timeout=10):
+        """Tayyor xabarlarni yetkazib (ko'pi bilan timeout soniya) to'xtatish.
+
+        Qolganlari omborda turadi va keyingi ishga tushishda yuboriladi.
+        """
+        if self._task is None:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        try:
+            await asyncio.wait_for(self._task, timeout)
+        except asyncio.TimeoutError:
+            logger.warning("⚠️ Xabarlar navbati to'xtatildi, qolganlari keyingi ishga tushishda")
+        self._task = None
+
+    async def deliver_pending(self):
+        """Tayyor xabarlarni yetkazish, o'qilgan xabarlar soni qaytadi"""
+        messages = await self._db.get_pending_outbox(time.time(), self.batch_size)
+        chats = {}
+        for message in messages:
+            chats.setdefault(message.chat_id, []).append(message)
+        await asyncio.gather(*(self._deliver_chat(items) for items in chats.values()))
+        return len(messages)
+
+    async def _deliver_chat(self, messages):
+        for message in messages:
+            if not await self._deliver(message):
+                # Ortidagilar tartib uchun shu xabarni kutadi
+                break
+
+    async def _deliver(self, message):
+        """Bitta xabar; chatning keyingi xabariga o'tish mumkin bo'lsa True"""
+        try:
+            method = build_method(message)
+        except (KeyError, ValueError, TypeError) as e:
+            await self._fail(message, e, retry=False)
+            return True
+
+        try:
+            result = await sender.send(self.bot, method, Priority.NORMAL)
+        except PERMANENT_ERRORS as e:
+            await self._fail(message, e, retry=False)
+            return True
+        except Exception as e:
+            retry = message.attempts + 1 < self.max_attempts
+            await self._fail(message, e, retry=retry)
+            return not retry
+
+        # send_media_group - xabarlar ro'yxati, birinchisi saqlanadi
+        first = result[0] if isinstance(result, list) and result else result
+        await self._db.mark_outbox_sent(message.id, getattr(first, "message_id", None))
+        self.delivered += 1
+        return True
+
+    async def _fail(self, message, error, retry):
+        text = _error_text(error)
+        if retry:
+            delay = min(self.backoff * 2 ** message.attempts, MAX_BACKOFF)
+            await self._db.mark_outbox_failed(message.id, text, time.time() + delay)
+            logger.warning(f"⚠️ Xabar {message.id} ({message.chat_id}): {delay:.1f} s dan keyin qayta - {text}")
+        else:
+            self.failed += 1
+            await self._db.mark_outbox_failed(message.id, text)
+            logger.error(f"❌ Xabar {message.id} ({message.chat_id}) yuborilmadi: {text}")
+
+    async def purge(self):
+        """OUTBOX_KEEP_DAYS dan eski yuborilgan xabarlarni o'chirish"""
+        before = datetime.utcnow() - timedelta(days=self.keep_days)
+        self._last_purge = time.monotonic()
+        return await self._db.purge_outbox(before.strftime("%Y-%m-%d %H:%M:%S"))
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            fetched = 0
+            try:
+                fetched = await self.deliver_pending()
+                if time.monotonic() - self._last_purge > PURGE_INTERVAL:
+                    await self.purge()
+            except Exception as e:
+                logger.error(f"❌ Xabarlar navbatida xatolik: {e}")
+
+            if self._stopping:
+                return
+            # To'liq o'qildi - navbatda yana bor
+            if fetched >= self.batch_size:
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+
+outbox = OutboxDelivery()
@@ -0,0 +1,225 @@
+# recurrence.py
+"""
+Vazifa takrorlanish qoidalari (jadval)
+
+Qoida matni (tasks.recurrence):
+    daily                 - har kuni
+    weekly:0,3            - haftaning kunlari (0 = Dushanba ... 6 = Yakshanba)
+    every:3:2026-10-01    - boshlanish sanasidan har N kunda
+    monthday:1,15,-1      - oyning kunlari (-1 = oxirgi kun)
+    nthweekday:2:0        - oyning N-hafta kuni (2-Dushanba; -1 = oxirgi)
+
+Har bir qoida bitmask larga kompilyatsiya qilinadi va tasks jadvalida
+saqlanadi. Sana uchun "imzo" (signature) hisoblanadi, so'ng vazifa
+mosligi bitta bitwise AND bilan SQL ichida tekshiriladi.
+"""
+
+import calendar
+from datetime import date
+
+import config
+
+
+# Eski vazifa turlari -> qoida
+LEGACY_RULES = {
+    "daily": "daily",
+    "monday": "weekly:0",
+    "monthly": "monthday:1",
+}
+
+# Foydalanuvchi kiritadigan hafta kunlari qisqartmalari
+WEEKDAY_ALIASES = {
+    "du": 0, "dush": 0, "dushanba": 0,
+    "se": 1, "sesh": 1, "seshanba": 1,
+    "chor": 2, "chorshanba": 2,
+    "pay": 3, "pa": 3, "payshanba": 3,
+    "ju": 4, "juma": 4,
+    "sha": 5, "shan": 5, "shanba": 5,
+    "yak": 6, "yakshanba": 6,
+}
+
+# Oxirgi hafta kuni uchun bitlar (5 * 7 dan keyin)
+_LAST_WEEKDAY_SHIFT = 35
+
+
+class RuleError(ValueError):
+    """Noto'g'ri takrorlanish qoidasi"""
+
+
+def _int_list(text):
+    try:
+        return [int(part) for part in text.split(",") if part.strip()]
+    except ValueError:
+        raise RuleError(f"Raqamlar noto'g'ri: {text}")
+
+
+def compile_rule(rule):
+    """Qoidani bitmask larga aylantirish.
+
+    Natija: (weekday_mask, monthday_mask, nth_weekday_mask, interval_days, anchor_day)
+    """
+    rule = LEGACY_RULES.get(rule, rule)
+    kind, _, args = rule.partition(":")
+
+    weekday_mask = monthday_mask = nth_weekday_mask = 0
+    interval_days = anchor_day = 0
+
+    if kind == "daily":
+        weekday_mask = 0b1111111
+
+    elif kind == "weekly":
+        for weekday in _int_list(args):
+            if not 0 <= weekday <= 6:
+                raise RuleError(f"Hafta kuni 0-6 oralig'ida bo'lishi kerak: {weekday}")
+            weekday_mask |= 1 << weekday
+
+    elif kind == "every":
+        interval, _, anchor = args.partition(":")
+        try:
+            interval_days = int(interval)
+            anchor_day = date.fromisoformat(anchor).toordinal()
+        except ValueError:
+            raise RuleError(f"Qoida noto'g'ri: {rule}")
+        if interval_days < 1:
+            raise RuleError("Kunlar oralig'i 1 dan kichik bo'lmasligi kerak")
+
+    elif kind == "monthday":
+        for day in _int_list(args):
+            if day == -1:
+                monthday_mask |= 1  # 0-bit - oyning oxirgi kuni
+            elif 1 <= day <= 31:
+                monthday_mask |= 1 << day
+            else:
+                raise RuleError(f"Oy kuni 1-31 yoki -1 bo'lishi kerak: {day}")
+
+    elif kind == "nthweekday":
+        nth, _, weekday = args.partition(":")
+        try:
+            nth, weekday = int(nth), int(weekday)
+        except ValueError:
+            raise RuleError(f"Qoida noto'g'ri: {rule}")
+        if not 0 <= weekday <= 6 or not (1 <= nth <= 5 or nth == -1):
+            raise RuleError(f"Qoida noto'g'ri: {rule}")
+        if nth == -1:
+            nth_weekday_mask = 1 << (_LAST_WEEKDAY_SHIFT + weekday)
+        else:
+            nth_weekday_mask = 1 << ((nth - 1) * 7 + weekday)
+
+    else:
+        raise RuleError(f"Noma'lum qoida: {rule}")
+
+    if not (weekday_mask or monthday_mask or nth_weekday_mask or interval_days):
+        raise RuleError(f"Qoida bo'sh: {rule}")
+
+    return weekday_mask, monthday_mask, nth_weekday_mask, interval_days, anchor_day
+
+
+def date_signature(target_date):
+    """Sana imzosi: (weekday_bit, monthday_bits, nth_weekday_bits, ordinal)"""
+    weekday = target_date.weekday()
+    days_in_month = calendar.monthrange(target_date.year, target_date.month)[1]
+
+    monthday_bits = 1 << target_date.day
+    if target_date.day == days_in_month:
+        monthday_bits |= 1
+
+    nth_weekday_bits = 1 << ((target_date.day - 1) // 7 * 7 + weekday)
+    if target_date.day + 7 > days_in_month:
+        nth_weekday_bits |= 1 << (_LAST_WEEKDAY_SHIFT + weekday)
+
+    return 1 << weekday, monthday_bits, nth_weekday_bits, target_date.toordinal()
+
+
+def applicable_sql(alias, target_date):
+    """Vazifa shu sanada bajarilishi kerakligi sharti: (sql, params)"""
+    weekday_bit, monthday_bits, nth_weekday_bits, ordinal = date_signature(target_date)
+    sql = f"""(
+        ({alias}.weekday_mask & ?) != 0
+        OR ({alias}.monthday_mask & ?) != 0
+        OR ({alias}.nth_weekday_mask & ?) != 0
+        OR ({alias}.interval_days > 0 AND ? >= {alias}.anchor_day
+            AND (? - {alias}.anchor_day) % {alias}.interval_days = 0)
+    )"""
+    return sql, (weekday_bit, monthday_bits, nth_weekday_bits, ordinal, ordinal)
+
+
+def is_applicable(rule, target_date):
+    """Python tomonda tekshirish (SQL bilan bir xil mantiq)"""
+    return matches(compile_rule(rule), date_signature(target_date))
+
+
+def matches(masks, signature):
+    """Kompilyatsiya qilingan qoida sana imzosiga mosmi"""
+    weekday_mask, monthday_mask, nth_weekday_mask, interval_days, anchor_day = masks
+    weekday_bit, monthday_bits, nth_weekday_bits, ordinal = signature
+    return bool(
+        weekday_mask & weekday_bit
+        or monthday_mask & monthday_bits
+        or nth_weekday_mask & nth_weekday_bits
+        or (interval_days and ordinal >= anchor_day and (ordinal - anchor_day) % interval_days == 0)
+    )
+
+
+def parse_rule(text, today=None):
+    """Admin kiritgan matnni qoidaga aylantirish.
+
+    Misollar:
+        du,chor,ju      -> weekly:0,2,4
+        har 3 kun       -> every:3:<bugun>
+        oy 1,15         -> monthday:1,15
+        oy oxiri        -> monthday:-1
+        oy 2-du         -> nthweekday:2:0
+        oy oxirgi-ju    -> nthweekday:-1:4
+    """
+    today = today or date.today()
+    words = text.lower().replace(" ,", ",").replace(", ", ",").split()
+    if not words:
+        raise RuleError("Qoida bo'sh")
+
+    if words[0] == "har" and len(words) >= 2 and words[1].isdigit():
+        rule = f"every:{int(words[1])}:{today.isoformat()}"
+
+    elif words[0] == "oy" and len(words) == 2:
+        arg = words[1]
+        if "-" in arg and not arg.lstrip("-").isdigit():
+            nth, _, weekday = arg.partition("-")
+            if weekday not in WEEKDAY_ALIASES:
+                raise RuleError(f"Hafta kuni noma'lum: {weekday}")
+            nth = -1 if nth == "oxirgi" else nth
+            rule = f"nthweekday:{nth}:{WEEKDAY_ALIASES[weekday]}"
+        else:
+            days = ["-1" if day == "oxiri" else day for day in arg.split(",")]
+            rule = f"monthday:{','.join(days)}"
+
+    elif len(words) == 1 and all(part in WEEKDAY_ALIASES for part in words[0].split(",")):
+        weekdays = sorted({WEEKDAY_ALIASES[part] for part in words[0].split(",")})
+        rule = f"weekly:{','.join(map(str, weekdays))}"
+
+    else:
+        raise RuleError(f"Qoida tushunarsiz: {text}")
+
+    compile_rule(rule)  # tekshirish
+    return rule
+
+
+def describe(rule):
+    """Qoidani o'zbekcha matn ko'rinishida"""
+    if rule in config.TASK_TYPES and rule in LEGACY_RULES:
+        return config.TASK_TYPES[rule]
+
+    kind, _, args = rule.partition(":")
+    if kind == "daily":
+        return "Har kuni"
+    if kind == "weekly":
+        return "Har hafta: " + ", ".join(config.WEEKDAYS[int(d)] for d in args.split(","))
+    if kind == "every":
+        interval, _, anchor = args.partition(":")
+        return f"Har {interval} kunda ({date.fromisoformat(anchor).strftime('%d.%m.%Y')} dan)"
+    if kind == "monthday":
+        days = ["oxirgi kuni" if d == "-1" else d for d in args.split(",")]
+        return "Har oy: " + ", ".join(days)
+    if kind == "nthweekday":
+        nth, _, weekday = args.partition(":")
+        nth_text = "oxirgi" if nth == "-1" else f"{nth}-"
+        return f"Har oyning {nth_text} {config.WEEKDAYS[int(weekday)]}si".replace("- ", "-")
+    return rule
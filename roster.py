@@ -0,0 +1,177 @@
+# roster.py
+"""
+Ishchilar ro'yxatini fayldan o'qish (CSV / XLSX) - ommaviy import
+
+Ustunlar (sarlavha bilan yoki shu tartibda, sarlavhasiz):
+
+    Ism | Telefon | Filial | Rol
+
+Filial va rol nomi yoki ID si bilan yozilishi mumkin. Telefon
+998901234567, +998 90 123 45 67 yoki 901234567 ko'rinishida.
+XLSX uchun openpyxl kerak (requirements.txt); CSV usiz ham ishlaydi.
+"""
+
+import csv
+import io
+import re
+
+import config
+
+try:
+    import openpyxl
+except ImportError:  # faqat CSV import ishlaydi
+    openpyxl = None
+
+
+# Sarlavha nomlari -> ustun (kichik harflarda)
+HEADERS = {
+    "full_name": {"ism", "ism familiya", "fio", "f.i.o", "full_name", "name"},
+    "phone": {"telefon", "tel", "phone", "telefon raqam"},
+    "filial": {"filial", "filial_id", "branch"},
+    "role": {"rol", "role", "role_id", "lavozim"},
+}
+COLUMNS = ("full_name", "phone", "filial", "role")
+
+_PHONE_NOISE = re.compile(r"[\s+()\-]")
+
+
+class RosterError(ValueError):
+    """Faylni umuman o'qib bo'lmadi (format, kodlash, hajm)"""
+
+
+def _decode(content):
+    for encoding in ("utf-8-sig", "cp1251"):
+        try:
+            return content.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+    raise RosterError("Fayl kodlashi noma'lum (UTF-8 da saqlang)")
+
+
+def _read_csv(content):
+    text = _decode(content)
+    try:
+        dialect = csv.Sniffer().sniff(text[:4096], delimiters=",;\t")
+    except csv.Error:
+        dialect = csv.excel
+    return list(csv.reader(io.StringIO(text), dialect))
+
+
+def _read_xlsx(content):
+    if openpyxl is None:
+        raise RosterError("XLSX o'qish uchun openpyxl o'rnatilmagan - CSV yuboring")
+    try:
+        workbook = openpyxl.load_workbook(io.BytesIO(content), read_only=True, data_only=True)
+    except Exception as e:
+        raise RosterError(f"XLSX faylni ochib bo'lmadi: {e}")
+    try:
+        sheet = workbook.worksheets[0]
+        return [
+            ["" if value is None else str(value) for value in row]
+            for row in sheet.iter_rows(values_only=True)
+        ]
+    finally:
+        workbook.close()
+
+
+def read_rows(filename, content):
+    """Fayl -> [(qator raqami, {ustun: matn}), ...] (bo'sh qatorlarsiz)"""
+    name = (filename or "").lower()
+    if name.endswith(".xlsx"):
+        table = _read_xlsx(content)
+    elif name.endswith((".csv", ".txt")):
+        table = _read_csv(content)
+    else:
+        raise RosterError("Faqat .csv yoki .xlsx fayl qabul qilinadi")
+
+    # Birinchi qator sarlavha bo'lsa - ustunlar tartibi undan olinadi
+    positions = dict(zip(COLUMNS, range(len(COLUMNS))))
+    start = 0
+    if table:
+        header = [cell.strip().lower() for cell in table[0]]
+        found = {
+            column: header.index(title)
+            for column, titles in HEADERS.items()
+            for title in titles if title in header
+        }
+        if found:
+            missing = [column for column in COLUMNS if column not in found]
+            if missing:
+                raise RosterError(f"Sarlavhada ustun yo'q: {', '.join(missing)}")
+            positions, start = found, 1
+
+    rows = []
+    for line, cells in enumerate(table[start:], start + 1):
+        cells = [cell.strip() for cell in cells]
+        if not any(cells):
+            continue
+        rows.append((line, {
+            column: cells[index] if index < len(cells) else ""
+            for column, index in positions.items()
+        }))
+
+    if len(rows) > config.IMPORT_MAX_ROWS:
+        raise RosterError(f"Qatorlar juda ko'p: {len(rows)} (ko'pi bilan {config.IMPORT_MAX_ROWS})")
+    return rows
+
+
+def normalize_phone(text):
+    """Telefon -> 998XXXXXXXXX (int) yoki None"""
+    digits = _PHONE_NOISE.sub("", text or "")
+    if digits.endswith(".0"):  # Excel raqam katakchasi
+        digits = digits[:-2]
+    if len(digits) == 9 and digits.isdigit():
+        digits = "998" + digits
+    if len(digits) != 12 or not digits.isdigit() or not digits.startswith("998"):
+        return None
+    return int(digits)
+
+
+def _lookup(value, records):
+    """Nomi yoki ID si bo'yicha topish (katta-kichik harf farqsiz)"""
+    value = value.strip()
+    for record in records:
+        if value == str(record.id) or value.lower() == record.name.lower():
+            return record.id
+    return None
+
+
+def validate(rows, filials, roles):
+    """Qatorlarni tekshirish (ombordagi userlarsiz).
+
+    Natija: (yaroqli [(qator, ism, telefon, filial_id, role_id)], xatolar [(qator, sabab)])
+    """
+    valid = []
+    errors = []
+    seen = {}
+
+    for line, row in rows:
+        full_name = " ".join(row["full_name"].split())
+        phone = normalize_phone(row["phone"])
+        filial_id = _lookup(row["filial"], filials)
+        role_id = _lookup(row["role"], roles)
+
+        if len(full_name) < 3:
+            errors.append((line, "Ism juda qisqa"))
+        elif phone is None:
+            errors.append((line, f"Telefon noto'g'ri: {row['phone'] or '-'}"))
+        elif phone in seen:
+            errors.append((line, f"Telefon faylda takrorlangan ({seen[phone]}-qator bilan)"))
+        elif filial_id is None:
+            errors.append((line, f"Filial topilmadi: {row['filial'] or '-'}"))
+        elif role_id is None:
+            errors.append((line, f"Rol topilmadi: {row['role'] or '-'}"))
+        else:
+            seen[phone] = line
+            valid.append((line, full_name, phone, filial_id, role_id))
+
+    return valid, errors
+
+
+def errors_csv(errors):
+    """Xatolar hisobotini CSV (bytes) ko'rinishida"""
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(("Qator", "Sabab"))
+    writer.writerows(errors)
+    return output.getvalue().encode("utf-8-sig")
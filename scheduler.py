@@ -1,14 +1,16 @@
 # scheduler.py
 """
-Avtomatik xabarlar - kunlik statistika
+Avtomatik xabarlar - kunlik statistika, zaxira nusxa, xizmat ishlari va oylik arxiv
 """
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 from datetime import datetime, timedelta, date
 from aiogram import Bot
+from aiogram.methods import SendMessage
 
-from database import db
+from database import adb
+from sender import Priority, sender
 from utils import format_daily_statistics
 import config
 
@@ -20,19 +22,26 @@ async def send_daily_statistics(bot: Bot):
     # Kechagi sana
     yesterday = date.today() - timedelta(days=1)
     
-    # Har bir filial uchun
-    filials = db.get_all_filials()
+    # Kechagi kunni yopish - statistika endi rollup dan o'qiladi
+    await adb.refresh_daily_stats(yesterday)
     
-    for filial_id, filial_name in filials:
+    # Barcha filiallar statistikasi bitta o'tishda
+    filials = await adb.get_all_filials()
+    group_chats = await adb.get_all_group_chats()
+    statistics = await adb.get_all_daily_statistics(yesterday)
+    
+    for filial in filials:
+        filial_name = filial.name
+        
         # Guruh chat_id ni olish
-        group_chat_id = db.get_group_chat_id(filial_id)
+        group_chat_id = group_chats.get(filial.id)
         
         if not group_chat_id:
             print(f"⚠️ Filial {filial_name} uchun guruh topilmadi!")
             continue
         
         # Statistika ma'lumotlarini olish
-        role_stats, user_stats = db.get_daily_statistics(filial_id, yesterday)
+        role_stats, user_stats = statistics.get(filial.id, ([], []))
         
         if not user_stats:
             # Bu filialda ishchilar yo'q
@@ -48,14 +57,42 @@ async def send_daily_statistics(bot: Bot):
         
         # Guruhga yuborish
         try:
-            await bot.send_message(
+            await sender.send(bot, SendMessage(
                 chat_id=group_chat_id,
                 text=stats_message
-            )
+            ), Priority.LOW)
             print(f"✅ {filial_name} uchun statistika yuborildi")
         except Exception as e:
             print(f"❌ {filial_name} ga statistika yuborishda xatolik: {e}")
 
+async def archive_completions():
+    """Har oyning 1-kuni eski oylarni arxiv fayllarga ko'chirish"""
+    try:
+        moved = await adb.archive_completions()
+        print(f"✅ Arxivlash tugadi: {moved} ta qator ko'chirildi")
+    except Exception as e:
+        print(f"❌ Arxivlashda xatolik: {e}")
+
+async def backup_database():
+    """Har kuni zaxira nusxa olish (bot to'xtamaydi)"""
+    try:
+        result = await adb.backup()
+        if result is not None:
+            print(f"✅ Zaxira nusxa: {result.path} ({result.size // 1024} KB, {result.duration:.1f} s)")
+    except Exception as e:
+        print(f"❌ Zaxira nusxa olishda xatolik: {e}")
+
+async def run_maintenance():
+    """Har kuni tunda ANALYZE, vacuum va WAL checkpoint (thread pool da)"""
+    try:
+        steps = await adb.run_maintenance()
+        for step in steps:
+            print(f"🧹 {step}")
+        reclaimed = sum(step.reclaimed for step in steps)
+        print(f"✅ Xizmat ishlari tugadi: {reclaimed // 1024} KB bo'shatildi")
+    except Exception as e:
+        print(f"❌ Xizmat ishlarida xatolik: {e}")
+
 def setup_scheduler(bot: Bot):
     """Schedulerni sozlash"""
     
@@ -69,6 +106,33 @@ def setup_scheduler(bot: Bot):
         replace_existing=True
     )
     
+    # Har kuni tunda (kam yuklama vaqti)
+    scheduler.add_job(
+        backup_database,
+        trigger=CronTrigger(hour=config.BACKUP_HOUR, minute=0),
+        id='backup_database',
+        name='Zaxira nusxa',
+        replace_existing=True
+    )
+    
+    # Zaxira nusxadan keyin - statistika, bo'sh joy, WAL
+    scheduler.add_job(
+        run_maintenance,
+        trigger=CronTrigger(hour=config.MAINTENANCE_HOUR, minute=0),
+        id='run_maintenance',
+        name='Xizmat ishlari',
+        replace_existing=True
+    )
+    
+    # Har oyning 1-kuni soat 03:00 da (kam yuklama vaqti)
+    scheduler.add_job(
+        archive_completions,
+        trigger=CronTrigger(day=1, hour=3, minute=0),
+        id='archive_completions',
+        name='Bajarilishlarni arxivlash',
+        replace_existing=True
+    )
+    
     # Test uchun - har 10 daqiqada (ISHLATISHDAN OLDIN O'CHIRIB QO'YISH KERAK!)
     # scheduler.add_job(
     #     send_daily_statistics,
@@ -81,6 +145,9 @@ def setup_scheduler(bot: Bot):
     
     print("✅ Scheduler sozlandi:")
     print("   - Kunlik statistika: Har kuni 00:00")
+    print(f"   - Zaxira nusxa: Har kuni {config.BACKUP_HOUR:02d}:00")
+    print(f"   - Xizmat ishlari: Har kuni {config.MAINTENANCE_HOUR:02d}:00")
+    print("   - Arxivlash: Har oyning 1-kuni 03:00")
     
     scheduler.start()
     print("✅ Scheduler ishga tushdi!")
@@ -0,0 +1,43 @@
+# search.py
+"""
+Ishchilar va vazifalar bo'yicha qidiruv (SQLite FTS5)
+
+Indekslar (migratsiya 8): users_fts(full_name, phone, phone_local) va
+tasks_fts(text) - triggerlar orqali asosiy jadvallar bilan sinxron.
+Har bir so'z prefiks sifatida qidiriladi, barcha so'zlar bo'lishi shart:
+
+    "ali kas"      -> "ali"* "kas"*
+    "+998 90 123"  -> "99890123"*   (raqam - bitta token)
+    "901234"       -> phone_local (998 siz) prefiksi bo'yicha topiladi
+"""
+
+import re
+
+_WORD = re.compile(r"\w+")
+_PHONE_NOISE = re.compile(r"[\s+()\-]")
+
+
+def tokens(text):
+    """Qidiruv so'zlari (kichik harflarda); telefon raqami bitta token"""
+    text = (text or "").strip()
+    digits = _PHONE_NOISE.sub("", text)
+    if digits.isdigit():
+        return [digits]
+    return [word.lower() for word in _WORD.findall(text)]
+
+
+def match_query(text):
+    """Foydalanuvchi matni -> FTS5 MATCH ifodasi (bo'sh bo'lsa None).
+
+    So'zlar qo'shtirnoq ichida - FTS5 operatorlari (AND, NEAR, *, ...)
+    foydalanuvchi matnidan kelib chiqmaydi.
+    """
+    words = tokens(text)
+    if not words:
+        return None
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def phone_local(phone):
+    """998901234567 -> "901234567" (mahalliy raqam bo'yicha qidirish uchun)"""
+    return str(phone)[-9:]
@@ -0,0 +1,268 @@
+# sender.py
+"""
+Chiquvchi xabarlar navbati - Telegram flood limitlari ichida yuborish
+
+Barcha bot.send_* chaqiruvlari shu yerdan o'tadi:
+
+    await sender.send(bot, SendMessage(chat_id=..., text=...), Priority.LOW)
+
+    - Token bucket: umumiy (SEND_GLOBAL_RATE / s) va har bir chat uchun -
+      guruhlarga SEND_GROUP_RATE / daqiqa, shaxsiy chatlarga SEND_CHAT_RATE / s
+    - Bitta chatga bir vaqtda bitta so'rov - xabarlar tartibi saqlanadi
+    - Ustuvorlik: HIGH (foydalanuvchi kutyapti) > NORMAL > LOW (statistika)
+    - TelegramRetryAfter - chat aytilgan muddatga to'xtatiladi va xabar
+      navbat boshiga qaytadi; tarmoq / 5xx xatolari - eksponensial kutish,
+      ko'pi bilan SEND_MAX_RETRIES marta; boshqa xatolar darhol qaytadi
+
+Navbat ishga tushirilmagan bo'lsa (manage.py, testlar) xabar to'g'ridan
+to'g'ri yuboriladi.
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from enum import IntEnum
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramNetworkError, TelegramRetryAfter, TelegramServerError
+
+import config
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(IntEnum):
+    HIGH = 0    # foydalanuvchi javob kutyapti
+    NORMAL = 1  # vazifa bajarilishi guruhga
+    LOW = 2     # kunlik statistika, ommaviy xabarlar
+
+
+class TokenBucket:
+    """rate - soniyasiga token, capacity - ketma-ket yuborish mumkin bo'lgan soni"""
+
+    __slots__ = ("rate", "capacity", "tokens", "updated", "blocked_until")
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now):
+        """Keyingi token uchun kutish (0 - hozir bor)"""
+        self._refill(now)
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self, now):
+        self._refill(now)
+        self.tokens -= 1
+
+    def block(self, until):
+        """RetryAfter / qayta urinish - shu vaqtgacha yubormaslik"""
+        self.blocked_until = max(self.blocked_until, until)
+
+    def idle(self, now):
+        self._refill(now)
+        return self.tokens >= self.capacity and now >= self.blocked_until
+
+
+class _Job:
+    __slots__ = ("bot", "method", "future", "attempts")
+
+    def __init__(self, bot, method, future):
+        self.bot = bot
+        self.method = method
+        self.future = future
+        self.attempts = 0
+
+
+def chat_key(chat_id):
+    """"-100123" va -100123 - bitta chat"""
+    try:
+        return int(chat_id)
+    except (TypeError, ValueError):
+        return chat_id
+
+
+class OutboundSender:
+    """Ustuvorlikli, chat bo'yicha cheklangan yuborish navbati"""
+
+    def __init__(self, global_rate=config.SEND_GLOBAL_RATE,
+                 group_rate=config.SEND_GROUP_RATE,
+                 chat_rate=config.SEND_CHAT_RATE,
+                 chat_burst=config.SEND_CHAT_BURST,
+                 concurrency=config.SEND_CONCURRENCY,
+                 max_retries=config.SEND_MAX_RETRIES,
+                 backoff=config.SEND_BACKOFF):
+        self.group_rate = group_rate / 60
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.backoff = backoff
+        # Sig'im 1 - istalgan 1 soniyada global_rate dan oshmaydi
+        self._global = TokenBucket(global_rate, 1)
+
+        self._seq = itertools.count()
+        self._queues = {}    # chat -> heap [(priority, seq, job)]
+        self._buckets = {}   # chat -> TokenBucket
+        self._busy = set()   # so'rovi yo'lda bo'lgan chatlar
+        self._requests = set()
+        self._wakeup = asyncio.Event()
+        self._task = None
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+
+    @property
+    def running(self):
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """Navbatni ishga tushirish (event loop ichida)"""
+        if not self.running:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self, timeout=10):
+        """Navbatdagilarni yuborib (ko'pi bilan timeout soniya) to'xtatish"""
+        if self._task is None:
+            return
+        deadline = time.monotonic() + timeout
+        while (self._queues or self._busy) and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        for heap in self._queues.values():
+            for _, _, job in heap:
+                if not job.future.done():
+                    job.future.set_exception(RuntimeError("Yuborish navbati to'xtatildi"))
+        self._queues.clear()
+
+    def pending(self):
+        return sum(len(heap) for heap in self._queues.values()) + len(self._busy)
+
+    async def send(self, bot: Bot, method, priority=Priority.NORMAL):
+        """Navbat orqali yuborish va natijani kutish"""
+        if not self.running:
+            return await bot(method)
+        return await self.submit(bot, method, priority)
+
+    def submit(self, bot: Bot, method, priority=Priority.NORMAL):
+        """Navbatga qo'yish, natija - Future (kutmasa ham bo'ladi)"""
+        future = asyncio.get_running_loop().create_future()
+        self._push(chat_key(method.chat_id), _Job(bot, method, future), priority, next(self._seq))
+        return future
+
+    def _push(self, chat, job, priority, seq):
+        heapq.heappush(self._queues.setdefault(chat, []), (priority, seq, job))
+        self._wakeup.set()
+
+    def _bucket(self, chat):
+        bucket = self._buckets.get(chat)
+        if bucket is None:
+            is_group = isinstance(chat, int) and chat < 0
+            rate = self.group_rate if is_group else self.chat_rate
+            bucket = TokenBucket(rate, self.chat_burst)
+            self._buckets[chat] = bucket
+        return bucket
+
+    def _dispatch(self):
+        """Tayyor xabarlarni yuborish; keyingi tekshiruvgacha kutish (None - hodisagacha)"""
+        while True:
+            now = time.monotonic()
+            best = None
+            wait = None
+            for chat, heap in self._queues.items():
+                if chat in self._busy:
+                    continue
+                delay = self._bucket(chat).wait_time(now)
+                if delay > 0:
+                    wait = delay if wait is None else min(wait, delay)
+                elif best is None or heap[0][:2] < self._queues[best][0][:2]:
+                    best = chat
+
+            if best is None or len(self._busy) >= self.concurrency:
+                return wait
+            delay = self._global.wait_time(now)
+            if delay > 0:
+                return delay
+
+            self._global.take(now)
+            self._bucket(best).take(now)
+            priority, seq, job = heapq.heappop(self._queues[best])
+            if not self._queues[best]:
+                del self._queues[best]
+            self._busy.add(best)
+            request = asyncio.create_task(self._execute(best, priority, seq, job))
+            self._requests.add(request)
+            request.add_done_callback(self._requests.discard)
+
+    async def _execute(self, chat, priority, seq, job):
+        try:
+            result = await job.bot(job.method)
+        except TelegramRetryAfter as e:
+            self._retry(chat, priority, seq, job, e.retry_after, e)
+        except (TelegramNetworkError, TelegramServerError) as e:
+            delay = min(self.backoff * 2 ** job.attempts, 60)
+            self._retry(chat, priority, seq, job, delay, e)
+        except Exception as e:
+            self.failed += 1
+            if not job.future.done():
+                job.future.set_exception(e)
+        else:
+            self.sent += 1
+            if not job.future.done():
+                job.future.set_result(result)
+        finally:
+            self._busy.discard(chat)
+            self._wakeup.set()
+
+    def _retry(self, chat, priority, seq, job, delay, error):
+        job.attempts += 1
+        if job.attempts > self.max_retries:
+            self.failed += 1
+            logger.error(f"❌ {chat} ga yuborilmadi ({job.attempts} urinish): {error}")
+            if not job.future.done():
+                job.future.set_exception(error)
+            return
+        self.retried += 1
+        logger.warning(f"⚠️ {chat}: {delay:.1f} s dan keyin qayta urinish ({type(error).__name__})")
+        self._bucket(chat).block(time.monotonic() + delay)
+        # Eski seq bilan - chat ichidagi tartib buzilmaydi
+        self._push(chat, job, priority, seq)
+
+    def _cleanup(self):
+        now = time.monotonic()
+        for chat in [chat for chat, bucket in self._buckets.items()
+                     if chat not in self._queues and chat not in self._busy and bucket.idle(now)]:
+            del self._buckets[chat]
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            wait = self._dispatch()
+            if not self._queues and not self._busy:
+                self._cleanup()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), wait)
+            except asyncio.TimeoutError:
+                pass
+
+
+sender = OutboundSender()
@@ -0,0 +1,244 @@
+# storage.py
+"""
+Ma'lumotlar ombori interfeysi
+
+Handlerlar, klaviaturalar va scheduler faqat shu metodlarga tayanadi.
+Amalga oshirishlar:
+    database.Database           - SQLite (asosiy)
+    memory_storage.MemoryDatabase - xotirada (testlar va benchmarklar uchun)
+
+Qaysi biri ishlatilishi config.STORAGE_BACKEND bilan tanlanadi.
+SQLite ga xos imkoniyatlar (ulanishlar puli, guruhli commit,
+migratsiyalar) interfeysga kirmaydi.
+"""
+
+from abc import ABC, abstractmethod
+
+
+class Storage(ABC):
+    """Ma'lumotlar ombori - barcha metodlar sinxron (AsyncDatabase o'raydi)"""
+
+    # ===== FILIAL VA ROLLAR =====
+
+    @abstractmethod
+    def get_all_filials(self):
+        """Barcha filiallar: [Filial, ...]"""
+
+    @abstractmethod
+    def get_filial(self, filial_id):
+        """Bitta filial (topilmasa None)"""
+
+    @abstractmethod
+    def get_all_roles(self):
+        """Barcha rollar: [Role, ...]"""
+
+    @abstractmethod
+    def get_role(self, role_id):
+        """Bitta rol (topilmasa None)"""
+
+    # ===== USERLAR =====
+
+    @abstractmethod
+    def create_user(self, full_name, phone, filial_id, role_id, is_admin=False):
+        """Yangi user yaratish, ID qaytaradi"""
+
+    @abstractmethod
+    def import_users(self, rows):
+        """Ko'p userni bitta tranzaksiyada qo'shish: (qo'shilganlar soni, {band telefon: faolmi})"""
+
+    @abstractmethod
+    def get_user_by_phone(self, phone):
+        """Faol userni telefon bo'yicha topish: User yoki None"""
+
+    @abstractmethod
+    def get_user_by_telegram_id(self, telegram_id):
+        """Faol userni Telegram ID bo'yicha topish: User yoki None"""
+
+    @abstractmethod
+    def update_user_telegram_id(self, phone, telegram_id):
+        """User ga Telegram ID biriktirish"""
+
+    @abstractmethod
+    def get_all_users(self, filial_id=None):
+        """Faol userlar: [Worker, ...]"""
+
+    @abstractmethod
+    def get_users_page(self, filial_id=None, after_id=None, before_id=None, limit=None):
+        """Faol userlar sahifasi (id bo'yicha keyset): Page[Worker]"""
+
+    @abstractmethod
+    def search_users(self, text, limit=None):
+        """Faol userlarni ism / telefon bo'yicha qidirish: [Worker, ...] (mosi birinchi)"""
+
+    @abstractmethod
+    def delete_user(self, user_id):
+        """Userni o'chirish (soft delete)"""
+
+    @abstractmethod
+    def add_admin(self, phone):
+        """Userni admin qilish"""
+
+    @abstractmethod
+    def get_admins(self):
+        """Barcha adminlar: [Admin, ...]"""
+
+    @abstractmethod
+    def get_admin_by_phone(self, phone):
+        """Adminni telefon bo'yicha topish: Admin yoki None"""
+
+    @abstractmethod
+    def del_admin(self, phone):
+        """Admin huquqini olib tashlash"""
+
+    # ===== VAZIFALAR =====
+
+    @abstractmethod
+    def create_task(self, text, task_type, role_id, filial_id, recurrence=None):
+        """Yangi vazifa yaratish, ID qaytaradi"""
+
+    @abstractmethod
+    def create_tasks(self, texts, task_type, role_ids, filial_ids, recurrence=None):
+        """Matnlar x filiallar x rollar - bitta tranzaksiyada: (yaratildi, o'tkazildi)"""
+
+    @abstractmethod
+    def get_user_tasks(self, user_id, target_date):
+        """User ning shu sanadagi vazifalari: [UserTask, ...]"""
+
+    @abstractmethod
+    def complete_task(self, task_id, user_id, media_type=None, media_file_id=None, text_message=None,
+                      outbox=None, evidence=()):
+        """Vazifani bugun bajarildi deb belgilash. outbox=(chat_id, method, payload)
+        bo'lsa guruh xabari shu tranzaksiyada navbatga qo'yiladi, ID si qaytadi.
+        evidence - [(media_type, file_id, file_unique_id, media_group_id), ...]
+        (bo'sh bo'lsa media_file_id dan); oldingi dalillar almashtiriladi"""
+
+    @abstractmethod
+    def get_task_evidence(self, task_id, user_id, completion_date):
+        """Bajarilish dalillari: [Evidence, ...] (position tartibida)"""
+
+    @abstractmethod
+    def get_completions(self, start_date, end_date, filial_id=None):
+        """Sanalar oralig'idagi bajarilishlar: [Completion, ...]"""
+
+    @abstractmethod
+    def get_task(self, task_id):
+        """Bitta vazifa: Task yoki None"""
+
+    @abstractmethod
+    def get_all_tasks(self, filial_id=None, role_id=None, task_type=None):
+        """Faol vazifalar: [Task, ...]"""
+
+    @abstractmethod
+    def get_tasks_page(self, filial_id=None, role_id=None, after_id=None, before_id=None, limit=None):
+        """Faol vazifalar sahifasi (id bo'yicha keyset): Page[Task]"""
+
+    @abstractmethod
+    def search_tasks(self, text, limit=None):
+        """Faol vazifalarni matni bo'yicha qidirish: [Task, ...] (mosi birinchi)"""
+
+    @abstractmethod
+    def deactivate_tasks(self, task_ids):
+        """Ko'p vazifani o'chirish (soft delete), o'chirilganlar soni"""
+
+    @abstractmethod
+    def reassign_tasks(self, task_ids, filial_id=None, role_id=None):
+        """Faol vazifalarni boshqa filial / rolga o'tkazish, o'tkazilganlar soni"""
+
+    @abstractmethod
+    def delete_task(self, task_id):
+        """Vazifani o'chirish (soft delete)"""
+
+    # ===== GURUHLAR =====
+
+    @abstractmethod
+    def get_group_chat_id(self, filial_id):
+        """Filial guruhi chat ID si (topilmasa None)"""
+
+    @abstractmethod
+    def get_all_group_chats(self):
+        """Faol guruhlar: {filial_id: chat_id}"""
+
+    # ===== STATISTIKA =====
+
+    @abstractmethod
+    def get_daily_statistics(self, filial_id, target_date):
+        """Filial kunlik statistikasi: (role_stats, user_stats)"""
+
+    @abstractmethod
+    def get_all_daily_statistics(self, target_date):
+        """Barcha filiallar: {filial_id: (role_stats, user_stats)}"""
+
+    @abstractmethod
+    def refresh_daily_stats(self, start_date, end_date=None):
+        """Kunlik yig'indini qayta qurish va kunlarni yopish, kunlar sonini qaytaradi"""
+
+    @abstractmethod
+    def get_user_daily_history(self, user_id, start_date, end_date):
+        """User ning yopilgan kunlari: [DayResult, ...]"""
+
+    @abstractmethod
+    def get_user_statistics(self, user_id, today):
+        """User ning yopilgan kunlar bo'yicha statistikasi: UserStatistics"""
+
+    # ===== FSM HOLATLARI =====
+
+    @abstractmethod
+    def get_fsm_state(self, key):
+        """Saqlangan holat: (state, data_json, updated_at) yoki None"""
+
+    @abstractmethod
+    def save_fsm_states(self, rows, deleted_keys=()):
+        """Bitta tranzaksiyada: rows [(key, state, data_json, updated_at)] yozish,
+        deleted_keys o'chirish"""
+
+    @abstractmethod
+    def purge_fsm_states(self, before):
+        """updated_at < before bo'lgan holatlarni o'chirish, soni qaytadi"""
+
+    # ===== XABARLAR NAVBATI =====
+
+    @abstractmethod
+    def get_pending_outbox(self, now, limit):
+        """Yuborishga tayyor xabarlar (chat navbati boshining next_attempt_at <= now),
+        id tartibida: [OutboxMessage, ...]"""
+
+    @abstractmethod
+    def mark_outbox_sent(self, outbox_id, message_id=None):
+        """Xabar guruhga yetkazildi"""
+
+    @abstractmethod
+    def mark_outbox_failed(self, outbox_id, error, retry_at=None):
+        """Urinish o'tmadi: retry_at bo'lsa shu vaqtda qayta, aks holda failed"""
+
+    @abstractmethod
+    def retry_failed_outbox(self):
+        """failed xabarlarni qayta navbatga qo'yish, soni qaytadi"""
+
+    @abstractmethod
+    def purge_outbox(self, before):
+        """before (UTC) dan oldin yuborilganlarni o'chirish, soni qaytadi"""
+
+    @abstractmethod
+    def get_outbox_stats(self):
+        """Navbat holati: OutboxStats"""
+
+    # ===== XIZMAT =====
+
+    def archive_completions(self, today=None):
+        """Eski oylarni arxivga ko'chirish, ko'chirilgan qatorlar sonini qaytaradi"""
+        return 0
+
+    def run_maintenance(self):
+        """Tungi xizmat ishlari, [maintenance.StepResult, ...]"""
+        return []
+
+    def backup(self):
+        """Zaxira nusxa olish (backup.BackupResult); fayli yo'q ombor uchun None"""
+        return None
+
+    def cache_stats(self):
+        """Keshlar bo'yicha hit/miss statistikasi"""
+        return {}
+
+    def close(self):
+        """Resurslarni bo'shatish"""
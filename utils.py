@@ -3,6 +3,7 @@
 Yordamchi funksiyalar
 """
 
+import functools
 from datetime import datetime, date
 import config
 
@@ -20,6 +21,24 @@ def format_phone(phone):
     phone_str = str(phone)
     return f"+{phone_str}"
 
+def parse_id_list(text, limit=1000):
+    """"5, 7 12-20" -> [5, 7, 12, ..., 20] (tartiblangan, takrorlarsiz).
+
+    Noto'g'ri qism yoki limit dan ko'p ID bo'lsa ValueError.
+    """
+    ids = set()
+    for part in text.replace(",", " ").split():
+        start, _, end = part.partition("-")
+        if not start.isdigit() or (end and not end.isdigit()):
+            raise ValueError(f"noto'g'ri qism: {part}")
+        start, end = int(start), int(end or start)
+        if end < start or len(ids) + end - start + 1 > limit:
+            raise ValueError(f"ko'pi bilan {limit} ta ID")
+        ids.update(range(start, end + 1))
+    if not ids:
+        raise ValueError("ID topilmadi")
+    return sorted(ids)
+
 def get_status_emoji(percentage):
     """Foiz bo'yicha emoji berish"""
     if percentage >= 80:
@@ -31,34 +50,35 @@ def get_status_emoji(percentage):
     else:
         return config.STATUS_EMOJI[0]
 
-def format_user_tasks_message(user_data, tasks, target_date):
+def format_user_tasks_message(user, tasks, target_date):
     """User uchun vazifalar ro'yxati xabarini yaratish"""
     
-    # User ma'lumotlari
-    user_id, telegram_id, full_name, phone, filial_id, filial_name, role_id, role_name, is_admin = user_data
-    
     # Vazifalarni guruhlash
     daily_tasks = []
     monday_tasks = []
     monthly_tasks = []
+    custom_tasks = []
     total_incomplete = 0
     
-    for task_id, task_text, task_type, completed in tasks:
-        if not completed:
+    for task in tasks:
+        if not task.completed:
             total_incomplete += 1
         
-        if task_type == 'daily':
-            daily_tasks.append((task_id, task_text, completed))
-        elif task_type == 'monday':
-            monday_tasks.append((task_id, task_text, completed))
-        elif task_type == 'monthly':
-            monthly_tasks.append((task_id, task_text, completed))
+        item = (task.id, task.text, task.completed)
+        if task.task_type == 'daily':
+            daily_tasks.append(item)
+        elif task.task_type == 'monday':
+            monday_tasks.append(item)
+        elif task.task_type == 'monthly':
+            monthly_tasks.append(item)
+        else:
+            custom_tasks.append(item)
     
     # Xabar matni
     message = f"""<b>📋 SIZNING VAZIFALARINGIZ</b>
 
-Filial: {filial_name}
-Rol: {role_name}
+Filial: {user.filial_name}
+Rol: {user.role_name}
 Sana: {format_date(target_date)}
 
 """
@@ -87,6 +107,14 @@ Sana: {format_date(target_date)}
             message += f"{i}. [{emoji}] {text}\n"
         message += "\n"
     
+    # Maxsus jadvaldagi vazifalar
+    if custom_tasks:
+        message += "🟣 MAXSUS JADVAL VAZIFALAR:\n"
+        for i, (task_id, text, completed) in enumerate(custom_tasks, 1):
+            emoji = "✅" if completed else "❗"
+            message += f"{i}. [{emoji}] {text}\n"
+        message += "\n"
+    
     if total_incomplete > 0:
         message += f"Jami bajarilmagan: {total_incomplete} ta vazifa"
     else:
@@ -94,9 +122,8 @@ Sana: {format_date(target_date)}
     
     return message
 
-def format_task_completion_caption(user_data, task_text):
+def format_task_completion_caption(user, task_text):
     """Vazifa bajarilganligi haqida guruhga yuborish uchun caption"""
-    user_id, telegram_id, full_name, phone, filial_id, filial_name, role_id, role_name, is_admin = user_data
     
     now = datetime.now()
     time_str = now.strftime('%d-%B-%Y, %H:%M')
@@ -111,10 +138,10 @@ def format_task_completion_caption(user_data, task_text):
     
     caption = f"""<b>📌 VAZIFA BAJARILDI</b>
 
-🏪 Filial: {filial_name}
-👤 Ishchi: {full_name}
-📱 Telefon: {format_phone(phone)}
-🎭 Rol: {role_name}
+🏪 Filial: {user.filial_name}
+👤 Ishchi: {user.full_name}
+📱 Telefon: {format_phone(user.phone)}
+🎭 Rol: {user.role_name}
 📝 Vazifa: {task_text}
 ⏰ Bajarilgan vaqt: {time_str}"""
     
@@ -135,18 +162,23 @@ def format_daily_statistics(filial_name, role_stats, user_stats, target_date):
     
     # Rol bo'yicha guruhlangan userlar
     users_by_role = {}
-    for user_id, user_name, role_name, user_total, user_completed in user_stats:
-        if role_name not in users_by_role:
-            users_by_role[role_name] = []
-        users_by_role[role_name].append({
-            'name': user_name,
-            'total': user_total,
-            'completed': user_completed,
-            'percentage': round(user_completed / user_total * 100) if user_total > 0 else 0
+    for user_stat in user_stats:
+        if user_stat.role_name not in users_by_role:
+            users_by_role[user_stat.role_name] = []
+        users_by_role[user_stat.role_name].append({
+            'name': user_stat.full_name,
+            'total': user_stat.total,
+            'completed': user_stat.completed,
+            'percentage': round(user_stat.completed / user_stat.total * 100) if user_stat.total > 0 else 0
         })
     
     # Har bir rol uchun
-    for role_id, role_name, user_count, role_total, role_completed in role_stats:
+    for role_stat in role_stats:
+        role_name = role_stat.role_name
+        user_count = role_stat.user_count
+        role_total = role_stat.total
+        role_completed = role_stat.completed
+        
         if user_count == 0:
             continue
         
@@ -199,4 +231,81 @@ def format_daily_statistics(filial_name, role_stats, user_stats, target_date):
         for i, user in enumerate(low_performers[:3], 1):
             message += f"{i}. {user['name']} ({user['percentage']}%)\n"
     
-    return message
\ No newline at end of file
+    return message
+
+def format_network_statistics(filials, statistics, target_date):
+    """Barcha filiallar bo'yicha umumiy kunlik hisobot"""
+    
+    message = f"""<b>🌐 BARCHA FILIALLAR HISOBOTI</b>
+📅 Sana: {format_date(target_date)}
+
+"""
+    
+    total_workers = 0
+    total_tasks = 0
+    total_completed = 0
+    
+    filial_results = []
+    for filial in filials:
+        role_stats, user_stats = statistics.get(filial.id, ([], []))
+        
+        workers = sum(role_stat.user_count for role_stat in role_stats)
+        tasks = sum(role_stat.total for role_stat in role_stats)
+        completed = sum(role_stat.completed for role_stat in role_stats)
+        percentage = round(completed / tasks * 100) if tasks > 0 else 0
+        
+        total_workers += workers
+        total_tasks += tasks
+        total_completed += completed
+        filial_results.append((filial.name, workers, tasks, completed, percentage))
+    
+    # Eng yaxshi natijadan boshlab
+    filial_results.sort(key=lambda x: x[4], reverse=True)
+    
+    message += "━━━━━━━━━━━━━━━━━━━━━━\n"
+    for filial_name, workers, tasks, completed, percentage in filial_results:
+        emoji = get_status_emoji(percentage)
+        message += f"{emoji} {filial_name} - {completed}/{tasks} ({percentage}%), {workers} ta ishchi\n"
+    
+    overall_percentage = round(total_completed / total_tasks * 100) if total_tasks > 0 else 0
+    
+    message += "━━━━━━━━━━━━━━━━━━━━━━\n\n"
+    message += f"Jami filiallar: {len(filials)} ta\n"
+    message += f"Jami ishchilar: {total_workers} ta\n"
+    message += f"Jami vazifalar: {total_tasks} ta\n"
+    message += f"Bajarildi: {total_completed} ta ({overall_percentage}%)"
+    
+    return message
+
+@functools.lru_cache(maxsize=1024)
+def format_user_statistics(user, stats, today_completed, today_total, target_date):
+    """User shaxsiy statistikasi xabari (bir xil ma'lumot uchun keshdan)"""
+    
+    def result_line(title, completed, total):
+        if total == 0:
+            return f"▫️ {title}: vazifa yo'q\n"
+        percentage = round(completed / total * 100)
+        return f"{get_status_emoji(percentage)} {title}: {completed}/{total} ({percentage}%)\n"
+    
+    message = f"""<b>📊 MENING STATISTIKAM</b>
+
+👤 {user.full_name}
+🏪 Filial: {user.filial_name}
+📅 Sana: {format_date(target_date)}
+
+"""
+    
+    message += "━━━━━━━━━━━━━━━━━━━━━━\n"
+    message += result_line("Bugun", today_completed, today_total)
+    message += result_line("Oxirgi 7 kun", stats.week_completed, stats.week_assigned)
+    message += result_line("Oxirgi 30 kun", stats.month_completed, stats.month_assigned)
+    message += result_line("Oy boshidan", stats.mtd_completed, stats.mtd_assigned)
+    message += "━━━━━━━━━━━━━━━━━━━━━━\n\n"
+    
+    message += f"🔥 Ketma-ket to'liq bajarilgan kunlar: {stats.streak} ta\n"
+    if stats.rank:
+        message += f"🏆 Filialdagi o'rningiz: {stats.rank}/{stats.filial_size} (30 kun)\n"
+    
+    message += "\n<i>Kunlik natijalar har kuni 00:00 da yangilanadi.</i>"
+    
+    return message
@@ -0,0 +1,148 @@
+# webhook.py
+"""
+Webhook rejimi - ichki aiohttp server (config.RUN_MODE = "webhook")
+
+    POST {WEBHOOK_PATH}  - Telegram update lari (secret token bilan)
+    GET  /health         - holat va navbat (Render healthCheckPath)
+
+Update navbatga qo'yiladi va Telegramga darhol 200 qaytadi; uni
+WEBHOOK_WORKERS ta ishchi parallel qayta ishlaydi. Navbat to'lsa so'rov
+joy bo'shaguncha kutadi - yuklama shu yerda cheklanadi. To'xtatishda
+(SIGTERM / SIGINT) server yangi so'rov qabul qilmaydi, navbatdagilar
+tugatiladi.
+"""
+
+import asyncio
+import hashlib
+import hmac
+import logging
+import signal
+import time
+
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+
+import config
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+# To'xtatishda navbatni tugatish uchun ko'pi bilan (soniya)
+DRAIN_TIMEOUT = 30
+
+
+def secret_token(bot_token):
+    """WEBHOOK_SECRET yoki tokendan olingan barqaror qiymat (A-Za-z0-9)"""
+    return config.WEBHOOK_SECRET or hashlib.sha256(bot_token.encode()).hexdigest()
+
+
+def webhook_url():
+    return config.WEBHOOK_URL.rstrip("/") + config.WEBHOOK_PATH
+
+
+class WebhookServer:
+    """Webhook qabul qiluvchi server va update ishchilari"""
+
+    def __init__(self, dp: Dispatcher, bot: Bot,
+                 workers=config.WEBHOOK_WORKERS,
+                 queue_size=config.WEBHOOK_QUEUE_SIZE):
+        self.dp = dp
+        self.bot = bot
+        self.secret = secret_token(bot.token)
+        self.workers = workers
+        self.queue = asyncio.Queue(queue_size)
+        self.received = 0
+        self.handled = 0
+        self.failed = 0
+        self.started = time.monotonic()
+        self._tasks = []
+
+    def create_app(self):
+        app = web.Application()
+        app.router.add_post(config.WEBHOOK_PATH, self.handle_update)
+        app.router.add_get("/health", self.health)
+        return app
+
+    async def handle_update(self, request):
+        """Telegramdan kelgan update - navbatga"""
+        token = request.headers.get(SECRET_HEADER, "")
+        if not hmac.compare_digest(token, self.secret):
+            return web.Response(status=401)
+
+        try:
+            update = Update.model_validate(await request.json(), context={"bot": self.bot})
+        except Exception as e:
+            # 200 - Telegram buzilgan update ni qayta-qayta yubormasin
+            logger.warning(f"⚠️ Update o'qilmadi: {e}")
+            return web.Response()
+
+        self.received += 1
+        await self.queue.put(update)
+        return web.Response()
+
+    async def health(self, request):
+        return web.json_response({
+            "status": "ok",
+            "mode": "webhook",
+            "workers": self.workers,
+            "queue": self.queue.qsize(),
+            "received": self.received,
+            "handled": self.handled,
+            "failed": self.failed,
+            "uptime": int(time.monotonic() - self.started),
+        })
+
+    async def _worker(self):
+        while True:
+            update = await self.queue.get()
+            try:
+                await self.dp.feed_update(self.bot, update)
+                self.handled += 1
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"❌ Update {update.update_id} da xatolik: {e}", exc_info=True)
+            finally:
+                self.queue.task_done()
+
+    async def run(self, allowed_updates=None):
+        """Serverni ishga tushirish, webhook ni o'rnatish va signalgacha ishlash"""
+        runner = web.AppRunner(self.create_app(), access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, config.WEB_HOST, config.WEB_PORT)
+        await site.start()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        logger.info(f"🌐 Webhook server: {config.WEB_HOST}:{config.WEB_PORT}, {self.workers} ta ishchi")
+        await self.dp.emit_startup(bot=self.bot)
+
+        await self.bot.set_webhook(
+            url=webhook_url(),
+            secret_token=self.secret,
+            allowed_updates=allowed_updates,
+            max_connections=config.WEBHOOK_MAX_CONNECTIONS
+        )
+        logger.info(f"🔗 Webhook o'rnatildi: {webhook_url()}")
+
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, stop.set)
+            except NotImplementedError:  # Windows
+                pass
+
+        try:
+            await stop.wait()
+        finally:
+            # Yangi so'rovlar yo'q - navbatdagilarni tugatish
+            await runner.cleanup()
+            try:
+                await asyncio.wait_for(self.queue.join(), DRAIN_TIMEOUT)
+            except asyncio.TimeoutError:
+                logger.warning(f"⚠️ Navbatda {self.queue.qsize()} ta update qoldi")
+            for task in self._tasks:
+                task.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+            # start_polling dagidek - FSM storage va boshqalar yopiladi
+            await self.dp.emit_shutdown(bot=self.bot)
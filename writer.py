@@ -0,0 +1,142 @@
+# writer.py
+"""
+Yagona yozuvchi - barcha yozish so'rovlari bitta ulanish orqali
+
+Ko'p ishchi bir vaqtda vazifa topshirganda har bir yozish alohida
+ulanish va alohida commit bilan SQLite yozish qulfi uchun kurashardi
+("database is locked"). Endi yozishlar asyncio navbatiga tushadi,
+alohida thread dagi yagona ulanish ularni kichik guruhlarga yig'ib
+bitta tranzaksiyada commit qiladi va har bir chaqiruvchining
+future i commit dan keyin hal qilinadi.
+"""
+
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+
+
+logger = logging.getLogger(__name__)
+
+
+class DatabaseWriter:
+    """Yozish navbati va guruhli commit (group commit)"""
+
+    def __init__(self, database, batch_size=config.DB_WRITE_BATCH_SIZE,
+                 batch_window=config.DB_WRITE_BATCH_WINDOW,
+                 synchronous=config.DB_WRITER_SYNCHRONOUS):
+        self._db = database
+        self.batch_size = batch_size
+        self.batch_window = batch_window / 1000
+        self.synchronous = synchronous
+
+        self.batches = 0
+        self.writes = 0
+
+        self._queue = None
+        self._task = None
+        self._conn = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-writer")
+
+    @property
+    def running(self):
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """Yozuvchini joriy event loop da ishga tushirish"""
+        if self.running:
+            return
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run(), name="db-writer")
+
+    async def stop(self):
+        """Navbatdagi yozishlarni tugatib, yozuvchini to'xtatish"""
+        if not self.running:
+            return
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, self._close_connection)
+        self._executor.shutdown(wait=True)
+
+    async def submit(self, method, *args, **kwargs):
+        """Yozish metodini navbatga qo'yish va commit bo'lguncha kutish"""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((method, args, kwargs, future))
+        return await future
+
+    def stats(self):
+        """Guruhli commit statistikasi"""
+        return {
+            "batches": self.batches,
+            "writes": self.writes,
+            "queued": self._queue.qsize() if self._queue else 0,
+        }
+
+    def _drain(self, batch):
+        """Navbatda turganlarni guruhga qo'shish; to'xtash belgisi kelsa True"""
+        while len(batch) < self.batch_size:
+            try:
+                item = self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return False
+            if item is None:
+                return True
+            batch.append(item)
+        return False
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+
+        while not stopping:
+            item = await self._queue.get()
+            if item is None:
+                break
+
+            batch = [item]
+            stopping = self._drain(batch)
+
+            # Qisqa oyna - bir vaqtda kelgan yozishlar bitta commit ga tushsin
+            if not stopping and len(batch) < self.batch_size and self.batch_window:
+                await asyncio.sleep(self.batch_window)
+                stopping = self._drain(batch)
+
+            # Kutishdan voz kechilgan chaqiruvlarni bajarmaslik
+            batch = [item for item in batch if not item[3].cancelled()]
+            if not batch:
+                continue
+
+            calls = [(method, args, kwargs) for method, args, kwargs, future in batch]
+            try:
+                results = await loop.run_in_executor(self._executor, self._write, calls)
+            except Exception as e:
+                logger.error(f"Guruhli commit xatosi ({len(batch)} ta yozish): {e}")
+                for *_, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.writes += len(batch)
+            for (*_, future), (result, error) in zip(batch, results):
+                if future.done():
+                    continue
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(result)
+
+    def _write(self, calls):
+        """Yozuvchi thread: guruhni bitta tranzaksiyada bajarish"""
+        if self._conn is None:
+            self._conn = self._db.pool.dedicated(self.synchronous)
+        return self._db.execute_batch(self._conn, calls)
+
+    def _close_connection(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None